@@ -1,56 +1,166 @@
+import time
+STARTED = time.perf_counter()  # Référence du mode --startup-time
+import argparse
 import json
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import random
-import sqlite3
-import webbrowser
-from datetime import datetime
-from PIL import Image, ImageTk
-import os
-from fpdf import FPDF
+import queue
 import os
+import threading
+# PIL, fpdf, pdf_export et burger_share sont importés à la première utilisation
+import instrumentation
+from instrumentation import span
+from burger_engine import CLASSIC_TYPES, SIZES
+from burger_render import CACHE, draw_fragment, pdf_fragment, text_runs
+from burger_tables import TranslationError
+from history_stats import HistoryStats
+from history_db import DEFAULT_DB_PATH, HistoryDatabase, default_db_path
+from history_view import HistoryView
+from image_catalog import ImageCatalog
+from translation_manager import TranslationManager
+from ui_tasks import LatencyMonitor, TaskRunner
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Remonte à la racine du projet
 SRC_DIR = os.path.join(BASE_DIR, "src")  # Chemin vers le dossier src/
+LANGUAGE_FLAGS = {"FR": "🇫🇷", "EN": "🇬🇧"}
+# Étapes chronométrées de l'interface (voir instrumentation.py). Les méthodes
+# qui attendent une boîte de dialogue ne sont mesurées que sur leur partie SQL/PDF.
+APP_STAGES = {
+    "load_translations": "app.load_translations",
+    "show_result": "app.show_result",
+    "render_result": "app.render_result",
+    "load_random_image": "app.load_random_image",
+    "load_history": "app.load_history",
+    "apply_history_filters": "app.apply_history_filters",
+    "show_history": "app.show_history",
+    "render_stats": "app.render_stats",
+    "set_language": "app.set_language",
+}
 
 class UltimateBurgerApp:
-    def __init__(self, root):
+    def __init__(self, root, db_path=None):
         self.root = root
+        self.db_path = db_path or DEFAULT_DB_PATH
         self.language = "FR"
         self.current_burger = None
+        # Travail hors du thread Tk (SQLite, images, PDF, traductions)
+        self.tasks = TaskRunner(root)
+        self.translations = {}
         self.load_translations()
-        self.setup_database()
+        self.database = None
+        self.history_reader = None
+        self.history_writer = None
+        self.history_stats = None
+        self.database_ready = []  # Actions demandées pendant l'ouverture de la base
+        self.stats_window = None
+        self.export_cancel = None  # Annulation de l'export PDF de l'historique en cours
+        self.share_pipeline = None
+        self.image_catalog = ImageCatalog(os.path.join(SRC_DIR, "burger_images"))
         self.setup_styles()
         self.setup_ui()
-        self.load_history()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Base de données et historique après le premier affichage
+        self.root.after_idle(self.setup_database)
+        # Fichiers de traduction surveillés : une modification est appliquée sans redémarrer
+        self.root.after(1000, self.watch_translations)
+        self.latency_monitor = None
+        if instrumentation.enabled():
+            # Ctrl+Maj+P : profil par échantillonnage de 5 s
+            self.root.bind("<Control-P>", self.capture_profile)
+            self.latency_monitor = LatencyMonitor(root)
+            self.latency_monitor.start()
 
     def load_translations(self):
-        """Charge les traductions depuis le fichier JSON"""
-        try:
-            lang_file = os.path.join(SRC_DIR, f"translations_{self.language.lower()}.json")
-            with open(lang_file, 'r', encoding='utf-8') as f:
-                self.trans = json.load(f)
-        except FileNotFoundError:
+        """Charge la langue courante, puis compile les autres sur un thread"""
+        if not self.translations:
+            self.translation_manager = TranslationManager(SRC_DIR)
+            # Entrées (traductions, tables, moteur) par langue, remplacées d'un bloc au rechargement
+            self.translations = self.translation_manager.entries
+            self.languages = self.translation_manager.languages() or [self.language]
+            try:
+                self.translation_manager.load(self.language)
+            except (FileNotFoundError, json.JSONDecodeError, TranslationError) as e:
+                self.translation_error(self.language, e)
+            for lang in self.languages:
+                if lang != self.language:
+                    self.load_language(lang)
+        self.trans, self.tables, self.engine = self.translations.get(self.language, ({}, None, None))
+
+    def load_language(self, lang, then=None):
+        """Compile une langue en arrière-plan ; then() est appelé une fois installée"""
+        def done(entry):
+            self.translation_manager.install(lang, entry)
+            if then is not None:
+                then()
+        self.tasks.submit(self.translation_manager.compile, lang, key=("language", lang), on_done=done,
+                          on_error=lambda e: self.translation_error(lang, e))
+
+    def watch_translations(self):
+        """Recompile les fichiers de traduction modifiés (édition sans redémarrage)"""
+        for lang in self.translation_manager.changed():
+            self.load_language(lang, then=lambda lang=lang: self.translations_reloaded(lang))
+        self.root.after(1000, self.watch_translations)
+
+    def translations_reloaded(self, lang):
+        """Applique une langue rechargée si c'est la langue affichée"""
+        # Les rendus en cache portent encore les anciens textes
+        CACHE.clear()
+        if lang != self.language:
+            return
+        self.load_translations()
+        if self.current_burger and self.current_burger.get("key") is not None:
+            # Burger régénéré avec les nouveaux textes (mêmes tirages)
+            self.current_burger = self.engine.replay(self.current_burger["key"])
+        self.refresh_language()
+
+    def translation_error(self, lang, error):
+        """Signale un fichier de traduction manquant ou corrompu"""
+        if isinstance(error, FileNotFoundError):
+            lang_file = os.path.join(SRC_DIR, f"translations_{lang.lower()}.json")
             messagebox.showerror("Erreur", f"Fichier de traduction manquant: {lang_file}")
-            self.trans = {}
-        except json.JSONDecodeError:
+        elif isinstance(error, json.JSONDecodeError):
             messagebox.showerror("Erreur", "Fichier de traduction corrompu")
-            self.trans = {}
+        else:
+            messagebox.showerror("Erreur", str(error))
 
     def setup_database(self):
-        """Initialise la base de données SQLite"""
-        db_path = os.path.join(SRC_DIR, 'burgers.db')
-        self.conn = sqlite3.connect('burgers.db')
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS burgers
-                            (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            name TEXT,
-                            ingredients TEXT,
-                            sauce TEXT,
-                            diet TEXT,
-                            calories INTEGER,
-                            created_at TEXT,
-                            burger_type TEXT)''')
-        self.conn.commit()
+        """Initialise la base de données SQLite (sur la file "db"), puis charge l'historique"""
+        def done(result):
+            self.database, self.history_reader = result
+            self.db_path = self.database.db_path
+            self.history_writer = self.database.writer
+            self.history_view.reader = self.history_reader
+            # Même connexion et même dictionnaire de recettes que le lecteur (file "db")
+            self.history_stats = HistoryStats(self.history_reader.conn, self.history_reader.book)
+            self.load_history()
+            self.poll_saved_burgers()
+            actions, self.database_ready = self.database_ready, []
+            for action in actions:
+                action()
+
+        self.tasks.submit(self.open_database, self.db_path, lane="db", key="database", on_done=done,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load history: {str(e)}"))
+
+    def when_database_ready(self, action):
+        """Exécute action tout de suite si la base est ouverte, sinon à la fin de setup_database
+
+        Le thread Tk n'attend jamais l'ouverture ; une même action n'est mise en attente qu'une fois.
+        """
+        if self.database is not None:
+            action()
+        elif action not in self.database_ready:
+            self.database_ready.append(action)
+
+    @staticmethod
+    def open_database(db_path):
+        """Ouvre (et migre si besoin) la base ; renvoie la base et le lecteur de la file "db"
+
+        Toutes les écritures (ajouts groupés, suppressions) passent par database.writer.
+        La base par défaut reprend celle des versions précédentes (voir default_db_path).
+        """
+        if db_path == DEFAULT_DB_PATH:
+            db_path = default_db_path()
+        database = HistoryDatabase(db_path)
+        return database, database.open_reader()
 
     def setup_styles(self):
         """Configure les styles visuels"""
@@ -62,6 +172,8 @@ class UltimateBurgerApp:
 
     def setup_ui(self):
         """Construit l'interface utilisateur"""
+        self.translated_widgets = []
+        self.translated_tabs = []
         self.root.title(self.t("app_title"))
         self.root.geometry("1200x800")
         
@@ -69,45 +181,62 @@ class UltimateBurgerApp:
         control_frame = ttk.Frame(self.root)
         control_frame.pack(pady=10)
         
-        ttk.Button(control_frame, text="🇫🇷 FR", command=lambda: self.set_language("FR")).pack(side="left", padx=5)
-        ttk.Button(control_frame, text="🇬🇧 EN", command=lambda: self.set_language("EN")).pack(side="left", padx=5)
+        languages = [lang for lang in LANGUAGE_FLAGS if lang in self.languages]
+        languages += [lang for lang in self.languages if lang not in LANGUAGE_FLAGS]
+        for lang in languages:
+            ttk.Button(
+                control_frame,
+                text=f"{LANGUAGE_FLAGS.get(lang, '🌐')} {lang}",
+                command=lambda lang=lang: self.set_language(lang)
+            ).pack(side="left", padx=5)
         
-        # Onglets
+        # Onglets : seul l'onglet visible est construit, les autres à leur première sélection
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=5)
-        
-        self.setup_classic_tab()
-        self.setup_extreme_tab()
-        self.setup_zodiac_tab()
+        self.sauce_combo = None
+        self.sign_var = None
+        self.pending_tabs = {}
+        for key, builder, style in (
+            ("classic_tab", self.setup_classic_tab, "TFrame"),
+            ("extreme_tab", self.setup_extreme_tab, "TFrame"),
+            ("zodiac_tab", self.setup_zodiac_tab, "Zodiac.TFrame"),
+        ):
+            tab = ttk.Frame(self.notebook, style=style)
+            self.add_tab(tab, key)
+            self.pending_tabs[str(tab)] = (builder, tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.build_selected_tab)
+        self.build_selected_tab()
         
         # Résultats
         self.setup_result_display()
         self.setup_history_section()
 
-    def setup_classic_tab(self):
+    def build_selected_tab(self, event=None):
+        """Construit le contenu de l'onglet sélectionné s'il ne l'est pas encore"""
+        pending = self.pending_tabs.pop(self.notebook.select(), None)
+        if pending is not None:
+            builder, tab = pending
+            builder(tab)
+
+    def setup_classic_tab(self, tab):
         """Onglet des burgers classiques"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text=self.t("classic_tab"))
         
         # Type de burger
-        burger_types = [
-            "Hamburger", "Cheeseburger", "Bacon Burger",
-            "Chicken Burger", "Fish Burger", "Veggie Burger"
-        ]
+        burger_types = CLASSIC_TYPES
         
-        ttk.Label(tab, text=self.t("type_label")).grid(row=0, column=0, padx=5, pady=5)
+        self.tr(ttk.Label(tab), "type_label").grid(row=0, column=0, padx=5, pady=5)
         self.classic_type = ttk.Combobox(tab, values=burger_types, state="readonly")
         self.classic_type.grid(row=1, column=0, padx=5, pady=5)
         self.classic_type.set(burger_types[0])
         
         # Taille
-        ttk.Label(tab, text=self.t("size_label")).grid(row=0, column=1, padx=5, pady=5)
-        self.size_var = ttk.Combobox(tab, values=["Simple", "Double", "Triple"], state="readonly")
+        self.tr(ttk.Label(tab), "size_label").grid(row=0, column=1, padx=5, pady=5)
+        self.size_var = ttk.Combobox(tab, values=SIZES, state="readonly")
         self.size_var.grid(row=1, column=1, padx=5, pady=5)
         self.size_var.set("Simple")
         
         # Sauce
-        ttk.Label(tab, text=self.t("sauce_label")).grid(row=0, column=2, padx=5, pady=5)
+        self.tr(ttk.Label(tab), "sauce_label").grid(row=0, column=2, padx=5, pady=5)
         self.sauce_combo = ttk.Combobox(tab, values=list(self.trans["sauces"].keys()), state="readonly")
         self.sauce_combo.grid(row=1, column=2, padx=5, pady=5)
         self.sauce_combo.set(list(self.trans["sauces"].keys())[0])
@@ -116,33 +245,29 @@ class UltimateBurgerApp:
         ttk.Button(tab, text="ℹ️", width=3, command=self.show_sauce_info).grid(row=1, column=3)
         
         # Bouton générer
-        ttk.Button(tab, text=self.t("generate_btn"), command=self.generate_classic).grid(row=2, columnspan=4, pady=10)
+        self.tr(ttk.Button(tab, command=self.generate_classic), "generate_btn").grid(row=2, columnspan=4, pady=10)
 
-    def setup_extreme_tab(self):
+    def setup_extreme_tab(self, tab):
         """Onglet des burgers extrêmes"""
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text=self.t("extreme_tab"))
         
         # Niveau de folie
-        ttk.Label(tab, text=self.t("crazy_level")).pack()
+        self.tr(ttk.Label(tab), "crazy_level").pack()
         self.crazy_level = ttk.Scale(tab, from_=1, to=10, orient="horizontal")
         self.crazy_level.pack()
         self.crazy_level.set(5)
         
         # Option végan
         self.vegan_extreme = tk.BooleanVar()
-        ttk.Checkbutton(tab, text=self.t("vegan_option"), variable=self.vegan_extreme).pack(pady=5)
+        self.tr(ttk.Checkbutton(tab, variable=self.vegan_extreme), "vegan_option").pack(pady=5)
         
         # Bouton générer
-        ttk.Button(tab, text=self.t("generate_btn"), command=self.generate_extreme).pack(pady=15)
+        self.tr(ttk.Button(tab, command=self.generate_extreme), "generate_btn").pack(pady=15)
 
-    def setup_zodiac_tab(self):
+    def setup_zodiac_tab(self, tab):
         """Onglet des burgers du zodiaque"""
-        tab = ttk.Frame(self.notebook, style="Zodiac.TFrame")
-        self.notebook.add(tab, text=self.t("zodiac_tab"))
         
         # Signe du zodiaque
-        ttk.Label(tab, text=self.t("choose_sign"), font=("Georgia", 14)).pack(pady=10)
+        self.tr(ttk.Label(tab, font=("Georgia", 14)), "choose_sign").pack(pady=10)
         self.sign_var = ttk.Combobox(tab, values=list(self.trans["zodiac_signs"].keys()), state="readonly")
         self.sign_var.pack(pady=5)
         self.sign_var.set(list(self.trans["zodiac_signs"].keys())[0])
@@ -153,7 +278,7 @@ class UltimateBurgerApp:
         self.element_label.pack(pady=5)
         
         # Bouton générer
-        ttk.Button(tab, text=self.t("generate_btn"), command=self.generate_zodiac).pack(pady=15)
+        self.tr(ttk.Button(tab, command=self.generate_zodiac), "generate_btn").pack(pady=15)
         
         self.update_zodiac_display()
 
@@ -194,224 +319,159 @@ class UltimateBurgerApp:
 
     def setup_history_section(self):
         """Configure la section historique"""
-        history_frame = ttk.LabelFrame(self.root, text=self.t("history_title"))
+        history_frame = self.tr(ttk.LabelFrame(self.root), "history_title")
         history_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        self.history_list = tk.Listbox(
-            history_frame,
-            height=6,
-            font=('Helvetica', 10)
-        )
-        self.history_list.pack(fill="both", expand=True, padx=5, pady=5)
+        # Filtres : texte (nom/ingrédients), type, calories
+        filter_frame = ttk.Frame(history_frame)
+        filter_frame.pack(fill="x", padx=5)
+        
+        self.tr(ttk.Label(filter_frame), "search_label").pack(side="left")
+        self.search_var = ttk.Entry(filter_frame, width=20)
+        self.search_var.pack(side="left", padx=5)
+        self.search_var.bind("<Return>", self.apply_history_filters)
+        
+        self.type_filter = ttk.Combobox(filter_frame, values=["", "classic", "extreme", "zodiac"], state="readonly", width=10)
+        self.type_filter.pack(side="left", padx=5)
+        
+        self.tr(ttk.Label(filter_frame), "calories_range").pack(side="left")
+        self.min_calories = ttk.Entry(filter_frame, width=6)
+        self.min_calories.pack(side="left", padx=2)
+        self.max_calories = ttk.Entry(filter_frame, width=6)
+        self.max_calories.pack(side="left", padx=2)
         
-        scrollbar = ttk.Scrollbar(self.history_list)
-        scrollbar.pack(side="right", fill="y")
-        self.history_list.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.history_list.yview)
+        self.tr(ttk.Button(filter_frame, command=self.apply_history_filters), "filter_btn").pack(side="left", padx=5)
+        
+        # Liste virtualisée : seules les lignes autour de la vue sont chargées
+        # Le lecteur est fourni par setup_database, une fois la base ouverte
+        self.history_view = HistoryView(
+            history_frame, self.history_reader, tasks=self.tasks,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load history: {str(e)}"))
         
         btn_frame = ttk.Frame(history_frame)
         btn_frame.pack(fill="x", pady=5)
         
-        ttk.Button(btn_frame, text=self.t("view_btn"), command=self.show_history).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text=self.t("delete_btn"), command=self.delete_history).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text=self.t("save_btn"), command=self.save_burger).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text=self.t("pdf_btn"), command=self.export_pdf).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text=self.t("share_btn"), command=self.share_burger).pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.show_history), "view_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.delete_history), "delete_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.save_burger), "save_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.export_pdf), "pdf_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.share_burger), "share_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.export_history_pdf), "pdf_history_btn").pack(side="left", padx=5)
+        self.tr(ttk.Button(btn_frame, command=self.show_stats), "stats_btn").pack(side="left", padx=5)
+        self.export_progress = ttk.Progressbar(btn_frame, length=150, mode="determinate")
+        self.export_progress.pack(side="left", padx=5)
+        self.cancel_export_btn = self.tr(ttk.Button(btn_frame, command=self.cancel_export, state="disabled"),
+                                         "cancel_export_btn")
+        self.cancel_export_btn.pack(side="left", padx=5)
 
     def generate_classic(self):
         """Génère un burger classique"""
-        burger_type = self.classic_type.get()
-        size = self.size_var.get()
-        sauce = self.sauce_combo.get()
-        
-        # Base des ingrédients
-        ingredients = self.trans["ingredients"]["classic"][burger_type].copy()
-        
-        # Ajustement de la taille
-        if size == "Double":
-            if "steak" in ingredients[1].lower() or "haché" in ingredients[1].lower():
-                ingredients.insert(1, self.trans["ingredients"]["classic"]["Double steak"])
-            elif "filet" in ingredients[1].lower() or "fillet" in ingredients[1].lower():
-                ingredients.insert(1, self.trans["ingredients"]["classic"]["Double filet"])
-        elif size == "Triple":
-            if "steak" in ingredients[1].lower() or "haché" in ingredients[1].lower():
-                ingredients[1:1] = [self.trans["ingredients"]["classic"]["Triple steak"]]
-            elif "filet" in ingredients[1].lower() or "fillet" in ingredients[1].lower():
-                ingredients[1:1] = [self.trans["ingredients"]["classic"]["Triple filet"]]
-        
-        # Calcul des calories
-        base_calories = {
-            "Hamburger": 500,
-            "Cheeseburger": 600,
-            "Bacon Burger": 750,
-            "Chicken Burger": 450,
-            "Fish Burger": 400,
-            "Veggie Burger": 350
-        }.get(burger_type, 500)
-
-        calories = {
-            "Simple": base_calories,
-            "Double": int(base_calories * 1.8),
-            "Triple": int(base_calories * 2.5)
-        }.get(size, base_calories)
-
-        self.current_burger = {
-            "name": f"{size} {burger_type}",
-            "ingredients": ingredients,
-            "sauce": sauce,
-            "sauce_desc": self.trans["sauces"][sauce],
-            "calories": calories,
-            "type": "classic"
-        }
+        self.current_burger = self.engine.create("classic", {
+            "burger_type": self.classic_type.get(),
+            "size": self.size_var.get(),
+            "sauce": self.sauce_combo.get()
+        })
         self.show_result()
 
     def generate_extreme(self):
         """Génère un burger extrême"""
-        level = int(self.crazy_level.get())
-        vegan = self.vegan_extreme.get()
-
-        # Sélection des ingrédients
-        ingredient_type = "vegan" if vegan else "non_vegan"
-        ingredients = []
-        for lvl, items in self.trans["ingredients"]["extreme"][ingredient_type].items():
-            if level >= int(lvl):
-                ingredients.extend(items)
-
-        # Sauce
-        sauces = [
-            "Rainbow mayo",
-            "Banana ketchup", 
-            "1000-spice sauce"
-        ]
-        sauce = random.choice(sauces[:min(level, len(sauces))])
-
-        self.current_burger = {
-            "name": f"{'Vegan ' if vegan else ''}Crazy Burger Level {level}",
-            "ingredients": ingredients[:4],  # Limite à 4 ingrédients
-            "sauce": sauce,
-            "calories": 500 + level * 150,
-            "type": "extreme"
-        }
+        self.current_burger = self.engine.create("extreme", {
+            "level": int(self.crazy_level.get()),
+            "vegan": self.vegan_extreme.get()
+        })
         self.show_result()
 
     def generate_zodiac(self):
         """Génère un burger du zodiaque"""
-        sign_name = self.sign_var.get()
-        sign_data = self.trans["zodiac_signs"][sign_name]
-        
-        # Ingrédients par élément
-        element = sign_data["element"]
-        ingredients = self.trans["ingredients"]["zodiac"][element]
-
-        # Sauce par élément
-        sauce = random.choice({
-            "Fire": ["Spicy sauce", "BBQ sauce"],
-            "Earth": ["Forest sauce", "Truffle sauce"],
-            "Air": ["Light sauce", "Lemon sauce"],
-            "Water": ["Hollandaise", "Tartar sauce"]
-        }[element])
-
-        self.current_burger = {
-            "name": f"{sign_name} Burger {sign_data['emoji']}",
-            "ingredients": ingredients,
-            "sauce": sauce,
-            "calories": random.randint(600, 900),
-            "prediction": self.trans["zodiac_predictions"][sign_name],
-            "type": "zodiac"
-        }
+        self.current_burger = self.engine.create("zodiac", {"sign": self.sign_var.get()})
         self.show_result()
 
     def show_result(self):
         """Affiche le résultat généré"""
-        self.result_text.delete(1.0, tk.END)
-        burger = self.current_burger
-        
-        # Titre avec emoji
-        emoji = {
-            "classic": "🍔",
-            "extreme": "🌶️",
-            "zodiac": "♈"
-        }.get(burger["type"], "🍔")
-        
-        self.result_text.insert(tk.END, f"{emoji} {burger['name']} {emoji}\n\n", "title")
-        
-        # Ingrédients
-        self.result_text.insert(tk.END, f"{self.t('ingredients_label')}\n", "bold")
-        for ing in burger["ingredients"]:
-            self.result_text.insert(tk.END, f"- {ing}\n")
-        
-        # Sauce
-        if "sauce" in burger:
-            self.result_text.insert(tk.END, f"\n{self.t('sauce_label')}: {burger['sauce']}\n", "bold")
-            if "sauce_desc" in burger:
-                self.result_text.insert(tk.END, f"({burger['sauce_desc']})\n")
-        
-        # Calories
-        self.result_text.insert(tk.END, f"\n{self.t('calories_label')}: {burger['calories']} kcal\n", "bold")
-        
-        # Prédiction zodiac
-        if burger["type"] == "zodiac":
-            self.result_text.insert(tk.END, f"\n{self.t('prediction_label')}: {burger['prediction']}\n", "bold")
+        self.render_result()
         
         # Charger une image aléatoire
         self.load_random_image()
 
+    def render_result(self):
+        """Écrit la description du burger courant dans la zone de texte"""
+        self.result_text.delete(1.0, tk.END)
+        # Titre, ingrédients, sauce, calories et prédiction : rendu en cache, inséré en un appel
+        labels = {key: self.t(key) for key in ("ingredients_label", "sauce_label", "calories_label", "prediction_label")}
+        self.result_text.insert(tk.END, *text_runs(self.current_burger, labels))
+
     def load_random_image(self):
         """Charge une image aléatoire de burger"""
-        try:
-            img_dir = os.path.join(SRC_DIR, "burger_images")
-            if os.path.exists(img_dir):
-                images = [f for f in os.listdir(img_dir) if f.endswith(('.png', '.jpg', '.jpeg'))]
-                if images:
-                    img_path = os.path.join(img_dir, random.choice(images))
-                    img = Image.open(img_path)
-                    img.thumbnail((300, 300))
-                    self.burger_photo = ImageTk.PhotoImage(img)
-                    self.img_label.config(image=self.burger_photo)
-        except Exception as e:
-            print(f"Error loading image: {e}")
+        # Décodage sur la file "image" ; un nouveau clic remplace le chargement en cours
+        self.tasks.submit(self.image_catalog.next_image, lane="image", key="image",
+                          on_done=self.show_image,
+                          on_error=lambda e: print(f"Error loading image: {e}"))
+
+    def show_image(self, img):
+        """Affiche une miniature décodée (thread Tk)"""
+        if img is not None:
+            from PIL import ImageTk
+
+            self.burger_photo = ImageTk.PhotoImage(img)
+            self.img_label.config(image=self.burger_photo)
 
     def load_history(self):
         """Charge l'historique depuis la base de données"""
         try:
-            self.history_list.delete(0, tk.END)
-            for row in self.cursor.execute("SELECT id, name FROM burgers ORDER BY created_at DESC LIMIT 20"):
-                self.history_list.insert(tk.END, f"{row[0]} - {row[1]}")
+            self.history_view.refresh()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load history: {str(e)}")
+
+    def apply_history_filters(self, event=None):
+        """Applique les filtres de l'historique"""
+        def to_int(entry):
+            value = entry.get().strip()
+            return int(value) if value.isdigit() else None
+        try:
+            self.history_view.set_filters(
+                search=self.search_var.get(),
+                burger_type=self.type_filter.get(),
+                min_calories=to_int(self.min_calories),
+                max_calories=to_int(self.max_calories)
+            )
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load history: {str(e)}")
 
     def show_history(self):
         """Affiche le burger sélectionné dans l'historique"""
-        selection = self.history_list.curselection()
-        if not selection:
+        item_id = self.history_view.selected_id()
+        if item_id is None:
             return
             
-        item_id = self.history_list.get(selection[0]).split(" - ")[0]
-        try:
-            self.cursor.execute("SELECT * FROM burgers WHERE id=?", (item_id,))
-            burger_data = self.cursor.fetchone()
-            
-            if burger_data:
-                burger = {
-                    "name": burger_data[1],
-                    "ingredients": json.loads(burger_data[2]),
-                    "sauce": burger_data[3],
-                    "calories": burger_data[5],
-                    "type": burger_data[7]
-                }
-                
-                if burger["type"] == "zodiac":
-                    burger["prediction"] = "Burger zodiacal" if self.language == "FR" else "Zodiac burger"
+        def query():
+            with span("sql.select_burger"):
+                return self.history_reader.get(item_id)
+
+        def done(record):
+            if record is not None:
+                burger = None
+                if record.key is not None:
+                    # Burger rejoué à l'identique (prédiction comprise), dans la langue courante
+                    try:
+                        burger = self.engine.replay(record.key)
+                    except (ValueError, TypeError):
+                        pass  # Clé illisible (base ancienne ou importée) : champs enregistrés
+                if burger is None:
+                    burger = record.to_dict()
+                    burger.pop("key", None)  # Ne serait pas rejouable au changement de langue
+                    if burger.get("type") == "zodiac":
+                        burger["prediction"] = "Burger zodiacal" if self.language == "FR" else "Zodiac burger"
                 
                 self.current_burger = burger
                 self.show_result()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load burger: {str(e)}")
+
+        self.tasks.submit(query, lane="db", key="show_history", on_done=done,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load burger: {str(e)}"))
 
     def delete_history(self):
         """Supprime le burger sélectionné de l'historique"""
-        selection = self.history_list.curselection()
-        if not selection:
+        index = self.history_view.selected_index()
+        if index is None:
             return
             
         if not messagebox.askyesno(
@@ -420,14 +480,76 @@ class UltimateBurgerApp:
         ):
             return
             
-        item_id = self.history_list.get(selection[0]).split(" - ")[0]
-        try:
-            self.cursor.execute("DELETE FROM burgers WHERE id=?", (item_id,))
-            self.conn.commit()
-            self.load_history()
+        item_id = self.history_view.rows[index][0]
+
+        def delete():
+            with span("sql.delete_burger"):
+                self.history_writer.delete([item_id]).result()
+
+        def done(_):
+            self.history_view.remove(item_id)
+            self.refresh_stats()
             messagebox.showinfo("Success", "Burger supprimé !" if self.language == "FR" else "Burger deleted!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete: {str(e)}")
+
+        self.tasks.submit(delete, lane="db", on_done=done,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to delete: {str(e)}"))
+
+    def show_stats(self):
+        """Ouvre (ou ramène au premier plan) la fenêtre des statistiques de l'historique"""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+        else:
+            self.stats_window = tk.Toplevel(self.root)
+            self.stats_window.title(self.t("stats_title"))
+            self.stats_text = tk.Text(self.stats_window, height=30, width=60, wrap="word",
+                                      bg="white", fg="#333333", font=('Helvetica', 10))
+            self.stats_text.pack(fill="both", expand=True, padx=5, pady=5)
+            self.stats_text.tag_configure("title", font=('Helvetica', 14, 'bold'))
+            self.stats_text.tag_configure("bold", font=('Helvetica', 10, 'bold'))
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        """Relit les agrégats sur la file "db" si la fenêtre des statistiques est ouverte"""
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+        if self.history_stats is None:
+            # Base encore en cours d'ouverture : relecture dès qu'elle est prête
+            self.when_database_ready(self.refresh_stats)
+            return
+
+        def query():
+            with span("sql.stats"):
+                return self.history_stats.summary(days=14)
+
+        # Une relecture plus récente remplace celle en attente
+        self.tasks.submit(query, lane="db", key="stats", on_done=self.render_stats,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load statistics: {str(e)}"))
+
+    def render_stats(self, summary):
+        """Affiche les statistiques lues par refresh_stats (thread Tk)"""
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+        avg = self.t("stats_avg")
+        totals = summary["totals"]
+        runs = [
+            f"{self.t('stats_title')}\n\n", "title",
+            f"{self.t('stats_total')}: {totals.burgers} ({avg} {totals.avg_calories} kcal)\n", "bold",
+            f"\n{self.t('stats_by_type')}\n", "bold",
+            "".join(f"- {row.burger_type}: {row.burgers} ({avg} {row.avg_calories} kcal)\n"
+                    for row in summary["by_type"]), "",
+            f"\n{self.t('stats_daily')}\n", "bold",
+            "".join(f"- {row.day} {row.burger_type}: {row.burgers} ({avg} {row.avg_calories} kcal)\n"
+                    for row in summary["daily"]), "",
+            f"\n{self.t('stats_sauces')}\n", "bold",
+            "".join(f"- {row.sauce or '-'}: {row.burgers} ({avg} {row.avg_calories} kcal)\n"
+                    for row in summary["sauces"]), "",
+            f"\n{self.t('stats_ingredients')}\n", "bold",
+            "".join(f"- {row.ingredient}: {row.burgers}\n" for row in summary["ingredients"]), "",
+        ]
+        self.stats_text.config(state="normal")
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(tk.END, *runs)
+        self.stats_text.config(state="disabled")
 
     def update_zodiac_display(self, event=None):
         """Met à jour l'affichage du signe zodiacal"""
@@ -441,115 +563,259 @@ class UltimateBurgerApp:
     def save_burger(self):
         """Sauvegarde le burger actuel dans la base de données"""
         if self.current_burger:
+            # Base encore en cours d'ouverture : le burger affiché maintenant part dès qu'elle est prête
+            burger = self.current_burger
+            self.when_database_ready(lambda: self.submit_burger(burger))
+
+    def submit_burger(self, burger):
+        """Confie un burger à l'écrivain groupé (base ouverte)"""
+        try:
+            self.history_writer.submit(burger)
+            messagebox.showinfo("Success", "Burger sauvegardé !" if self.language == "FR" else "Burger saved!")
+        except Exception as e:
+            messagebox.showerror("Error", f"Erreur de sauvegarde : {str(e)}" if self.language == "FR" else f"Save error: {str(e)}")
+
+    def poll_saved_burgers(self):
+        """Ajoute en tête de l'historique les burgers écrits par le thread d'écriture"""
+        saved = False
+        while True:
             try:
-                self.cursor.execute('''INSERT INTO burgers 
-                                    (name, ingredients, sauce, diet, calories, created_at, burger_type)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                                    (
-                                        self.current_burger['name'],
-                                        json.dumps(self.current_burger['ingredients']),
-                                        self.current_burger.get('sauce', ''),
-                                        self.current_burger.get('diet', ''),
-                                        self.current_burger['calories'],
-                                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                        self.current_burger['type']
-                                    ))
-                self.conn.commit()
-                messagebox.showinfo("Success", "Burger sauvegardé !" if self.language == "FR" else "Burger saved!")
-                self.load_history()
-            except Exception as e:
-                messagebox.showerror("Error", f"Erreur de sauvegarde : {str(e)}" if self.language == "FR" else f"Save error: {str(e)}")
+                result = self.history_writer.saved.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, Exception):
+                messagebox.showerror("Error", f"Erreur de sauvegarde : {str(result)}" if self.language == "FR" else f"Save error: {str(result)}")
+                continue
+            self.history_view.prepend(result)
+            saved = True
+        if saved:
+            self.refresh_stats()
+        self.root.after(100, self.poll_saved_burgers)
+
+    def on_close(self):
+        """Termine les écritures en attente avant de fermer"""
+        # Laisse l'ouverture de la base aboutir pour fermer proprement l'écrivain
+        self.tasks.drain()
+        if self.database is not None:
+            self.database.close()
+            self.history_reader.conn.close()
+        self.image_catalog.close()
+        if self.share_pipeline is not None:
+            self.share_pipeline.close()
+        # Les suppressions déjà lancées vont à leur terme
+        self.tasks.close(wait_pending=True)
+        if self.latency_monitor is not None:
+            self.latency_monitor.stop()
+            print(f"UI loop latency: {self.latency_monitor.report()}")
+        if instrumentation.enabled():
+            print(instrumentation.format_table())
+        self.root.destroy()
+
+    def capture_profile(self, event=None, seconds=5.0):
+        """Capture un profil par échantillonnage sans bloquer l'interface"""
+        path = os.path.abspath(time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+
+        def run():
+            samples = instrumentation.sample_profile(seconds)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(instrumentation.format_folded(samples))
+            print(f"Profile written to {path}")
+
+        threading.Thread(target=run, name="profile", daemon=True).start()
 
     def export_pdf(self):
         """Exporte le burger actuel en PDF"""
         if not self.current_burger:
             return
             
-        try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            
-            burger = self.current_burger
-            
-            # Titre
-            pdf.set_font("Arial", 'B', 16)
-            pdf.cell(200, 10, txt=burger['name'], ln=1, align='C')
-            pdf.ln(10)
-            
-            # Ingrédients
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(200, 10, txt=self.t("ingredients_label"), ln=1)
-            pdf.set_font("Arial", size=12)
-            
-            for ing in burger['ingredients']:
-                pdf.cell(200, 10, txt=f"- {ing}", ln=1)
-            
-            # Sauce
-            if 'sauce' in burger:
-                pdf.ln(5)
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(40, 10, txt=self.t("sauce_label") + ":", ln=0)
-                pdf.set_font("Arial", size=12)
-                pdf.cell(0, 10, txt=burger['sauce'], ln=1)
-            
-            # Calories
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(40, 10, txt=self.t("calories_label") + ":", ln=0)
-            pdf.set_font("Arial", size=12)
-            pdf.cell(0, 10, txt=str(burger['calories']), ln=1)
-            
-            # Prédiction zodiac
-            if burger.get('type') == "zodiac":
-                pdf.ln(5)
-                pdf.set_font("Arial", 'I', 12)
-                pdf.multi_cell(0, 10, txt=burger['prediction'])
-            
-            # Sauvegarde du fichier
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf")],
-                title="Enregistrer le PDF" if self.language == "FR" else "Save PDF"
-            )
-            
-            if file_path:
-                pdf.output(file_path)
-                messagebox.showinfo("Success", f"PDF sauvegardé :\n{file_path}" if self.language == "FR" else f"PDF saved:\n{file_path}")
-                
-        except Exception as e:
+        # Sauvegarde du fichier
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")],
+            title="Enregistrer le PDF" if self.language == "FR" else "Save PDF"
+        )
+        if not file_path:
+            return
+        
+        burger = self.current_burger
+        labels = {key: self.t(key) for key in ("ingredients_label", "sauce_label", "calories_label")}
+        
+        def done(_):
+            messagebox.showinfo("Success", f"PDF sauvegardé :\n{file_path}" if self.language == "FR" else f"PDF saved:\n{file_path}")
+        
+        def failed(e):
             messagebox.showerror("Error", f"Erreur PDF : {str(e)}" if self.language == "FR" else f"PDF error: {str(e)}")
+        
+        # Construction et écriture hors du thread Tk
+        self.tasks.submit(self.write_burger_pdf, burger, labels, file_path, on_done=done, on_error=failed)
+
+    @staticmethod
+    def write_burger_pdf(burger, labels, file_path):
+        """Construit et écrit la fiche PDF d'un burger"""
+        from fpdf import FPDF
+
+        pdf = FPDF()
+        pdf.add_page()
+        # Titre, ingrédients, sauce, calories et prédiction (textes latin-1, en cache)
+        draw_fragment(pdf, pdf_fragment(burger, labels))
+        
+        with span("pdf.write"):
+            pdf.output(file_path)
+
+    def export_history_pdf(self):
+        """Exporte l'historique (filtré) dans un seul PDF, hors du thread de l'interface"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")],
+            title="Enregistrer le PDF" if self.language == "FR" else "Save PDF"
+        )
+        if not file_path:
+            return
+        from pdf_export import start_export
+
+        labels = {key: self.t(key) for key in ("ingredients_label", "sauce_label", "calories_label")}
+        events = queue.Queue()
+        # Un nouvel export remplace celui en cours
+        self.cancel_export()
+        cancel = start_export(
+            self.db_path, file_path, labels, dict(self.history_view.filters),
+            progress=lambda done, total: events.put((done, total)),
+            done=events.put
+        )
+        self.export_cancel = cancel
+        self.cancel_export_btn.config(state="normal")
+        self.root.after(100, self.poll_export, events, file_path, cancel)
+
+    def cancel_export(self):
+        """Interrompt l'export PDF de l'historique en cours (le fichier partiel est supprimé)"""
+        if self.export_cancel is not None:
+            self.export_cancel.set()
+            self.export_cancel = None
+        self.cancel_export_btn.config(state="disabled")
+        self.export_progress["value"] = 0
+
+    def poll_export(self, events, file_path, cancel):
+        """Met à jour la progression de l'export PDF et signale la fin"""
+        if cancel.is_set():
+            return
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(event, tuple):
+                done, total = event
+                self.export_progress["value"] = 100 * done / total if total else 100
+                continue
+            self.export_cancel = None
+            self.cancel_export_btn.config(state="disabled")
+            if isinstance(event, Exception):
+                messagebox.showerror("Error", f"Erreur PDF : {str(event)}" if self.language == "FR" else f"PDF error: {str(event)}")
+                return
+            else:
+                messagebox.showinfo("Success", f"PDF sauvegardé :\n{file_path}" if self.language == "FR" else f"PDF saved:\n{file_path}")
+                return
+        self.root.after(100, self.poll_export, events, file_path, cancel)
 
     def share_burger(self):
-        """Partage le burger sur les réseaux sociaux"""
+        """Partage le burger sur les réseaux sociaux (file de partage, URL encodée)"""
         if self.current_burger:
-            ingredients = ", ".join(self.current_burger['ingredients'])
-            message = (f"Check out my burger: {self.current_burger['name']}!\n"
-                      f"Ingredients: {ingredients}\n"
-                      f"Calories: {self.current_burger['calories']} kcal\n"
-                      f"#BurgerGenerator")
-            
-            if self.language == "FR":
-                message = (f"Mon burger créé : {self.current_burger['name']} !\n"
-                          f"Ingrédients : {ingredients}\n"
-                          f"Calories : {self.current_burger['calories']} kcal\n"
-                          f"#GénérateurDeBurger")
-            
-            webbrowser.open(f"https://twitter.com/intent/tweet?text={message}")
+            if self.share_pipeline is None:
+                from burger_share import BrowserSink, SharePipeline
+
+                # Le navigateur s'ouvre depuis le thread de partage, sans bloquer l'interface
+                self.share_pipeline = SharePipeline(BrowserSink(), flush_interval=0, concurrency=1)
+            self.share_pipeline.submit(self.current_burger, self.language)
 
     def t(self, key):
         """Raccourci pour les traductions"""
         return self.trans.get(key, f"[{key}]")
 
+    def tr(self, widget, key, option="text"):
+        """Applique une traduction à un widget et l'enregistre pour les changements de langue"""
+        widget.config(**{option: self.t(key)})
+        self.translated_widgets.append((widget, option, key))
+        return widget
+
+    def add_tab(self, tab, key):
+        """Ajoute un onglet dont le titre est traduit"""
+        self.notebook.add(tab, text=self.t(key))
+        self.translated_tabs.append((tab, key))
+
     def set_language(self, lang):
-        """Change la langue de l'application"""
+        """Change la langue de l'application en ré-étiquetant les widgets sur place"""
+        if lang == self.language or lang not in self.languages:
+            return
+        if lang not in self.translations:
+            # Encore en cours de compilation : on change de langue dès qu'elle est prête
+            self.load_language(lang, then=lambda: self.set_language(lang))
+            return
         self.language = lang
         self.load_translations()
-        # Reconstruit l'interface
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.setup_ui()
+        self.refresh_language()
+
+    def refresh_language(self):
+        """Ré-étiquette les widgets dans la langue courante (changement de langue ou rechargement)"""
+        self.root.title(self.t("app_title"))
+        for widget, option, key in self.translated_widgets:
+            widget.config(**{option: self.t(key)})
+        for tab, key in self.translated_tabs:
+            self.notebook.tab(tab, text=self.t(key))
+        
+        # Listes dépendant de la langue : même position dans la nouvelle langue
+        # (les onglets pas encore construits le seront directement dans la bonne langue)
+        if self.sauce_combo is not None:
+            sauces = list(self.trans["sauces"].keys())
+            sauce_index = self.sauce_combo.current()
+            self.sauce_combo.config(values=sauces)
+            self.sauce_combo.set(sauces[max(sauce_index, 0) % len(sauces)])
+        if self.sign_var is not None:
+            signs = list(self.trans["zodiac_signs"].keys())
+            sign_index = self.sign_var.current()
+            self.sign_var.config(values=signs)
+            self.sign_var.set(signs[max(sign_index, 0) % len(signs)])
+            self.update_zodiac_display()
+        
+        # Le burger affiché est conservé, seuls les libellés changent
+        if self.current_burger:
+            self.render_result()
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.title(self.t("stats_title"))
+            self.refresh_stats()
+
+def instrument_stages():
+    """Chronomètre les étapes critiques si l'instrumentation est active"""
+    instrumentation.instrument_core()
+    instrumentation.instrument(UltimateBurgerApp, APP_STAGES)
+
+
+def report_startup(app):
+    """Mode --startup-time : durée jusqu'au premier affichage, puis jusqu'à l'historique chargé"""
+    app.root.update_idletasks()
+    print(f"first paint: {(time.perf_counter() - STARTED) * 1000:.1f} ms")
+
+    def history_loaded():
+        if app.history_reader is None:
+            app.root.after(5, history_loaded)
+            return
+        app.tasks.drain()
+        app.root.update_idletasks()
+        print(f"history loaded: {(time.perf_counter() - STARTED) * 1000:.1f} ms")
+        app.on_close()
+
+    app.root.after_idle(history_loaded)
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ultimate Burger Generator")
+    instrumentation.add_arguments(parser)
+    parser.add_argument("--startup-time", action="store_true", help="affiche le temps de démarrage puis quitte")
+    parser.add_argument("--db", default=None, help="base de l'historique (défaut : src/burgers.db)")
+    args = parser.parse_args()
+    if instrumentation.configure(args.profile, args.metrics_port, args.metrics_dump, args.metrics_interval):
+        instrument_stages()
     root = tk.Tk()
-    app = UltimateBurgerApp(root)
+    app = UltimateBurgerApp(root, args.db)
+    if args.startup_time:
+        root.after_idle(report_startup, app)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Micro-benchmark : coût par burger avant/après la compilation des tables
+
+Usage : python benchmarks/bench_generation.py [--lang FR] [-n 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from burger_engine import BurgerEngine, load_translations  # noqa: E402
+
+
+def legacy_generate_classic(trans, burger_type, size, sauce):
+    """Ancienne version : copie du dict et détection du steak par sous-chaîne"""
+    ingredients = trans["ingredients"]["classic"][burger_type].copy()
+    if size == "Double":
+        if "steak" in ingredients[1].lower() or "haché" in ingredients[1].lower():
+            ingredients.insert(1, trans["ingredients"]["classic"]["Double steak"])
+        elif "filet" in ingredients[1].lower() or "fillet" in ingredients[1].lower():
+            ingredients.insert(1, trans["ingredients"]["classic"]["Double filet"])
+    elif size == "Triple":
+        if "steak" in ingredients[1].lower() or "haché" in ingredients[1].lower():
+            ingredients[1:1] = [trans["ingredients"]["classic"]["Triple steak"]]
+        elif "filet" in ingredients[1].lower() or "fillet" in ingredients[1].lower():
+            ingredients[1:1] = [trans["ingredients"]["classic"]["Triple filet"]]
+    base_calories = {
+        "Hamburger": 500,
+        "Cheeseburger": 600,
+        "Bacon Burger": 750,
+        "Chicken Burger": 450,
+        "Fish Burger": 400,
+        "Veggie Burger": 350
+    }.get(burger_type, 500)
+    calories = {
+        "Simple": base_calories,
+        "Double": int(base_calories * 1.8),
+        "Triple": int(base_calories * 2.5)
+    }.get(size, base_calories)
+    return {
+        "name": f"{size} {burger_type}",
+        "ingredients": ingredients,
+        "sauce": sauce,
+        "sauce_desc": trans["sauces"][sauce],
+        "calories": calories,
+        "type": "classic"
+    }
+
+
+def legacy_generate_extreme(trans, level, vegan):
+    """Ancienne version : parcours de tous les niveaux et int() sur chaque clé"""
+    ingredient_type = "vegan" if vegan else "non_vegan"
+    ingredients = []
+    for lvl, items in trans["ingredients"]["extreme"][ingredient_type].items():
+        if level >= int(lvl):
+            ingredients.extend(items)
+    sauces = ["Rainbow mayo", "Banana ketchup", "1000-spice sauce"]
+    sauce = random.choice(sauces[:min(level, len(sauces))])
+    return {
+        "name": f"{'Vegan ' if vegan else ''}Crazy Burger Level {level}",
+        "ingredients": ingredients[:4],
+        "sauce": sauce,
+        "calories": 500 + level * 150,
+        "type": "extreme"
+    }
+
+
+def legacy_generate_zodiac(trans, sign_name):
+    """Ancienne version : dict des sauces reconstruit à chaque appel"""
+    sign_data = trans["zodiac_signs"][sign_name]
+    element = sign_data["element"]
+    ingredients = trans["ingredients"]["zodiac"][element]
+    sauce = random.choice({
+        "Fire": ["Spicy sauce", "BBQ sauce"],
+        "Earth": ["Forest sauce", "Truffle sauce"],
+        "Air": ["Light sauce", "Lemon sauce"],
+        "Water": ["Hollandaise", "Tartar sauce"]
+    }[element])
+    return {
+        "name": f"{sign_name} Burger {sign_data['emoji']}",
+        "ingredients": ingredients,
+        "sauce": sauce,
+        "calories": random.randint(600, 900),
+        "prediction": trans["zodiac_predictions"][sign_name],
+        "type": "zodiac"
+    }
+
+
+def per_call_ns(func, number):
+    """Meilleur temps par appel (ns) sur 5 répétitions"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lang", default="EN")
+    parser.add_argument("-n", type=int, default=100000)
+    args = parser.parse_args()
+
+    trans = load_translations(args.lang, APP_DIR)
+    engine = BurgerEngine(trans)
+    sauce = next(iter(trans["sauces"]))
+    sign = next(iter(trans["zodiac_signs"]))
+    # L'ancien code plante sur les éléments traduits (Feu, Terre...)
+    legacy_zodiac_ok = trans["zodiac_signs"][sign]["element"] in ("Fire", "Earth", "Air", "Water")
+
+    cases = [
+        ("classic", lambda: legacy_generate_classic(trans, "Bacon Burger", "Triple", sauce),
+         lambda: engine.generate_classic("Bacon Burger", "Triple", sauce)),
+        ("extreme", lambda: legacy_generate_extreme(trans, 7, True),
+         lambda: engine.generate_extreme(7, True)),
+        ("zodiac", (lambda: legacy_generate_zodiac(trans, sign)) if legacy_zodiac_ok else None,
+         lambda: engine.generate_zodiac(sign)),
+    ]
+
+    print(f"{'mode':<10}{'before (ns)':>14}{'after (ns)':>14}{'speedup':>10}")
+    for mode, before, after in cases:
+        after_ns = per_call_ns(after, args.n)
+        if before is None:
+            print(f"{mode:<10}{'n/a':>14}{after_ns:>14.0f}{'':>10}")
+            continue
+        before_ns = per_call_ns(before, args.n)
+        print(f"{mode:<10}{before_ns:>14.0f}{after_ns:>14.0f}{before_ns / after_ns:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
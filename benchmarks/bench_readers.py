@@ -0,0 +1,133 @@
+"""Benchmark de concurrence : débit de lecture de l'historique selon le nombre de threads
+
+Usage : python benchmarks/bench_readers.py [--db burgers.db | --rows 200000] [--threads 1,2,4,8] [--seconds 3]
+
+Compare le pool de lecteurs de HistoryDatabase (une connexion par thread
+actif) à l'ancien schéma : une seule connexion partagée derrière un verrou.
+Deux charges : "page" (pagination par clé à une position aléatoire, courte)
+et "count" (comptage filtré par type, parcours de la table : SQLite travaille
+sans le GIL, c'est là que plusieurs lecteurs passent à l'échelle).
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from burger_engine import BurgerEngine, load_translations  # noqa: E402
+from history_db import HistoryDatabase, connect  # noqa: E402
+from history_store import INSERT_BURGER, HistoryReader, RecipeBook, ensure_schema, timestamp  # noqa: E402
+
+
+def fill(db_path, rows):
+    """Base de test : rows burgers des trois modes (non mesuré)"""
+    engine = BurgerEngine(load_translations("FR"))
+    burgers = (engine.generate_many("classic", {"burger_type": "Cheeseburger", "size": "Double", "sauce": "Mayo"}, 64, 1)
+               + engine.generate_many("extreme", {"level": 7, "vegan": False}, 64, 2)
+               + engine.generate_many("zodiac", {"sign": engine.sign_names[0]}, 64, 3))
+    conn = connect(db_path)
+    ensure_schema(conn)
+    book = RecipeBook(conn)
+    start = timestamp("2025-01-01 00:00:00")
+    conn.executemany(INSERT_BURGER, (book.row(burgers[i % len(burgers)], start + i) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+class SharedConnection:
+    """Ancien schéma : un seul lecteur partagé, protégé par un verrou"""
+
+    def __init__(self, db_path):
+        self._reader = HistoryReader(connect(db_path))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reader(self):
+        with self._lock:
+            yield self._reader
+
+    def close(self):
+        self._reader.conn.close()
+
+
+def page(reader, low, high, rng):
+    key = reader.key_near_id(rng.randint(low, high))
+    return reader.page(before=key, limit=50)
+
+
+def count(reader, low, high, rng):
+    return reader.count(burger_type=rng.choice(("classic", "extreme", "zodiac")))
+
+
+WORKLOADS = {"page": page, "count": count}
+
+
+def measure(source, workload, threads, seconds, bounds):
+    """Requêtes par seconde de `threads` threads pendant `seconds` secondes"""
+    done = [0] * threads
+    stop = threading.Event()
+    barrier = threading.Barrier(threads + 1)
+
+    def run(slot):
+        rng = random.Random(slot)
+        barrier.wait()
+        while not stop.is_set():
+            with source.reader() as reader:
+                workload(reader, *bounds, rng)
+            done[slot] += 1
+
+    workers = [threading.Thread(target=run, args=(slot,)) for slot in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(done) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=None, help="base existante (défaut : base de test de --rows lignes)")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--threads", default="1,2,4,8", type=lambda value: [int(v) for v in value.split(",")])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), action="append", default=None)
+    args = parser.parse_args()
+
+    workdir = None
+    db_path = args.db
+    if db_path is None:
+        workdir = tempfile.mkdtemp(prefix="ubg-readers-")
+        db_path = os.path.join(workdir, "burgers.db")
+        fill(db_path, args.rows)
+    try:
+        database = HistoryDatabase(db_path, readers=max(args.threads))
+        shared = SharedConnection(db_path)
+        with database.reader() as reader:
+            bounds = reader.id_bounds()
+        print(f"{os.cpu_count()} CPU, {bounds[1] - bounds[0] + 1} rows")
+        print(f"{'workload':<10}{'source':<8}" + "".join(f"{n:>10} thr" for n in args.threads) + f"{'scaling':>10}")
+        for name in args.workload or sorted(WORKLOADS):
+            for label, source in (("shared", shared), ("pool", database)):
+                rates = [measure(source, WORKLOADS[name], n, args.seconds, bounds) for n in args.threads]
+                print(f"{name:<10}{label:<8}" + "".join(f"{rate:>12.0f}/s" for rate in rates)
+                      + f"{rates[-1] / rates[0]:>9.2f}x")
+        shared.close()
+        database.close()
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
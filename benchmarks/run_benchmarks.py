@@ -0,0 +1,423 @@
+"""Suite de benchmarks des chemins critiques de l'application
+
+Usage :
+    python benchmarks/run_benchmarks.py                       # mesure + comparaison à la référence
+    python benchmarks/run_benchmarks.py --record              # enregistre la référence (--save-baseline)
+    python benchmarks/run_benchmarks.py --sizes 1000,100000,10000000
+
+Couvre : generate_*, show_result (rendu texte), load_random_image (dossier
+d'images synthétique), save_burger / load_history / pages filtrées pour
+chaque taille d'historique et sur 5000 recettes (avec vérification de leur
+plan d'exécution), export_pdf et set_language. Chaque cas rapporte le débit, les
+latences p50/p99 et le pic mémoire (tracemalloc). Les résultats sont écrits
+en JSON ; code de sortie 1 si une vérification échoue, si la référence
+manque (à enregistrer avec --record) ou si un p50 régresse au-delà de --tolerance.
+
+Sans affichage disponible ($DISPLAY, Xvfb...), les widgets Tk sont remplacés
+par des bouchons : on mesure alors le coût Python, pas le rendu Tk.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import tkinter as tk  # noqa: E402
+
+import UBGv2  # noqa: E402
+import history_view  # noqa: E402
+from history_db import HistoryDatabase  # noqa: E402
+from history_store import INSERT_BURGER, RecipeBook, ensure_schema, timestamp  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(APP_DIR, "benchmarks", "baseline.json")
+
+
+class Stub:
+    """Widget factice : toute méthode est acceptée et renvoie 0"""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return self._call
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+        return 0
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Runner:
+    """Exécute les cas et collecte les mesures"""
+
+    def __init__(self, quick=False):
+        self.quick = quick
+        self.results = {}
+
+    def check(self, name, problems):
+        """Enregistre une vérification : erreur si problems n'est pas vide"""
+        if problems:
+            self.results[name] = {"error": "; ".join(problems)}
+            print(f"{name:<42} ERROR {self.results[name]['error']}")
+        else:
+            self.results[name] = {"ok": True}
+            print(f"{name:<42} ok")
+
+    def case(self, name, func, iterations, warmup=3, teardown=None):
+        """Mesure func() : latences, débit, pic mémoire"""
+        if self.quick:
+            iterations = max(5, iterations // 10)
+        try:
+            for _ in range(warmup):
+                func()
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                func()
+                latencies.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+
+            # Passe séparée : tracemalloc ralentit fortement les mesures
+            tracemalloc.start()
+            for _ in range(min(iterations, 20)):
+                func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        except Exception as e:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:<42} ERROR {e}")
+            return
+        finally:
+            if teardown is not None:
+                teardown()
+
+        latencies.sort()
+        result = {
+            "iterations": iterations,
+            "throughput_per_s": iterations / elapsed if elapsed else None,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "peak_kb": peak / 1024,
+        }
+        self.results[name] = result
+        print(f"{name:<42} {result['throughput_per_s']:>12.0f}/s  p50 {result['p50_ms']:>9.3f} ms  "
+              f"p99 {result['p99_ms']:>9.3f} ms  peak {result['peak_kb']:>9.1f} KB")
+
+
+def make_app(workdir, use_tk):
+    """Application réelle (Tk) ou application sur bouchons"""
+    os.chdir(workdir)
+    # Les boîtes de dialogue ne doivent pas bloquer la mesure
+    UBGv2.messagebox.showinfo = lambda *a, **k: None
+    UBGv2.messagebox.askyesno = lambda *a, **k: True
+
+    def fail(title, message, **kwargs):
+        raise RuntimeError(message)
+    UBGv2.messagebox.showerror = fail
+    UBGv2.filedialog.asksaveasfilename = lambda **k: os.path.join(workdir, "burger.pdf")
+
+    if use_tk:
+        root = tk.Tk()
+        root.withdraw()
+        app = UBGv2.UltimateBurgerApp(root, os.path.join(workdir, "burgers.db"))
+        app.image_catalog.img_dir = os.path.join(workdir, "burger_images")
+        # La base s'ouvre après le premier affichage : on attend qu'elle soit prête
+        while app.history_reader is None:
+            root.update()
+            app.tasks.drain()
+        return app, root
+
+    history_view.tk.Listbox = Stub
+    history_view.ttk.Scrollbar = Stub
+    app = UBGv2.UltimateBurgerApp.__new__(UBGv2.UltimateBurgerApp)
+    app.root = Stub()
+    app.db_path = os.path.join(workdir, "burgers.db")
+    app.language = "FR"
+    app.current_burger = None
+    app.tasks = UBGv2.TaskRunner()  # Sans root : tâches exécutées immédiatement
+    app.translations = {}
+    app.load_translations()
+    app.database = app.history_reader = app.history_writer = app.history_stats = None
+    app.database_ready = []
+    app.stats_window = None
+    app.history_view = history_view.HistoryView(None, None)
+    app.setup_database()  # Ouvre la base puis charge la vue
+    app.image_catalog = UBGv2.ImageCatalog(os.path.join(workdir, "burger_images"))
+    app.classic_type, app.size_var, app.sauce_combo = Stub(), Stub(), Stub()
+    app.classic_type.get = lambda: "Bacon Burger"
+    app.size_var.get = lambda: "Triple"
+    app.sauce_combo.get = lambda: next(iter(app.trans["sauces"]))
+    app.crazy_level, app.vegan_extreme, app.sign_var = Stub(), Stub(), Stub()
+    app.crazy_level.get = lambda: 7
+    app.vegan_extreme.get = lambda: True
+    app.sign_var.get = lambda: next(iter(app.trans["zodiac_signs"]))
+    app.result_text, app.img_label, app.element_label, app.notebook = Stub(), Stub(), Stub(), Stub()
+    # Autant de widgets traduits que l'interface réelle
+    app.translated_widgets = [(Stub(), "text", "generate_btn") for _ in range(25)]
+    app.translated_tabs = [(Stub(), key) for key in ("classic_tab", "extreme_tab", "zodiac_tab")]
+    return app, None
+
+
+def make_images(img_dir, count=30, size=(2400, 1600)):
+    """Dossier d'images synthétiques (JPEG pleine taille)"""
+    from PIL import Image
+    os.makedirs(img_dir, exist_ok=True)
+    for i in range(count):
+        Image.new("RGB", size, (i * 8 % 256, 120, 60)).save(os.path.join(img_dir, f"burger_{i}.jpg"), quality=85)
+
+
+def fill_history(db_path, rows, engine):
+    """Remplit la table burgers jusqu'à `rows` lignes (non mesuré)"""
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    book = RecipeBook(conn)
+    start = timestamp("2025-01-01 00:00:00")
+    current = conn.execute("SELECT COUNT(*) FROM burgers").fetchone()[0]
+    batch = 50_000
+    burgers = engine.generate_many("zodiac", {"sign": next(iter(engine.tables.zodiac))}, 64, seed=1)
+    while current < rows:
+        n = min(batch, rows - current)
+        conn.executemany(INSERT_BURGER, (
+            book.row(burgers[i % len(burgers)], start + current + i)
+            for i in range(n)
+        ))
+        conn.commit()
+        current += n
+    conn.close()
+
+
+def fill_recipes(db_path, recipes, rows):
+    """Historique de `rows` burgers répartis sur `recipes` recettes distinctes (non mesuré)"""
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    book = RecipeBook(conn)
+    start = timestamp("2025-01-01 00:00:00")
+    types = ("classic", "extreme", "zodiac")
+    conn.executemany(INSERT_BURGER, (
+        book.row({"type": types[i % recipes % 3], "name": f"Burger {i % recipes}",
+                  "ingredients": [f"ingredient {i % recipes % 97}", f"ingredient {i % recipes % 89}"],
+                  "sauce": "Ketchup", "calories": i % 1000}, start + i)
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def plan_problems(reader, **filters):
+    """Requêtes d'une page filtrée qui parcourent la table ou trient les lignes (EXPLAIN QUERY PLAN)
+
+    Parcourir l'index (created_at, id) est le chemin de la pagination par clé : seul
+    un parcours de la table elle-même est signalé.
+    """
+    statements = []
+    reader.conn.set_trace_callback(statements.append)  # SQL avec ses paramètres
+    try:
+        reader.page(limit=50, **filters)
+    finally:
+        reader.conn.set_trace_callback(None)
+    problems = []
+    for sql in statements:
+        if "FROM burgers" not in sql:
+            continue
+        for *_, detail in reader.conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+            if ((detail.startswith("SCAN burgers") and "idx_burgers_created" not in detail)
+                    or "TEMP B-TREE" in detail):
+                problems.append(f"{filters}: {detail}")
+    return problems
+
+
+def run_suite(args):
+    runner = Runner(args.quick)
+    workdir = tempfile.mkdtemp(prefix="ubg-bench-")
+    cwd = os.getcwd()
+    use_tk = False
+    if not args.stub:
+        try:
+            tk.Tk().destroy()
+            use_tk = True
+        except tk.TclError:
+            pass
+    print(f"backend: {'tk' if use_tk else 'stub'}  workdir: {workdir}")
+    try:
+        make_images(os.path.join(workdir, "burger_images"))
+        app, root = make_app(workdir, use_tk)
+        update = root.update_idletasks if root is not None else (lambda: None)
+
+        def settle():
+            """Attend les tâches de fond lancées par l'interface, puis redessine"""
+            app.tasks.drain()
+            update()
+
+        # Génération (moteur seul, puis méthode de l'application avec affichage)
+        engine = app.engine
+        runner.case("engine.generate_classic", lambda: engine.generate_classic(
+            "Bacon Burger", "Triple", next(iter(app.trans["sauces"]))), 20000)
+        runner.case("engine.generate_extreme", lambda: engine.generate_extreme(7, True), 20000)
+        runner.case("engine.generate_zodiac", lambda: engine.generate_zodiac(
+            next(iter(app.trans["zodiac_signs"]))), 20000)
+        app.load_random_image = lambda: None
+        for mode in ("classic", "extreme", "zodiac"):
+            method = getattr(app, f"generate_{mode}")
+            runner.case(f"app.generate_{mode}", lambda method=method: (method(), update()), 2000)
+        del app.load_random_image
+
+        # Rendu du résultat dans le widget Text
+        app.current_burger = engine.generate_zodiac(next(iter(app.trans["zodiac_signs"])))
+        runner.case("app.render_result", lambda: (app.render_result(), update()), 2000)
+
+        # Images : premier passage (décodage + miniature), puis cache chaud
+        catalog = app.image_catalog
+        entries = catalog.entries()
+        runner.case("image.thumbnail_cold", lambda: (catalog.clear(disk=True), catalog.thumbnail(entries[0])), 20)
+        runner.case("image.thumbnail_disk_cache", lambda: (catalog.clear(), catalog.thumbnail(entries[1])), 50)
+        if use_tk:
+            runner.case("app.load_random_image", lambda: (app.load_random_image(), settle()), 200)
+        else:
+            runner.case("app.load_random_image", catalog.next_image, 200)
+
+        # Historique à plusieurs tailles
+        for size in args.sizes:
+            fill_history("burgers.db", size, engine)
+            app.history_writer.flush()
+            label = f"{size:,}".replace(",", "_")
+            runner.case(f"history[{label}].save_burger", app.save_burger, 500)
+            runner.case(f"history[{label}].writer_flush_500", lambda: (
+                [app.history_writer.submit(app.current_burger) for _ in range(500)],
+                app.history_writer.flush()), 20)
+            runner.case(f"history[{label}].load_history", lambda: (app.load_history(), settle()), 200)
+            runner.case(f"history[{label}].jump_middle", lambda: (app.history_view.jump(0.5), settle()), 200)
+            runner.case(f"history[{label}].stats_summary", lambda: app.history_stats.summary(), 200)
+            # Pages filtrées : type absent de l'historique (pire cas d'un parcours), texte
+            reader = app.history_reader
+            for name, filters in (("type", {"burger_type": "classic"}),
+                                  ("search", {"search": next(iter(engine.tables.zodiac))})):
+                runner.check(f"history[{label}].plan_{name}", plan_problems(reader, **filters))
+                runner.case(f"history[{label}].page_{name}", lambda filters=filters: reader.page(
+                    before=reader.key_near_id(size // 2), limit=50, **filters), 200)
+
+        # Filtres retenant des milliers de recettes (recettes fournies par les clients du service)
+        fill_recipes("recipes.db", 5000, 20_000 if args.quick else 100_000)
+        database = HistoryDatabase("recipes.db")
+        try:
+            with database.reader() as reader:
+                filters = {"burger_type": "classic"}
+                runner.check("history[5000_recipes].plan_type", plan_problems(reader, **filters))
+                runner.case("history[5000_recipes].page_type", lambda: reader.page(limit=50, **filters), 200)
+                runner.case("history[5000_recipes].page_search", lambda: reader.page(
+                    limit=50, search="Burger 12"), 200)
+        finally:
+            database.close()
+
+        # Export PDF d'un burger
+        runner.case("app.export_pdf", lambda: (app.export_pdf(), settle()), 50)
+
+        # Changement de langue (aller-retour)
+        settle()
+        languages = [lang for lang in app.translations if lang != app.language][:1] + [app.language]
+        if len(languages) == 2:
+            runner.case("app.set_language", lambda: [(app.set_language(lang), update()) for lang in languages], 200)
+
+        app.database.close()
+        app.tasks.close()
+        if root is not None:
+            root.destroy()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "backend": "tk" if use_tk else "stub",
+            "sizes": args.sizes,
+        },
+        "results": runner.results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Compare les p50 à la référence ; renvoie (cas comparés, régressions)"""
+    compared, regressions = [], []
+    print(f"\n{'case':<42}{'baseline p50':>14}{'current p50':>14}{'ratio':>8}")
+    for name, base in baseline.get("results", {}).items():
+        current = report["results"].get(name)
+        if not current or "p50_ms" not in current or "p50_ms" not in base:
+            continue
+        ratio = current["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:<42}{base['p50_ms']:>14.3f}{current['p50_ms']:>14.3f}{ratio:>8.2f}{flag}")
+        compared.append(name)
+        if flag:
+            regressions.append(name)
+    return compared, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000",
+                        type=lambda value: [int(v) for v in value.split(",")],
+                        help="tailles d'historique (ex. 1000,100000,10000000)")
+    parser.add_argument("--output", default=None, help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", "--record", action="store_true",
+                        help="enregistre la référence (obligatoire tant qu'elle n'existe pas)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="régression tolérée sur p50 (0.25 = +25 %%)")
+    parser.add_argument("--stub", action="store_true", help="forcer les widgets factices")
+    parser.add_argument("--quick", action="store_true", help="10x moins d'itérations")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    output = args.output or os.path.join(
+        APP_DIR, "benchmarks", "results", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults: {output}")
+
+    failed = [name for name, result in report["results"].items() if "error" in result]
+    if failed:
+        print(f"\n{len(failed)} failed: {', '.join(failed)}")
+        return 1
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved: {args.baseline}")
+        return 0
+    # Sans référence, la comparaison ne vérifierait rien : échec explicite
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}: run once with --record on this machine")
+        return 1
+    with open(args.baseline, encoding="utf-8") as f:
+        compared, regressions = compare(report, json.load(f), args.tolerance)
+    if not compared:
+        print(f"\nbaseline {args.baseline} has no case in common with this run: re-record it with --record")
+        return 1
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Génération en masse vectorisée (NumPy) avec un résultat en colonnes
+
+Tous les tirages aléatoires d'un lot sont faits en une seule fois. Chaque
+paramètre omis (ou None) est tiré uniformément, les autres sont fixés comme
+dans BurgerEngine.generate().
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from burger_engine import ZODIAC_CALORIES, extreme_level
+from burger_tables import SIZES, EXTREME_SAUCES
+
+BulkResult = namedtuple("BulkResult", [
+    "mode",
+    "type_codes",        # int array -> type_names
+    "sauce_codes",       # int array -> sauce_names
+    "calories",          # int array
+    "ingredient_ids",    # int array -> ingredient_lists
+    "type_names",
+    "sauce_names",
+    "ingredient_lists",
+])
+
+
+class _Interner:
+    """Attribue un identifiant stable à chaque valeur rencontrée"""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __call__(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+def _draw(rng, choices, fixed, n):
+    """Indices tirés uniformément dans choices, ou constants si fixed est donné"""
+    if fixed is None:
+        return rng.integers(0, len(choices), n)
+    return np.full(n, choices.index(fixed), dtype=np.int64)
+
+
+def _bulk_classic(tables, params, n, rng):
+    """Lot de burgers classiques (type × taille × sauce)"""
+    types = list(tables.patty_kinds)
+    sauces = list(tables.sauces)
+    ingredient_ids = _Interner()
+    names, calories, lists = [], [], []
+    for burger_type in types:
+        for size in SIZES:
+            name, ingredients, kcal = tables.classic[(burger_type, size)]
+            names.append(name)
+            calories.append(kcal)
+            lists.append(ingredient_ids(ingredients))
+    type_idx = _draw(rng, types, params.get("burger_type"), n)
+    size_idx = _draw(rng, list(SIZES), params.get("size"), n)
+    codes = type_idx * len(SIZES) + size_idx
+    return BulkResult(
+        "classic",
+        codes,
+        _draw(rng, sauces, params.get("sauce"), n),
+        np.asarray(calories, dtype=np.int64)[codes],
+        np.asarray(lists, dtype=np.int64)[codes],
+        tuple(names),
+        tuple(sauces),
+        tuple(ingredient_ids.values)
+    )
+
+
+def _bulk_extreme(tables, params, n, rng):
+    """Lot de burgers extrêmes (niveau × végan, sauce selon le niveau)"""
+    max_level = tables.extreme_max_level
+    ingredient_ids = _Interner()
+    names, lists = [], []
+    for vegan in (False, True):
+        for level in range(1, max_level + 1):
+            names.append(f"{'Vegan ' if vegan else ''}Crazy Burger Level {level}")
+            lists.append(ingredient_ids(tables.extreme_ingredients[(level, vegan)]))
+
+    level = params.get("level")
+    if level is None:
+        levels = rng.integers(1, max_level + 1, n)
+    else:
+        levels = np.full(n, extreme_level(tables, level), dtype=np.int64)
+    vegan = params.get("vegan")
+    vegans = rng.integers(0, 2, n) if vegan is None else np.full(n, int(bool(vegan)), dtype=np.int64)
+
+    codes = vegans * max_level + (levels - 1)
+    # Sauce uniforme parmi les min(niveau, 3) premières
+    sauce_codes = rng.integers(0, np.minimum(levels, len(EXTREME_SAUCES)))
+    return BulkResult(
+        "extreme",
+        codes,
+        sauce_codes,
+        500 + levels * 150,
+        np.asarray(lists, dtype=np.int64)[codes],
+        tuple(names),
+        EXTREME_SAUCES,
+        tuple(ingredient_ids.values)
+    )
+
+
+def _bulk_zodiac(tables, params, n, rng):
+    """Lot de burgers du zodiaque (signe, sauce de l'élément, calories dans ZODIAC_CALORIES)"""
+    signs = list(tables.zodiac)
+    ingredient_ids = _Interner()
+    sauce_ids = _Interner()
+    names, lists, choice_counts, choice_offsets, choice_table = [], [], [], [], []
+    for sign in signs:
+        entry = tables.zodiac[sign]
+        names.append(entry.name)
+        lists.append(ingredient_ids(entry.ingredients))
+        choice_offsets.append(len(choice_table))
+        choice_counts.append(len(entry.sauces))
+        choice_table.extend(sauce_ids(sauce) for sauce in entry.sauces)
+
+    codes = _draw(rng, signs, params.get("sign"), n)
+    picks = rng.integers(0, np.asarray(choice_counts, dtype=np.int64)[codes])
+    sauce_codes = np.asarray(choice_table, dtype=np.int64)[np.asarray(choice_offsets, dtype=np.int64)[codes] + picks]
+    return BulkResult(
+        "zodiac",
+        codes,
+        sauce_codes,
+        rng.integers(ZODIAC_CALORIES[0], ZODIAC_CALORIES[1] + 1, n),
+        np.asarray(lists, dtype=np.int64)[codes],
+        tuple(names),
+        tuple(sauce_ids.values),
+        tuple(ingredient_ids.values)
+    )
+
+
+_BULK_MODES = {
+    "classic": _bulk_classic,
+    "extreme": _bulk_extreme,
+    "zodiac": _bulk_zodiac,
+}
+
+
+def bulk_generate(tables, mode, params, n, seed=None):
+    """Génère n burgers en colonnes ; même graine => même résultat"""
+    bulk = _BULK_MODES.get(mode)
+    if bulk is None:
+        raise ValueError(f"Unknown mode: {mode}")
+    return bulk(tables, params or {}, n, np.random.default_rng(seed))
+
+
+def iter_burgers(result):
+    """Reconstruit les burgers un par un (dicts) à partir d'un résultat en colonnes"""
+    for code, sauce, kcal, ing in zip(result.type_codes.tolist(), result.sauce_codes.tolist(),
+                                      result.calories.tolist(), result.ingredient_ids.tolist()):
+        yield {
+            "name": result.type_names[code],
+            "ingredients": list(result.ingredient_lists[ing]),
+            "sauce": result.sauce_names[sauce],
+            "calories": kcal,
+            "type": result.mode
+        }
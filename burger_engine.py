@@ -0,0 +1,272 @@
+"""Moteur de génération de burgers, sans dépendance à tkinter"""
+import glob
+import json
+import marshal
+import os
+import random
+from collections import namedtuple
+
+from burger_tables import CLASSIC_TYPES, SIZES, EXTREME_SAUCES, compile_translations
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Remonte à la racine du projet
+SRC_DIR = os.path.join(BASE_DIR, "src")  # Chemin vers le dossier src/
+
+MODES = ("classic", "extreme", "zodiac")
+ZODIAC_CALORIES = (600, 900)  # Bornes du tirage des calories d'un burger du zodiaque
+
+# Identifiant rejouable d'un burger : mode, paramètres codés en indices (les
+# mêmes dans toutes les langues) et graine de son générateur. Sous forme
+# d'entier (pack_key), c'est la valeur de burger["key"] et de l'historique.
+BurgerKey = namedtuple("BurgerKey", "mode params seed")
+PARAM_COUNTS = {"classic": 3, "extreme": 2, "zodiac": 1}
+SEED_BITS = 32
+_MASK64 = (1 << 64) - 1
+
+
+CACHE_DIR = "__pycache__"
+CACHE_VERSION = 1
+
+
+def load_translations(language, src_dir=SRC_DIR, cache=True):
+    """Lit le fichier de traduction d'une langue (lève FileNotFoundError / JSONDecodeError)
+
+    Avec cache=True, le contenu est aussi gardé sous forme marshal dans
+    src_dir/__pycache__, clé (mtime, taille) du JSON : les lancements suivants
+    évitent l'analyse JSON tant que le fichier n'a pas changé. Seul le JSON
+    analysé est en cache : les tables (compile_translations) sont recompilées
+    à chaque lancement, ce qui coûte moins que la lecture du cache.
+    """
+    lang_file = os.path.join(src_dir, f"translations_{language.lower()}.json")
+    if not cache:
+        with open(lang_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    stat = os.stat(lang_file)
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_file = os.path.join(src_dir, CACHE_DIR, f"translations_{language.lower()}.marshal")
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, trans = marshal.load(f)
+        if tuple(cached_key) == key:
+            return trans
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    with open(lang_file, 'r', encoding='utf-8') as f:
+        trans = json.load(f)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            marshal.dump((key, trans), f)
+        os.replace(tmp, cache_file)
+    except (OSError, ValueError):
+        pass  # Cache facultatif (dossier en lecture seule...)
+    return trans
+
+
+def extreme_level(tables, level):
+    """Niveau extrême validé : entier de 1 à tables.extreme_max_level (ValueError sinon)"""
+    try:
+        value = int(level)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid extreme level: {level!r}") from None
+    if not 1 <= value <= tables.extreme_max_level:
+        raise ValueError(f"Extreme level out of range 1-{tables.extreme_max_level}: {value}")
+    return value
+
+
+def new_seed():
+    """Graine aléatoire pour un nouveau burger"""
+    return random.getrandbits(SEED_BITS)
+
+
+def pack_key(key):
+    """BurgerKey en entier de 58 bits : mode (2), paramètres (3 × 8), graine (32)"""
+    codes = 0
+    for i, code in enumerate(key.params):
+        if not 0 <= code < 256:
+            raise ValueError(f"Parameter out of range: {code}")
+        codes |= code << (8 * (2 - i))
+    return ((MODES.index(key.mode) << 24 | codes) << SEED_BITS) | (key.seed & ((1 << SEED_BITS) - 1))
+
+
+def unpack_key(value):
+    """Inverse de pack_key"""
+    value = int(value)
+    seed = value & ((1 << SEED_BITS) - 1)
+    value >>= SEED_BITS
+    if not 0 <= value >> 24 < len(MODES):
+        raise ValueError(f"Invalid burger key: {value}")
+    mode = MODES[value >> 24]
+    params = tuple((value >> (8 * (2 - i))) & 0xFF for i in range(PARAM_COUNTS[mode]))
+    return BurgerKey(mode, params, seed)
+
+
+class KeyRandom:
+    """Générateur d'un seul burger (splitmix64), initialisé par sa graine
+
+    Bien moins coûteux à créer qu'un random.Random, et son tirage ne dépend
+    pas de la version de Python : une clé rejoue toujours le même burger.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed):
+        self.state = seed & _MASK64
+
+    def next64(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+
+    def choice(self, seq):
+        return seq[self.next64() % len(seq)]
+
+    def randint(self, a, b):
+        return a + self.next64() % (b - a + 1)
+
+
+def find_translations(src_dir=SRC_DIR):
+    """Fichiers translations_*.json disponibles, par code langue ("FR", "EN"...)"""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(src_dir, "translations_*.json"))):
+        code = os.path.basename(path)[len("translations_"):-len(".json")]
+        files[code.upper()] = path
+    return files
+
+
+class BurgerEngine:
+    """Génère des burgers à partir des tables compilées d'une langue"""
+
+    def __init__(self, tables):
+        if isinstance(tables, dict):
+            tables = compile_translations(tables)
+        self.tables = tables
+        # Positions des sauces et des signes : même ordre dans toutes les langues
+        self.sauce_names = tuple(tables.sauces)
+        self.sign_names = tuple(tables.zodiac)
+        self._sauce_codes = {name: i for i, name in enumerate(self.sauce_names)}
+        self._sign_codes = {name: i for i, name in enumerate(self.sign_names)}
+
+    def generate_classic(self, burger_type, size, sauce, rng=random):
+        """Génère un burger classique"""
+        name, ingredients, calories = self.tables.classic[(burger_type, size)]
+        return {
+            "name": name,
+            "ingredients": list(ingredients),
+            "sauce": sauce,
+            "sauce_desc": self.tables.sauces[sauce],
+            "calories": calories,
+            "type": "classic"
+        }
+
+    def generate_extreme(self, level, vegan, rng=random):
+        """Génère un burger extrême"""
+        tables = self.tables
+        level = extreme_level(tables, level)
+        ingredients = tables.extreme_ingredients[(level, bool(vegan))]
+        return {
+            "name": f"{'Vegan ' if vegan else ''}Crazy Burger Level {level}",
+            "ingredients": list(ingredients),
+            "sauce": rng.choice(tables.extreme_sauces[min(level, len(EXTREME_SAUCES))]),
+            "calories": 500 + level * 150,
+            "type": "extreme"
+        }
+
+    def generate_zodiac(self, sign_name, rng=random):
+        """Génère un burger du zodiaque"""
+        entry = self.tables.zodiac[sign_name]
+        return {
+            "name": entry.name,
+            "ingredients": list(entry.ingredients),
+            "sauce": rng.choice(entry.sauces),
+            "calories": rng.randint(*ZODIAC_CALORIES),
+            "prediction": entry.prediction,
+            "type": "zodiac"
+        }
+
+    def generate(self, mode, params, rng=random):
+        """Génère un burger pour un mode donné ("classic", "extreme" ou "zodiac")"""
+        if mode == "classic":
+            return self.generate_classic(params["burger_type"], params["size"], params["sauce"], rng)
+        if mode == "extreme":
+            return self.generate_extreme(params["level"], params.get("vegan", False), rng)
+        if mode == "zodiac":
+            return self.generate_zodiac(params["sign"], rng)
+        raise ValueError(f"Unknown mode: {mode}")
+
+    def encode_params(self, mode, params):
+        """Paramètres d'un mode en indices (partie params d'un BurgerKey)"""
+        try:
+            if mode == "classic":
+                return (CLASSIC_TYPES.index(params["burger_type"]), SIZES.index(params["size"]),
+                        self._sauce_codes[params["sauce"]])
+            if mode == "extreme":
+                return (extreme_level(self.tables, params["level"]), int(bool(params.get("vegan", False))))
+            if mode == "zodiac":
+                return (self._sign_codes[params["sign"]],)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid {mode} parameters: {params}") from e
+        raise ValueError(f"Unknown mode: {mode}")
+
+    def decode_params(self, mode, codes):
+        """Inverse de encode_params, avec les noms de la langue de ces tables"""
+        if mode == "classic":
+            return {"burger_type": CLASSIC_TYPES[codes[0]], "size": SIZES[codes[1]], "sauce": self.sauce_names[codes[2]]}
+        if mode == "extreme":
+            return {"level": codes[0], "vegan": bool(codes[1])}
+        if mode == "zodiac":
+            return {"sign": self.sign_names[codes[0]]}
+        raise ValueError(f"Unknown mode: {mode}")
+
+    def create(self, mode, params, seed=None):
+        """Génère un burger rejouable : burger["key"] le régénère avec replay()"""
+        if seed is None:
+            seed = new_seed()
+        burger = self.generate(mode, params, KeyRandom(seed))
+        burger["key"] = pack_key(BurgerKey(mode, self.encode_params(mode, params), seed))
+        return burger
+
+    def replay(self, key):
+        """Régénère un burger à partir de sa clé (entier ou BurgerKey), dans la langue des tables"""
+        if not isinstance(key, BurgerKey):
+            key = unpack_key(key)
+        try:
+            params = self.decode_params(key.mode, key.params)
+        except IndexError as e:
+            raise ValueError(f"Unknown burger key: {key}") from e
+        return self.create(key.mode, params, key.seed)
+
+    def iter_many(self, mode, params, n, seed=None):
+        """Générateur de n burgers rejouables, la série étant reproductible si une graine est fournie"""
+        seeds = random.Random(seed)
+        generate = {
+            "classic": lambda rng: self.generate_classic(params["burger_type"], params["size"], params["sauce"], rng),
+            "extreme": lambda rng: self.generate_extreme(params["level"], params.get("vegan", False), rng),
+            "zodiac": lambda rng: self.generate_zodiac(params["sign"], rng)
+        }.get(mode)
+        if generate is None:
+            raise ValueError(f"Unknown mode: {mode}")
+        # Clé commune à la série, complétée par la graine de chaque burger
+        base = pack_key(BurgerKey(mode, self.encode_params(mode, params), 0))
+        for _ in range(n):
+            burger_seed = seeds.getrandbits(SEED_BITS)
+            burger = generate(KeyRandom(burger_seed))
+            burger["key"] = base | burger_seed
+            yield burger
+
+    def generate_many(self, mode, params, n, seed=None):
+        """Génère une liste de n burgers"""
+        return list(self.iter_many(mode, params, n, seed))
+
+    def generate_bulk(self, mode, params, n, seed=None):
+        """Génère n burgers en colonnes NumPy (voir burger_bulk)"""
+        from burger_bulk import bulk_generate
+        return bulk_generate(self.tables, mode, params, n, seed)
+
+
+def generate_many(mode, params, n, seed=None, language="FR", trans=None):
+    """Raccourci : génère n burgers sans instancier l'interface"""
+    if trans is None:
+        trans = load_translations(language)
+    return BurgerEngine(trans).generate_many(mode, params, n, seed)
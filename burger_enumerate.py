@@ -0,0 +1,331 @@
+"""Énumération de tous les burgers possibles d'une langue, répartie sur des processus
+
+Usage : python burger_enumerate.py space.db [--lang FR] [--workers 4]
+        python burger_enumerate.py space.parquet  (dossier de fichiers Parquet)
+
+L'espace est le produit des tables de traduction : type × taille × sauce pour
+les classiques, niveau × régime × sauce pour les extrêmes, signe × sauce ×
+tranche de calories pour le zodiaque. Il est découpé en blocs d'index
+consécutifs, générés par les processus du pool avec le moteur habituel.
+Chaque bloc écrit est enregistré comme fait (dans la même transaction SQLite,
+ou par le renommage de son fichier Parquet) : relancer la commande reprend
+là où elle s'était arrêtée.
+"""
+import argparse
+import bisect
+import collections
+import itertools
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from burger_engine import SRC_DIR, ZODIAC_CALORIES, BurgerEngine, load_translations
+from burger_tables import CLASSIC_TYPES, EXTREME_SAUCES, SIZES
+
+CALORIE_STEP = 50
+CHUNK_SIZE = 20_000
+STATS_BUCKET = 100  # Largeur des tranches de la distribution des calories
+
+_SPACES = {}
+
+
+class _Pick:
+    """Tirage imposé : la sauce et les calories d'une case de l'espace"""
+
+    __slots__ = ("sauce", "calories")
+
+    def __init__(self, sauce, calories=None):
+        self.sauce = sauce
+        self.calories = calories
+
+    def choice(self, seq):
+        return self.sauce
+
+    def randint(self, a, b):
+        return self.calories
+
+
+class BurgerSpace:
+    """Espace des burgers d'une langue, indexé de 0 à total - 1
+
+    Formé de blocs (mode, axes) : chaque bloc est le produit cartésien de ses
+    axes (les sauces d'un extrême dépendent de son niveau, celles d'un signe
+    de son élément).
+    """
+
+    def __init__(self, engine, calorie_step=CALORIE_STEP):
+        self.engine = engine
+        tables = engine.tables
+        sauces = tuple(tables.sauces)
+        types = tuple(t for t in CLASSIC_TYPES if (t, SIZES[0]) in tables.classic)
+        self.blocks = [("classic", (types, SIZES, sauces))]
+        # Niveaux définis par les tables de la langue (1 à extreme_max_level)
+        for level in range(1, tables.extreme_max_level + 1):
+            level_sauces = tables.extreme_sauces[min(level, len(EXTREME_SAUCES))]
+            self.blocks.append(("extreme", ((level,), (False, True), level_sauces)))
+        low, high = ZODIAC_CALORIES
+        buckets = tuple(range(low, high + 1, calorie_step))
+        for sign, entry in tables.zodiac.items():
+            self.blocks.append(("zodiac", ((sign,), entry.sauces, buckets)))
+        self.starts = []
+        self.total = 0
+        for _, axes in self.blocks:
+            self.starts.append(self.total)
+            self.total += math.prod(len(axis) for axis in axes)
+
+    def burgers(self, start, stop):
+        """(index, burger) pour les index de start à stop exclu"""
+        engine = self.engine
+        generate = {
+            "classic": lambda cell: engine.generate_classic(*cell),
+            "extreme": lambda cell: engine.generate_extreme(cell[0], cell[1], _Pick(cell[2])),
+            "zodiac": lambda cell: engine.generate_zodiac(cell[0], _Pick(cell[1], cell[2])),
+        }
+        block = max(bisect.bisect_right(self.starts, start) - 1, 0)
+        index = start
+        while index < stop and block < len(self.blocks):
+            mode, axes = self.blocks[block]
+            offset = self.starts[block]
+            end = min(stop, offset + math.prod(len(axis) for axis in axes))
+            for cell in itertools.islice(itertools.product(*axes), index - offset, end - offset):
+                yield index, generate[mode](cell)
+                index += 1
+            block += 1
+
+
+def _space(lang, calorie_step):
+    """Espace d'une langue, construit une fois par processus"""
+    space = _SPACES.get((lang, calorie_step))
+    if space is None:
+        space = _SPACES[(lang, calorie_step)] = BurgerSpace(
+            BurgerEngine(load_translations(lang, SRC_DIR)), calorie_step
+        )
+    return space
+
+
+def enumerate_chunk(lang, calorie_step, chunk, start, stop):
+    """Tâche du pool : lignes d'un bloc d'index et ses statistiques"""
+    rows = []
+    modes = collections.Counter()
+    calories = collections.Counter()
+    ingredients = collections.Counter()
+    for index, burger in _space(lang, calorie_step).burgers(start, stop):
+        rows.append((index, burger["type"], burger["name"], tuple(burger["ingredients"]),
+                     burger["sauce"], burger["calories"]))
+        modes[burger["type"]] += 1
+        calories[burger["calories"] // STATS_BUCKET * STATS_BUCKET] += 1
+        ingredients.update(burger["ingredients"])
+    stats = {"modes": dict(modes), "calories": dict(calories), "ingredients": dict(ingredients)}
+    return chunk, rows, stats
+
+
+class SqliteSink:
+    """Résultats dans une base SQLite : table burger_space et blocs faits"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS burger_space
+                             (idx INTEGER PRIMARY KEY,
+                             mode TEXT,
+                             name TEXT,
+                             ingredients TEXT,
+                             sauce TEXT,
+                             calories INTEGER)''')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS enumeration_chunks
+                             (chunk INTEGER PRIMARY KEY,
+                             rows INTEGER,
+                             stats TEXT)''')
+        self.conn.execute("CREATE TABLE IF NOT EXISTS enumeration_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def meta(self):
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM enumeration_meta")}
+
+    def set_meta(self, meta):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO enumeration_meta VALUES (?, ?)",
+                                  [(key, json.dumps(value)) for key, value in meta.items()])
+
+    def done(self):
+        """{bloc: statistiques} des blocs déjà écrits"""
+        return {chunk: json.loads(stats) for chunk, stats in self.conn.execute(
+            "SELECT chunk, stats FROM enumeration_chunks")}
+
+    def write(self, chunk, rows, stats):
+        # Lignes et marque de fin du bloc dans la même transaction
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO burger_space VALUES (?, ?, ?, ?, ?, ?)",
+                [(i, mode, name, json.dumps(ingredients, ensure_ascii=False), sauce, calories)
+                 for i, mode, name, ingredients, sauce, calories in rows]
+            )
+            self.conn.execute("INSERT INTO enumeration_chunks VALUES (?, ?, ?)",
+                              (chunk, len(rows), json.dumps(stats, ensure_ascii=False)))
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetSink:
+    """Résultats en colonnes : un fichier Parquet par bloc dans un dossier
+
+    Les fichiers annexes (réglages, statistiques des blocs) commencent par "_" :
+    le dossier se lit directement comme un jeu de données Parquet.
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self.pa = pyarrow
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.schema = pyarrow.schema([
+            ("idx", pyarrow.int64()),
+            ("mode", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("ingredients", pyarrow.list_(pyarrow.string())),
+            ("sauce", pyarrow.string()),
+            ("calories", pyarrow.int64()),
+        ])
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def meta(self):
+        try:
+            with open(self._file("_meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def set_meta(self, meta):
+        with open(self._file("_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def done(self):
+        done = {}
+        for name in os.listdir(self.path):
+            if name.startswith("part-") and name.endswith(".parquet"):
+                chunk = int(name[len("part-"):-len(".parquet")])
+                with open(self._file(f"_stats-{chunk:06d}.json"), encoding="utf-8") as f:
+                    done[chunk] = json.load(f)
+        return done
+
+    def write(self, chunk, rows, stats):
+        pa = self.pa
+        columns = list(zip(*rows)) if rows else [()] * len(self.schema)
+        table = pa.Table.from_arrays(
+            [pa.array(column, field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema
+        )
+        with open(self._file(f"_stats-{chunk:06d}.json"), "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False)
+        # Le fichier .parquet n'apparaît qu'une fois complet : c'est la marque de fin du bloc
+        tmp = self._file(f"part-{chunk:06d}.parquet.tmp")
+        pa.parquet.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, self._file(f"part-{chunk:06d}.parquet"))
+
+    def close(self):
+        pass
+
+
+def merge_stats(all_stats):
+    """Additionne les statistiques des blocs"""
+    merged = {"modes": collections.Counter(), "calories": collections.Counter(),
+              "ingredients": collections.Counter()}
+    for stats in all_stats:
+        for name, counter in merged.items():
+            # Les clés numériques relues en JSON sont des chaînes
+            counter.update({(int(k) if name == "calories" else k): v for k, v in stats[name].items()})
+    return merged
+
+
+def format_stats(stats, top=20):
+    """Résumé texte : burgers par mode, distribution des calories, ingrédients les plus fréquents"""
+    total = sum(stats["modes"].values())
+    lines = [f"burgers: {total}"]
+    lines += [f"  {mode:<10} {count:>12}" for mode, count in sorted(stats["modes"].items())]
+    lines.append(f"calories (tranches de {STATS_BUCKET} kcal):")
+    peak = max(stats["calories"].values(), default=1)
+    for bucket, count in sorted(stats["calories"].items()):
+        lines.append(f"  {bucket:>5}-{bucket + STATS_BUCKET - 1:<5} {count:>12} {'#' * max(1, round(40 * count / peak))}")
+    lines.append(f"ingrédients ({len(stats['ingredients'])} distincts), les plus fréquents:")
+    for ingredient, count in stats["ingredients"].most_common(top):
+        lines.append(f"  {ingredient:<40} {count:>12} ({100 * count / total:.1f} %)")
+    return "\n".join(lines)
+
+
+def run(output, lang="FR", workers=None, chunk_size=CHUNK_SIZE, calorie_step=CALORIE_STEP, progress=None):
+    """Énumère l'espace dans output (.db : SQLite, sinon dossier Parquet) ; renvoie les statistiques
+
+    Les blocs déjà présents dans output ne sont pas recalculés.
+    progress(blocs faits, blocs au total) est appelé après chaque bloc.
+    """
+    sink = SqliteSink(output) if output.endswith((".db", ".sqlite")) else ParquetSink(output)
+    try:
+        total = _space(lang, calorie_step).total
+        meta = {"lang": lang, "calorie_step": calorie_step, "chunk_size": chunk_size, "total": total}
+        previous = sink.meta()
+        if previous and previous != meta:
+            raise ValueError(f"{output} was built with other settings: {previous}")
+        sink.set_meta(meta)
+        done = sink.done()
+        chunks = [(chunk, start, min(start + chunk_size, total))
+                  for chunk, start in enumerate(range(0, total, chunk_size)) if chunk not in done]
+        all_stats = list(done.values())
+        count = len(done)
+        total_chunks = count + len(chunks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Au plus deux blocs en attente par processus : mémoire bornée
+            limit = 2 * (workers or os.cpu_count() or 1)
+            pending = set()
+            todo = iter(chunks)
+            while True:
+                for chunk, start, stop in itertools.islice(todo, limit - len(pending)):
+                    pending.add(pool.submit(enumerate_chunk, lang, calorie_step, chunk, start, stop))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk, rows, stats = future.result()
+                    sink.write(chunk, rows, stats)
+                    all_stats.append(stats)
+                    count += 1
+                    if progress is not None:
+                        progress(count, total_chunks)
+        return merge_stats(all_stats)
+    finally:
+        sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="base SQLite (.db) ou dossier Parquet")
+    parser.add_argument("--lang", default="FR")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nb de cœurs)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--calorie-step", type=int, default=CALORIE_STEP,
+                        help="largeur des tranches de calories du zodiaque")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\rchunks: {done}/{total} ({time.perf_counter() - start:.1f} s)", end="", file=sys.stderr)
+
+    stats = run(args.output, args.lang.upper(), args.workers, args.chunk_size, args.calorie_step, progress)
+    print(file=sys.stderr)
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Représentation compacte des burgers : recettes internées et enregistrements à __slots__"""
+import sys
+import time
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping
+
+# Une recette (type, nom, ingrédients) est partagée par tous les burgers qui la
+# suivent : il n'en existe que quelques centaines par langue
+Recipe = namedtuple("Recipe", ["id", "burger_type", "name", "ingredients"])
+
+
+# Identifiants de terms sur 4 octets (le type C "I" en fait 4 sur toutes les plateformes courantes)
+ID_TYPE = "I" if array("I").itemsize == 4 else "L"
+
+
+def pack_ids(ids):
+    """Identifiants (< 2**32) en blob de 4 octets chacun, petit-boutiste"""
+    packed = array(ID_TYPE, ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_ids(blob):
+    """Inverse de pack_ids"""
+    ids = array(ID_TYPE)
+    ids.frombytes(blob)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids
+
+
+class BurgerRecord(Mapping):
+    """Burger lu dans l'historique : une recette partagée et quelques champs propres
+
+    Se lit comme le dict d'un burger (record["name"], record.get("sauce")...)
+    mais n'occupe qu'une poignée de pointeurs : nom, ingrédients et sauce sont
+    des objets internés, communs à tous les burgers identiques.
+    """
+
+    __slots__ = ("id", "recipe", "sauce", "calories", "timestamp", "key")
+
+    def __init__(self, id, recipe, sauce, calories, timestamp=None, key=None):
+        self.id = id
+        self.recipe = recipe
+        self.sauce = sauce
+        self.calories = calories
+        self.timestamp = timestamp
+        self.key = key  # Clé rejouable (burger_engine.pack_key), absente des anciens burgers
+
+    @property
+    def created_at(self):
+        """Date d'enregistrement "AAAA-MM-JJ HH:MM:SS" (calculée à la lecture)"""
+        if self.timestamp is None:
+            return None
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(self.timestamp))
+
+    @property
+    def name(self):
+        return self.recipe.name
+
+    @property
+    def ingredients(self):
+        return self.recipe.ingredients
+
+    @property
+    def type(self):
+        return self.recipe.burger_type
+
+    _KEYS = ("id", "name", "ingredients", "sauce", "calories", "type", "created_at", "key")
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (key for key in self._KEYS if getattr(self, key) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Burger sous forme de dict (ingrédients en liste), comme ceux du moteur"""
+        burger = dict(self)
+        burger["ingredients"] = list(self.recipe.ingredients)
+        return burger
+
+    def __repr__(self):
+        return f"BurgerRecord({self.id!r}, {self.name!r}, {self.sauce!r}, {self.calories!r})"
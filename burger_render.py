@@ -0,0 +1,218 @@
+"""Rendus d'un burger (zone de texte, message de partage, PDF) et leur cache LRU
+
+Un même burger est affiché, réaffiché depuis l'historique, partagé et exporté :
+chaque rendu est calculé une fois par (format, burger, libellés) puis relu
+dans le cache. Les valeurs mises en cache sont des tuples, jamais modifiées.
+"""
+import threading
+from collections import OrderedDict
+from string import Formatter
+from urllib.parse import quote
+
+from burger_record import BurgerRecord
+
+NEXT_LINE = {"new_x": "LMARGIN", "new_y": "NEXT"}  # Équivalent de l'ancien ln=1 de cell()
+TITLE_EMOJIS = {"classic": "🍔", "extreme": "🌶️", "zodiac": "♈"}
+SHARE_TEMPLATES = {
+    "FR": ("Mon burger créé : {name} !\n"
+           "Ingrédients : {ingredients}\n"
+           "Calories : {calories} kcal\n"
+           "#GénérateurDeBurger"),
+    "EN": ("Check out my burger: {name}!\n"
+           "Ingredients: {ingredients}\n"
+           "Calories: {calories} kcal\n"
+           "#BurgerGenerator"),
+}
+SHARE_URL = "https://twitter.com/intent/tweet?text="
+_SHARE_URL_TEMPLATES = {}
+
+
+def latin1(text):
+    """Retire les caractères hors latin-1 (emojis) non gérés par les polices PDF de base"""
+    return str(text).encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+def _size(value):
+    """Taille approximative d'un rendu (caractères, plus un mot par élément)"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return 8 + sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return 8 + sum(_size(item) for item in value.values())
+    return 8
+
+
+class RenderCache:
+    """Cache LRU partagé entre threads, borné par la taille totale des rendus"""
+
+    def __init__(self, max_size=2_000_000):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """Rendu en cache pour key, sinon render() (appelé hors du verrou) mis en cache"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = render()
+        size = _size(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_size:
+                self._entries[key] = (value, size)
+                self.size += size
+                while self.size > self.max_size:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.size -= evicted
+        return value
+
+    def clear(self):
+        """Vide le cache (après un rechargement des traductions)"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CACHE = RenderCache()
+
+
+def burger_identity(burger):
+    """Identité d'un burger pour le cache : son contenu, quelle que soit sa provenance"""
+    if isinstance(burger, BurgerRecord):
+        # Recette internée : (type, nom, ingrédients) déjà rassemblés
+        return (burger.recipe[1:], burger.sauce, burger.calories)
+    return (burger.get("type"), burger["name"], tuple(burger["ingredients"]), burger.get("sauce"),
+            burger.get("sauce_desc"), burger["calories"], burger.get("prediction"))
+
+
+def text_runs(burger, labels, cache=CACHE):
+    """Arguments de Text.insert(END, *runs) : texte et étiquettes en alternance, en un seul appel
+
+    labels : ingredients_label, sauce_label, calories_label et prediction_label traduits.
+    """
+    def render():
+        emoji = TITLE_EMOJIS.get(burger["type"], "🍔")
+        runs = [
+            f"{emoji} {burger['name']} {emoji}\n\n", "title",
+            f"{labels['ingredients_label']}\n", "bold",
+            "".join(f"- {ing}\n" for ing in burger["ingredients"]), "",
+        ]
+        if burger.get("sauce") is not None:
+            runs += [f"\n{labels['sauce_label']}: {burger['sauce']}\n", "bold"]
+            if burger.get("sauce_desc") is not None:
+                runs += [f"({burger['sauce_desc']})\n", ""]
+        runs += [f"\n{labels['calories_label']}: {burger['calories']} kcal\n", "bold"]
+        if burger["type"] == "zodiac":
+            runs += [f"\n{labels['prediction_label']}: {burger['prediction']}\n", "bold"]
+        return tuple(runs)
+
+    return cache.get(("text", burger_identity(burger), tuple(labels.items())), render)
+
+
+def share_message(burger, language, cache=CACHE):
+    """Message de partage dans la langue donnée (anglais par défaut)"""
+    def render():
+        return SHARE_TEMPLATES.get(language, SHARE_TEMPLATES["EN"]).format(
+            name=burger["name"],
+            ingredients=", ".join(burger["ingredients"]),
+            calories=burger["calories"],
+        )
+
+    return cache.get(("share", burger_identity(burger), language), render)
+
+
+def _share_url_template(language):
+    """SHARE_TEMPLATES d'une langue découpé en (texte déjà encodé pour l'URL, champ), une fois par langue"""
+    template = _SHARE_URL_TEMPLATES.get(language)
+    if template is None:
+        template = _SHARE_URL_TEMPLATES[language] = tuple(
+            (quote(literal, safe=""), field)
+            for literal, field, _, _ in Formatter().parse(SHARE_TEMPLATES.get(language, SHARE_TEMPLATES["EN"]))
+        )
+    return template
+
+
+def share_url(burger, language, cache=CACHE):
+    """URL de partage de share_message(), encodée : seuls les champs du burger sont encodés ici"""
+    def render():
+        fields = {
+            "name": burger["name"],
+            "ingredients": ", ".join(burger["ingredients"]),
+            "calories": burger["calories"],
+        }
+        return SHARE_URL + "".join(
+            literal + (quote(str(fields[field]), safe="") if field else "")
+            for literal, field in _share_url_template(language)
+        )
+
+    return cache.get(("share_url", burger_identity(burger), language), render)
+
+
+def pdf_fragment(burger, labels, cache=CACHE):
+    """Fiche PDF d'un burger sous forme d'appels FPDF (méthode, args, kwargs), voir draw_fragment"""
+    def render():
+        ops = [
+            ("set_font", ("Helvetica", "B", 16), {}),
+            ("cell", (200, 10), {"text": latin1(burger["name"]), "align": "C", **NEXT_LINE}),
+            ("ln", (10,), {}),
+            ("set_font", ("Helvetica", "B", 12), {}),
+            ("cell", (200, 10), {"text": latin1(labels["ingredients_label"]), **NEXT_LINE}),
+            ("set_font", ("Helvetica", "", 12), {}),
+        ]
+        ops += [("cell", (200, 10), {"text": latin1(f"- {ing}"), **NEXT_LINE}) for ing in burger["ingredients"]]
+        if burger.get("sauce") is not None:
+            ops += [
+                ("ln", (5,), {}),
+                ("set_font", ("Helvetica", "B", 12), {}),
+                ("cell", (40, 10), {"text": latin1(labels["sauce_label"] + ":")}),
+                ("set_font", ("Helvetica", "", 12), {}),
+                ("cell", (0, 10), {"text": latin1(burger["sauce"]), **NEXT_LINE}),
+            ]
+        ops += [
+            ("set_font", ("Helvetica", "B", 12), {}),
+            ("cell", (40, 10), {"text": latin1(labels["calories_label"] + ":")}),
+            ("set_font", ("Helvetica", "", 12), {}),
+            ("cell", (0, 10), {"text": str(burger["calories"]), **NEXT_LINE}),
+        ]
+        if burger.get("type") == "zodiac":
+            ops += [
+                ("ln", (5,), {}),
+                ("set_font", ("Helvetica", "I", 12), {}),
+                ("multi_cell", (0, 10), {"text": latin1(burger["prediction"])}),
+            ]
+        return tuple(ops)
+
+    return cache.get(("pdf", burger_identity(burger), tuple(labels.items())), render)
+
+
+def draw_fragment(pdf, fragment):
+    """Rejoue un fragment de pdf_fragment sur une page FPDF"""
+    for method, args, kwargs in fragment:
+        getattr(pdf, method)(*args, **kwargs)
+
+
+def sheet_card(burger, labels, max_lines, max_chars):
+    """Titre et lignes d'une fiche de l'export en grille (latin-1, tronquées à la case)
+
+    Non mis en cache ici : pdf_export garde directement les fragments PDF qui en découlent.
+    """
+    lines = [f"- {latin1(ing)}" for ing in burger["ingredients"]]
+    if burger.get("sauce"):
+        lines.append(f"{labels['sauce_label']} {latin1(burger['sauce'])}")
+    lines.append(f"{labels['calories_label']} {burger['calories']} kcal")
+    if burger.get("prediction"):
+        lines.append(latin1(burger["prediction"]))
+    if len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + ["..."]
+    return latin1(burger["name"]), tuple(line[:max_chars] for line in lines)
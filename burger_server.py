@@ -0,0 +1,377 @@
+"""Service HTTP local (JSON) de génération de burgers
+
+Usage : python burger_server.py [--port 8765] [--workers 4] [--db burgers.db] [--share-sink <url|fichier>]
+
+    POST /generate/<classic|extreme|zodiac>  {"params": {...}, "n": 1, "seed": null, "lang": "FR"}
+    POST /generate/bulk/<mode>               mêmes champs, résultat en colonnes (NumPy)
+    GET  /burger/<clé>?lang=FR               régénère un burger à partir de sa clé ("key")
+    GET  /history?limit=50&before=<curseur next>&burger_type=...&search=...
+    POST /history                            {"burgers": [...]}  (enregistrement groupé)
+    GET  /stats?days=14&limit=10             tableaux de bord (agrégats, temps constant)
+    POST /export/pdf                         {"filters": {...}, "lang": "FR"}  -> application/pdf
+    POST /share                              {"burgers": [...]} ou {"filters": {...}}, "lang": "FR"
+                                             (avec --share-sink, voir burger_share)
+    GET  /share                              compteurs, profondeur de file et débit du partage
+    GET  /health
+    GET  /metrics                            mesures par étape (avec --profile ou UBG_PROFILE=1)
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import instrumentation
+from burger_engine import MODES, SRC_DIR, BurgerEngine, find_translations, load_translations, unpack_key
+from history_db import HistoryDatabase, default_db_path
+from history_stats import HistoryStats
+from history_store import format_timestamp
+
+CHUNK_SIZE = 5000  # Taille des lots envoyés aux processus de génération
+MAX_BURGERS = 1_000_000
+
+_TRANSLATIONS = {}
+_ENGINES = {}
+
+
+def _translations(lang):
+    """Traductions d'une langue, lues une fois par processus"""
+    trans = _TRANSLATIONS.get(lang)
+    if trans is None:
+        trans = _TRANSLATIONS[lang] = load_translations(lang, SRC_DIR)
+    return trans
+
+
+def _engine(lang):
+    """Moteur compilé d'une langue, mis en cache dans chaque processus"""
+    engine = _ENGINES.get(lang)
+    if engine is None:
+        engine = _ENGINES[lang] = BurgerEngine(_translations(lang))
+    return engine
+
+
+def _generate_chunk(lang, mode, params, n, seed):
+    """Tâche exécutée dans un processus du pool"""
+    return _engine(lang).generate_many(mode, params, n, seed)
+
+
+def _generate_bulk(lang, mode, params, n, seed):
+    """Génération en colonnes, convertie en listes JSON"""
+    result = _engine(lang).generate_bulk(mode, params, n, seed)
+    return {
+        "mode": result.mode,
+        "type_codes": result.type_codes.tolist(),
+        "sauce_codes": result.sauce_codes.tolist(),
+        "calories": result.calories.tolist(),
+        "ingredient_ids": result.ingredient_ids.tolist(),
+        "type_names": list(result.type_names),
+        "sauce_names": list(result.sauce_names),
+        "ingredient_lists": [list(items) for items in result.ingredient_lists],
+    }
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _checked_burger(burger, index):
+    """Champs enregistrés d'un burger reçu, vérifiés (ValueError : requête refusée)"""
+    def invalid(field):
+        return ValueError(f"Invalid burger #{index}: bad or missing {field!r}")
+
+    if not isinstance(burger, dict):
+        raise ValueError(f"Invalid burger #{index}: expected an object")
+    if not isinstance(burger.get("name"), str) or not burger["name"]:
+        raise invalid("name")
+    if burger.get("type") not in MODES:
+        raise invalid("type")
+    ingredients = burger.get("ingredients")
+    if not isinstance(ingredients, list) or not all(isinstance(item, str) for item in ingredients):
+        raise invalid("ingredients")
+    if not _is_int(burger.get("calories")) or not 0 <= burger["calories"] < 1 << 31:
+        raise invalid("calories")
+    for field in ("sauce", "diet"):
+        if not isinstance(burger.get(field, ""), str):
+            raise invalid(field)
+    key = burger.get("key")
+    if key is not None:
+        # Clé rejouable par engine.replay : entier 64 bits de mode connu
+        try:
+            if not _is_int(key) or not 0 <= key < 1 << 63:
+                raise ValueError
+            unpack_key(key)
+        except ValueError:
+            raise invalid("key") from None
+    return {
+        "name": burger["name"],
+        "type": burger["type"],
+        "ingredients": ingredients,
+        "sauce": burger.get("sauce", ""),
+        "diet": burger.get("diet", ""),
+        "calories": burger["calories"],
+        "key": key,
+    }
+
+
+class Overloaded(Exception):
+    """Trop de requêtes en cours : le client doit réessayer plus tard"""
+
+
+class BurgerService:
+    """Logique du service, indépendante du transport HTTP"""
+
+    def __init__(self, db_path, workers=None, max_inflight=64, readers=4, share_sink=None):
+        self.db_path = db_path
+        # Schéma migré, lecteurs en pool (lecture seule) et écrivain groupé unique
+        self.database = HistoryDatabase(db_path, readers, writer_options={"notify": False})
+        # Français par défaut, comme l'application
+        self.languages = sorted(find_translations(SRC_DIR) or ["FR"], key=lambda lang: lang != "FR")
+        self.processes = ProcessPoolExecutor(max_workers=workers)
+        self.threads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-export")
+        self.sharing = None
+        if share_sink is not None:
+            from burger_share import SharePipeline, sink_for
+
+            self.sharing = SharePipeline(sink_for(share_sink))
+        self._slots = threading.BoundedSemaphore(max_inflight)
+
+    @contextmanager
+    def admission(self):
+        """Back-pressure : refuse immédiatement au-delà de max_inflight requêtes"""
+        if not self._slots.acquire(blocking=False):
+            raise Overloaded()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _lang(self, body):
+        lang = str(body.get("lang", self.languages[0])).upper()
+        if lang not in self.languages:
+            raise ValueError(f"Unknown language: {lang}")
+        return lang
+
+    def generate(self, mode, body):
+        """Génère n burgers ; les gros lots sont répartis sur les processus"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        lang = self._lang(body)
+        params = body.get("params", {})
+        n = min(int(body.get("n", 1)), MAX_BURGERS)
+        seed = body.get("seed")
+        if n <= CHUNK_SIZE:
+            return _engine(lang).generate_many(mode, params, n, seed)
+        # Une graine par lot, dérivée de la graine de la requête
+        seeds = random.Random(seed)
+        sizes = [CHUNK_SIZE] * (n // CHUNK_SIZE) + ([n % CHUNK_SIZE] if n % CHUNK_SIZE else [])
+        futures = [
+            self.processes.submit(_generate_chunk, lang, mode, params, size, seeds.getrandbits(64))
+            for size in sizes
+        ]
+        burgers = []
+        for future in futures:
+            burgers.extend(future.result())
+        return burgers
+
+    def generate_bulk(self, mode, body):
+        """Génération en colonnes dans un processus du pool"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        n = min(int(body.get("n", 1)), MAX_BURGERS)
+        return self.processes.submit(
+            _generate_bulk, self._lang(body), mode, body.get("params", {}), n, body.get("seed")
+        ).result()
+
+    def replay(self, key, query):
+        """Burger régénéré à partir de sa clé, dans la langue demandée"""
+        lang = self._lang({"lang": query["lang"][0]} if "lang" in query else {})
+        return _engine(lang).replay(int(key))
+
+    def history(self, query):
+        """Page d'historique (pagination par clé)"""
+        filters = {
+            key: query[key][0]
+            for key in ("burger_type", "sauce", "search") if key in query
+        }
+        for key in ("min_calories", "max_calories"):
+            if key in query:
+                filters[key] = int(query[key][0])
+        limit = max(1, min(int(query.get("limit", ["50"])[0]), 1000))
+        before = None
+        if "before" in query:
+            created_at, _, burger_id = query["before"][0].rpartition(",")
+            before = (int(created_at), int(burger_id))
+        with self.database.reader() as reader:
+            rows = reader.page(before=before, limit=limit, **filters)
+        return {
+            "rows": [{"id": r[0], "name": r[1], "created_at": format_timestamp(r[2])} for r in rows],
+            "next": f"{rows[-1][2]},{rows[-1][0]}" if len(rows) == limit else None
+        }
+
+    def stats(self, query):
+        """Tableaux de bord de l'historique, lus dans les agrégats"""
+        days = max(1, min(int(query.get("days", ["14"])[0]), 366))
+        limit = max(1, min(int(query.get("limit", ["10"])[0]), 1000))
+        with self.database.reader() as reader:
+            summary = HistoryStats(reader.conn, reader.book).summary(days, limit)
+        return {name: row._asdict() if name == "totals" else [r._asdict() for r in row]
+                for name, row in summary.items()}
+
+    def save(self, body):
+        """Enregistre des burgers via l'écrivain groupé ; tous sont vérifiés avant d'être acceptés"""
+        burgers = body.get("burgers", [])
+        if not isinstance(burgers, list):
+            raise ValueError("'burgers' must be a list")
+        burgers = [_checked_burger(burger, i) for i, burger in enumerate(burgers)]
+        self.database.writer.submit_many(burgers)
+        return {"queued": len(burgers)}
+
+    def _share_pipeline(self):
+        if self.sharing is None:
+            raise ValueError("Sharing is disabled (start the server with --share-sink)")
+        return self.sharing
+
+    def share(self, body):
+        """Met en partage des burgers fournis, ou ceux de l'historique filtré"""
+        from burger_share import share_history
+
+        pipeline = self._share_pipeline()
+        lang = self._lang(body)
+        if "filters" in body:
+            with self.database.reader() as reader:
+                return {"queued": share_history(pipeline, reader, lang, **body["filters"])}
+        burgers = body.get("burgers", [])
+        pipeline.submit_many(burgers, lang)
+        return {"queued": len(burgers)}
+
+    def share_metrics(self):
+        return self._share_pipeline().metrics()
+
+    def export_pdf(self, body):
+        """Exporte l'historique filtré en PDF et renvoie son contenu"""
+        from pdf_export import export_history_pdf
+
+        trans = _translations(self._lang(body))
+        labels = {key: trans.get(key, key) for key in ("ingredients_label", "sauce_label", "calories_label")}
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            self.threads.submit(export_history_pdf, self.db_path, path, labels, body.get("filters")).result()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def close(self):
+        if self.sharing is not None:
+            self.sharing.close()
+        self.database.close()
+        self.processes.shutdown()
+        self.threads.shutdown()
+
+
+class BurgerRequestHandler(BaseHTTPRequestHandler):
+    """Routage HTTP vers BurgerService"""
+
+    service = None
+
+    def _send(self, status, payload, content_type="application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        """Corps JSON de la requête : un objet (ValueError, donc 400, sinon)"""
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _dispatch(self, handler):
+        try:
+            with self.service.admission():
+                handler()
+        except Overloaded:
+            self._send(503, {"error": "overloaded"})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif url.path == "/metrics" and instrumentation.enabled():
+            self._send(200, instrumentation.snapshot())
+        elif url.path == "/history":
+            self._dispatch(lambda: self._send(200, self.service.history(parse_qs(url.query))))
+        elif url.path == "/share":
+            self._dispatch(lambda: self._send(200, self.service.share_metrics()))
+        elif url.path == "/stats":
+            self._dispatch(lambda: self._send(200, self.service.stats(parse_qs(url.query))))
+        elif url.path.startswith("/burger/"):
+            key = url.path[len("/burger/"):]
+            self._dispatch(lambda: self._send(200, self.service.replay(key, parse_qs(url.query))))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if parts[:2] == ["generate", "bulk"] and len(parts) == 3:
+            self._dispatch(lambda: self._send(200, self.service.generate_bulk(parts[2], self._body())))
+        elif parts[0] == "generate" and len(parts) == 2:
+            self._dispatch(lambda: self._send(200, {"burgers": self.service.generate(parts[1], self._body())}))
+        elif parts == ["history"]:
+            self._dispatch(lambda: self._send(202, self.service.save(self._body())))
+        elif parts == ["share"]:
+            self._dispatch(lambda: self._send(202, self.service.share(self._body())))
+        elif parts == ["export", "pdf"]:
+            self._dispatch(lambda: self._send(200, self.service.export_pdf(self._body()), "application/pdf"))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass  # Pas de journal par requête (coûteux sous charge)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="processus de génération (défaut : nb de cœurs)")
+    parser.add_argument("--max-inflight", type=int, default=64)
+    parser.add_argument("--db", default=None, help="base de l'historique (défaut : celle de l'application)")
+    parser.add_argument("--share-sink", default=None, help="cible du partage : URL http(s) ou fichier .jsonl")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    if instrumentation.configure(args.profile, args.metrics_port, args.metrics_dump, args.metrics_interval):
+        instrumentation.instrument_core()
+
+    service = BurgerService(args.db or default_db_path(), args.workers, args.max_inflight, share_sink=args.share_sink)
+    BurgerRequestHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), BurgerRequestHandler)
+    server.daemon_threads = True
+    print(f"Burger service on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
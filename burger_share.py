@@ -0,0 +1,372 @@
+"""Partage des burgers : file asyncio, envoi par lots vers une cible interchangeable
+
+Usage :
+    python burger_share.py serve [--port 8766] [--fail-rate 0.1] [--latency 0.05]
+        cible HTTP locale de test (POST /share, GET /share pour ses compteurs)
+    python burger_share.py history burgers.db --sink <http://...|fichier.jsonl|browser>
+        [--lang FR] [--search ...] [--burger-type ...] [--rate 50] [--concurrency 4]
+
+Les burgers (interface, service HTTP, requêtes sur l'historique) sont mis dans
+une file asyncio tournant sur son propre thread. Des tâches d'envoi, en nombre
+limité, en retirent des lots, les mettent en forme (messages et URL en cache,
+voir burger_render) et les envoient à la cible, avec un débit maximal et des
+réessais à délai croissant.
+"""
+import argparse
+import asyncio
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instrumentation
+from burger_render import share_message, share_url
+from history_db import connect
+from history_store import HistoryReader
+
+Share = namedtuple("Share", "key language text url")
+
+
+def make_share(burger, language):
+    """Message et URL de partage d'un burger (dict ou BurgerRecord)"""
+    return Share(burger.get("key"), language, share_message(burger, language), share_url(burger, language))
+
+
+class SinkError(Exception):
+    """Échec d'envoi ; retryable=False pour une erreur que réessayer ne corrigera pas"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class HttpSink:
+    """POST JSON {"shares": [...]} d'un lot vers une URL (429 et 5xx sont réessayés)"""
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, data):
+        request = urllib.request.Request(self.url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            raise SinkError(f"HTTP {e.code} from {self.url}", retryable=e.code == 429 or e.code >= 500) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise SinkError(f"{self.url}: {e}") from e
+
+    async def send(self, shares):
+        data = json.dumps({"shares": [share._asdict() for share in shares]}, ensure_ascii=False).encode("utf-8")
+        await asyncio.to_thread(self._post, data)
+
+
+class FileSink:
+    """Ajoute chaque partage en ligne JSON à un fichier"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write(self, lines):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def send(self, shares):
+        lines = "".join(json.dumps(share._asdict(), ensure_ascii=False) + "\n" for share in shares)
+        await asyncio.to_thread(self._write, lines)
+
+
+class BrowserSink:
+    """Ouvre l'URL de partage de chaque burger dans le navigateur"""
+
+    def _open(self, urls):
+        import webbrowser
+
+        for url in urls:
+            webbrowser.open(url)
+
+    async def send(self, shares):
+        await asyncio.to_thread(self._open, [share.url for share in shares])
+
+
+def sink_for(target):
+    """Cible d'après son nom : "browser", une URL http(s) ou un chemin de fichier"""
+    if target == "browser":
+        return BrowserSink()
+    if target.startswith(("http://", "https://")):
+        return HttpSink(target)
+    return FileSink(target)
+
+
+class RateLimiter:
+    """Seau à jetons : au plus rate partages par seconde, par rafales de burst"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def acquire(self, n=1):
+        # Une seule tâche à la fois dans la boucle : pas de verrou nécessaire entre deux await
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= min(n, self.burst):
+                self.tokens -= n  # Un lot plus gros que burst passe en laissant une dette
+                return
+            await asyncio.sleep((min(n, self.burst) - self.tokens) / self.rate)
+
+
+class SharePipeline:
+    """File de partage asyncio sur un thread dédié, alimentée depuis n'importe quel thread
+
+    submit()/submit_many() bloquent si max_queue partages sont déjà en attente.
+    concurrency tâches envoient chacune un lot (jusqu'à batch_size partages,
+    complété pendant au plus flush_interval s) à la fois ; un lot en échec est
+    réessayé max_retries fois avec un délai croissant, puis publié avec son
+    erreur dans la file `failed`.
+    """
+
+    def __init__(self, sink, batch_size=50, flush_interval=0.2, concurrency=4,
+                 max_retries=3, backoff=0.5, rate=None, max_queue=10_000):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate) if rate else None
+        self.max_queue = max_queue
+        self.failed = queue.Queue()
+        self.counts = {"submitted": 0, "sent": 0, "failed": 0, "retries": 0, "batches": 0, "max_depth": 0}
+        self.send_seconds = 0.0
+        self.started = time.monotonic()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="share-pipeline", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue(self.max_queue)
+        self._workers = [self.loop.create_task(self._worker()) for _ in range(self.concurrency)]
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _put(self, items):
+        for item in items:
+            await self.queue.put(item)
+            self.counts["submitted"] += 1
+        self.counts["max_depth"] = max(self.counts["max_depth"], self.queue.qsize())
+
+    def submit(self, burger, language):
+        """Met un burger en attente de partage"""
+        self.submit_many([burger], language)
+
+    def submit_many(self, burgers, language):
+        """Met plusieurs burgers en attente de partage"""
+        items = [(burger, language) for burger in burgers]
+        asyncio.run_coroutine_threadsafe(self._put(items), self.loop).result()
+
+    def flush(self):
+        """Bloque jusqu'à ce que tout ce qui a été soumis soit envoyé (ou abandonné)"""
+        asyncio.run_coroutine_threadsafe(self.queue.join(), self.loop).result()
+
+    def close(self):
+        """Envoie les partages restants puis arrête le thread"""
+        self.flush()
+
+        async def stop():
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(self.loop.create_task, stop())
+        self._thread.join()
+
+    async def _worker(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - self.loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            try:
+                shares = []
+                for burger, language in batch:
+                    try:
+                        shares.append(make_share(burger, language))
+                    except (KeyError, TypeError, AttributeError) as e:
+                        # Burger incomplet : écarté seul, le reste du lot part
+                        self.counts["failed"] += 1
+                        self.failed.put(([burger], e))
+                if shares:
+                    await self._send(shares)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _send(self, shares):
+        """Envoie un lot en respectant le débit, avec réessais"""
+        if self.limiter is not None:
+            await self.limiter.acquire(len(shares))
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with instrumentation.span("share.send_batch"):
+                    await self.sink.send(shares)
+            except Exception as e:
+                self.send_seconds += time.perf_counter() - start
+                if attempt == self.max_retries or not getattr(e, "retryable", True):
+                    self.counts["failed"] += len(shares)
+                    self.failed.put((shares, e))
+                    return
+                self.counts["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            else:
+                self.send_seconds += time.perf_counter() - start
+                self.counts["sent"] += len(shares)
+                self.counts["batches"] += 1
+                return
+
+    def metrics(self):
+        """Compteurs, profondeur de file et débit depuis le démarrage"""
+        elapsed = time.monotonic() - self.started
+        counts = dict(self.counts)
+        return {
+            **counts,
+            "queue_depth": self.queue.qsize(),
+            "throughput": round(counts["sent"] / elapsed, 1) if elapsed else 0.0,
+            "avg_batch_ms": round(1000 * self.send_seconds / max(counts["batches"], 1), 2),
+        }
+
+
+def share_history(pipeline, reader, language, chunk_size=500, **filters):
+    """Met en partage les burgers de l'historique correspondant aux filtres ; renvoie leur nombre"""
+    done = 0
+    chunk = []
+    for record in reader.iter_burgers(chunk_size=chunk_size, **filters):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            pipeline.submit_many(chunk, language)
+            done += len(chunk)
+            chunk = []
+    if chunk:
+        pipeline.submit_many(chunk, language)
+        done += len(chunk)
+    return done
+
+
+class StubShareHandler(BaseHTTPRequestHandler):
+    """Cible de test : compte les partages reçus, avec latence et erreurs 503 simulées"""
+
+    fail_rate = 0.0
+    latency = 0.0
+    received = 0
+    requests = 0
+    errors = 0
+    _lock = threading.Lock()
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        cls = type(self)
+        self._send(200, {"received": cls.received, "requests": cls.requests, "errors": cls.errors})
+
+    def do_POST(self):
+        cls = type(self)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if cls.latency:
+            time.sleep(cls.latency)
+        with cls._lock:
+            cls.requests += 1
+            if random.random() < cls.fail_rate:
+                cls.errors += 1
+                failed = True
+            else:
+                cls.received += len(json.loads(body or b"{}").get("shares", []))
+                failed = False
+        if failed:
+            self._send(503, {"error": "simulated failure"})
+        else:
+            self._send(200, {"status": "ok"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="cible HTTP locale de test")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8766)
+    serve.add_argument("--fail-rate", type=float, default=0.0, help="part des requêtes refusées (503)")
+    serve.add_argument("--latency", type=float, default=0.0, help="délai de réponse en secondes")
+    history = commands.add_parser("history", help="partage les burgers de l'historique")
+    history.add_argument("db", help="base SQLite de l'historique")
+    history.add_argument("--sink", required=True, help="URL http(s), fichier .jsonl ou browser")
+    history.add_argument("--lang", default="FR")
+    history.add_argument("--search", default=None)
+    history.add_argument("--burger-type", default=None)
+    history.add_argument("--batch-size", type=int, default=50)
+    history.add_argument("--concurrency", type=int, default=4)
+    history.add_argument("--rate", type=float, default=None, help="partages par seconde au plus")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        StubShareHandler.fail_rate = args.fail_rate
+        StubShareHandler.latency = args.latency
+        server = ThreadingHTTPServer((args.host, args.port), StubShareHandler)
+        server.daemon_threads = True
+        print(f"Share stub on http://{args.host}:{args.port}/share")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    conn = connect(args.db, readonly=True)
+    pipeline = SharePipeline(sink_for(args.sink), batch_size=args.batch_size,
+                             concurrency=args.concurrency, rate=args.rate)
+    try:
+        start = time.perf_counter()
+        done = share_history(pipeline, HistoryReader(conn), args.lang.upper(),
+                             search=args.search, burger_type=args.burger_type)
+        pipeline.flush()
+        print(f"share: {done} burgers in {time.perf_counter() - start:.1f} s {pipeline.metrics()}", file=sys.stderr)
+    finally:
+        pipeline.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Tables de recettes précompilées à partir des fichiers de traduction"""
+from collections import namedtuple
+from types import MappingProxyType
+
+CLASSIC_TYPES = (
+    "Hamburger", "Cheeseburger", "Bacon Burger",
+    "Chicken Burger", "Fish Burger", "Veggie Burger"
+)
+SIZES = ("Simple", "Double", "Triple")
+
+BASE_CALORIES = MappingProxyType({
+    "Hamburger": 500,
+    "Cheeseburger": 600,
+    "Bacon Burger": 750,
+    "Chicken Burger": 450,
+    "Fish Burger": 400,
+    "Veggie Burger": 350
+})
+SIZE_FACTORS = MappingProxyType({
+    "Simple": 1,
+    "Double": 1.8,
+    "Triple": 2.5
+})
+
+EXTREME_SAUCES = (
+    "Rainbow mayo",
+    "Banana ketchup",
+    "1000-spice sauce"
+)
+ZODIAC_SAUCES = MappingProxyType({
+    "Fire": ("Spicy sauce", "BBQ sauce"),
+    "Earth": ("Forest sauce", "Truffle sauce"),
+    "Air": ("Light sauce", "Lemon sauce"),
+    "Water": ("Hollandaise", "Tartar sauce")
+})
+ELEMENTS = ("Fire", "Earth", "Air", "Water")
+
+# Type de steak/filet détecté une fois pour toutes à la compilation
+PATTY_STEAK = "steak"
+PATTY_FILET = "filet"
+
+ZodiacEntry = namedtuple("ZodiacEntry", "name ingredients sauces prediction element emoji")
+
+CompiledTables = namedtuple("CompiledTables", [
+    "sauces",              # nom de sauce -> description
+    "patty_kinds",         # type classique -> PATTY_STEAK / PATTY_FILET / None
+    "classic",             # (type, taille) -> (nom, ingrédients, calories)
+    "extreme_ingredients", # (niveau borné, végan) -> ingrédients cumulés (4 max)
+    "extreme_sauces",      # min(niveau, 3) -> sauces possibles
+    "extreme_max_level",
+    "zodiac",              # signe -> ZodiacEntry
+])
+
+
+def patty_kind(ingredient):
+    """Détermine si l'ingrédient principal est un steak ou un filet"""
+    lowered = ingredient.lower()
+    if "steak" in lowered or "haché" in lowered:
+        return PATTY_STEAK
+    if "filet" in lowered or "fillet" in lowered:
+        return PATTY_FILET
+    return None
+
+
+def _classic_table(classic):
+    """Compile les ingrédients et calories de chaque combinaison type × taille"""
+    patty_kinds = {}
+    table = {}
+    extra = {
+        ("Double", PATTY_STEAK): classic.get("Double steak"),
+        ("Double", PATTY_FILET): classic.get("Double filet"),
+        ("Triple", PATTY_STEAK): classic.get("Triple steak"),
+        ("Triple", PATTY_FILET): classic.get("Triple filet"),
+    }
+    for burger_type, base in classic.items():
+        if not isinstance(base, list):
+            continue
+        kind = patty_kind(base[1]) if len(base) > 1 else None
+        patty_kinds[burger_type] = kind
+        base_calories = BASE_CALORIES.get(burger_type, 500)
+        for size in SIZES:
+            ingredients = list(base)
+            if kind is not None and (size, kind) in extra:
+                ingredients.insert(1, extra[(size, kind)])
+            table[(burger_type, size)] = (
+                f"{size} {burger_type}",
+                tuple(ingredients),
+                int(base_calories * SIZE_FACTORS[size])
+            )
+    return MappingProxyType(patty_kinds), MappingProxyType(table)
+
+
+def _extreme_tables(extreme):
+    """Compile les listes d'ingrédients cumulées pour chaque niveau et régime"""
+    max_level = max(
+        (int(lvl) for levels in extreme.values() for lvl in levels),
+        default=0
+    )
+    table = {}
+    for ingredient_type, vegan in (("non_vegan", False), ("vegan", True)):
+        levels = sorted(
+            (int(lvl), items) for lvl, items in extreme.get(ingredient_type, {}).items()
+        )
+        for level in range(max_level + 1):
+            ingredients = []
+            for lvl, items in levels:
+                if level >= lvl:
+                    ingredients.extend(items)
+            table[(level, vegan)] = tuple(ingredients[:4])  # Limite à 4 ingrédients
+    sauces = tuple(EXTREME_SAUCES[:n] for n in range(len(EXTREME_SAUCES) + 1))
+    return MappingProxyType(table), sauces, max_level
+
+
+def _zodiac_table(trans):
+    """Compile ingrédients, sauces et prédiction de chaque signe"""
+    by_element = trans["ingredients"]["zodiac"]
+    # Les éléments traduits (Feu, Terre...) suivent le même ordre que ELEMENTS
+    element_sauces = {
+        element: ZODIAC_SAUCES.get(element, ZODIAC_SAUCES[ELEMENTS[i % len(ELEMENTS)]])
+        for i, element in enumerate(by_element)
+    }
+    table = {}
+    for sign_name, sign_data in trans["zodiac_signs"].items():
+        element = sign_data["element"]
+        table[sign_name] = ZodiacEntry(
+            f"{sign_name} Burger {sign_data['emoji']}",
+            tuple(by_element[element]),
+            element_sauces[element],
+            trans["zodiac_predictions"][sign_name],
+            element,
+            sign_data["emoji"]
+        )
+    return MappingProxyType(table)
+
+
+class TranslationError(ValueError):
+    """Fichier de traduction au schéma invalide ; problems liste chaque erreur trouvée"""
+
+    def __init__(self, problems, source=None):
+        self.problems = list(problems)
+        self.source = source
+        where = f"{source}: " if source else ""
+        super().__init__(f"{where}invalid translations: " + "; ".join(self.problems))
+
+
+def _strings(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(item, str) for item in value)
+
+
+def validate_translations(trans):
+    """Erreurs de schéma des sections utilisées par le moteur (liste vide si valide)
+
+    Vérifie une fois, à la compilation, ce qui ne se verrait sinon qu'à la
+    génération (KeyError) : sauces, signes et prédictions, ingrédients
+    classiques (un par type de CLASSIC_TYPES), extrêmes et du zodiaque.
+    """
+    problems = []
+    sauces = trans.get("sauces")
+    if not isinstance(sauces, dict) or not sauces:
+        problems.append("sauces: non-empty object expected")
+    else:
+        problems += [f"sauces.{name}: text expected" for name, desc in sauces.items() if not isinstance(desc, str)]
+
+    ingredients = trans.get("ingredients")
+    if not isinstance(ingredients, dict):
+        return problems + ["ingredients: object expected"]
+
+    classic = ingredients.get("classic")
+    if not isinstance(classic, dict):
+        problems.append("ingredients.classic: object expected")
+    else:
+        problems += [f"ingredients.classic.{burger_type}: non-empty list of texts expected"
+                     for burger_type in CLASSIC_TYPES if not _strings(classic.get(burger_type))]
+        problems += [f"ingredients.classic.{size} {kind}: text expected"
+                     for size in SIZES[1:] for kind in (PATTY_STEAK, PATTY_FILET)
+                     if not isinstance(classic.get(f"{size} {kind}", ""), str)]
+
+    extreme = ingredients.get("extreme")
+    if not isinstance(extreme, dict):
+        problems.append("ingredients.extreme: object expected")
+    else:
+        for diet in ("non_vegan", "vegan"):
+            levels = extreme.get(diet, {})
+            if not isinstance(levels, dict):
+                problems.append(f"ingredients.extreme.{diet}: object expected")
+                continue
+            for level, items in levels.items():
+                if not level.isdigit():
+                    problems.append(f"ingredients.extreme.{diet}.{level}: level must be a number")
+                if not _strings(items):
+                    problems.append(f"ingredients.extreme.{diet}.{level}: non-empty list of texts expected")
+
+    elements = ingredients.get("zodiac")
+    if not isinstance(elements, dict) or not elements:
+        problems.append("ingredients.zodiac: non-empty object expected")
+        elements = {}
+    else:
+        problems += [f"ingredients.zodiac.{element}: non-empty list of texts expected"
+                     for element, items in elements.items() if not _strings(items)]
+
+    signs = trans.get("zodiac_signs")
+    predictions = trans.get("zodiac_predictions")
+    if not isinstance(predictions, dict):
+        problems.append("zodiac_predictions: object expected")
+        predictions = {}
+    if not isinstance(signs, dict) or not signs:
+        problems.append("zodiac_signs: non-empty object expected")
+    else:
+        for sign, data in signs.items():
+            if not isinstance(data, dict) or not isinstance(data.get("emoji"), str):
+                problems.append(f"zodiac_signs.{sign}: object with an emoji expected")
+            elif data.get("element") not in elements:
+                problems.append(f"zodiac_signs.{sign}.element: unknown element {data.get('element')!r}")
+            if not isinstance(predictions.get(sign), str):
+                problems.append(f"zodiac_predictions.{sign}: text expected")
+    return problems
+
+
+def _section(trans, path):
+    """Valeur d'une section des traductions (None si absente)"""
+    for key in path:
+        trans = trans.get(key) if isinstance(trans, dict) else None
+    return trans
+
+
+# Sections des traductions -> champs de CompiledTables qui en dépendent, et leur compilation
+SECTIONS = (
+    ((("sauces",),), ("sauces",),
+     lambda trans: (MappingProxyType(dict(trans["sauces"])),)),
+    ((("ingredients", "classic"),), ("patty_kinds", "classic"),
+     lambda trans: _classic_table(trans["ingredients"]["classic"])),
+    ((("ingredients", "extreme"),), ("extreme_ingredients", "extreme_sauces", "extreme_max_level"),
+     lambda trans: _extreme_tables(trans["ingredients"]["extreme"])),
+    ((("zodiac_signs",), ("zodiac_predictions",), ("ingredients", "zodiac")), ("zodiac",),
+     lambda trans: (_zodiac_table(trans),)),
+)
+
+
+def compile_translations(trans, previous=None):
+    """Compile un dictionnaire de traductions en tables de recherche immuables
+
+    Lève TranslationError si le schéma est invalide. previous = (traductions,
+    tables) d'une compilation antérieure : seules les sections modifiées sont
+    recompilées, les autres tables sont reprises telles quelles.
+    """
+    problems = validate_translations(trans)
+    if problems:
+        raise TranslationError(problems)
+    fields = {}
+    for paths, names, compile_section in SECTIONS:
+        if previous is not None and all(_section(previous[0], path) == _section(trans, path) for path in paths):
+            fields.update((name, getattr(previous[1], name)) for name in names)
+        else:
+            fields.update(zip(names, compile_section(trans)))
+    return CompiledTables(**fields)
@@ -0,0 +1,154 @@
+"""Accès à la base de l'historique : réglages, migrations, un écrivain et un pool de lecteurs
+
+Point d'entrée commun de l'application Tk, des outils en lot (history_io,
+pdf_export, burger_share) et du service HTTP : toutes les connexions passent
+par connect(), qui applique les mêmes pragmas et le même cache de requêtes
+préparées. HistoryDatabase migre le schéma à l'ouverture, puis prête ses
+lecteurs aux threads ; les écritures passent toutes par un seul HistoryWriter.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from history_store import MIGRATIONS, SCHEMA_VERSION, HistoryReader, HistoryWriter, ensure_schema
+
+PRAGMAS = {
+    "journal_mode": "WAL",           # Lecteurs et écrivain ne se bloquent pas
+    "synchronous": "NORMAL",         # Sûr en WAL : pas de fsync à chaque transaction
+    "mmap_size": 256 * 1024 * 1024,  # Pages lues sans copie dans le cache de SQLite
+    "cache_size": -32 * 1024,        # Cache de pages par connexion, en Kio (32 Mo)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,            # Attente du verrou d'écriture plutôt qu'une erreur immédiate
+}
+# Base de l'historique partagée par l'application et le service : dossier src/ du projet
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "burgers.db")
+LEGACY_DB_PATH = "burgers.db"  # Emplacement des versions précédentes : dossier courant au lancement
+STATEMENT_CACHE = 256  # Requêtes préparées gardées par connexion (filtres combinés de l'historique)
+
+
+def connect(db_path, readonly=False, pragmas=None):
+    """Connexion réglée (PRAGMAS, surchargés par pragmas), utilisable d'un thread à l'autre
+
+    readonly : la connexion refuse toute écriture (lecteurs du pool, exports). Une
+    base d'une version antérieure est d'abord migrée par une connexion en écriture :
+    lue telle quelle, elle serait mal décodée (voir MIGRATIONS).
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    for name, value in {**PRAGMAS, **(pragmas or {})}.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    if readonly:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            writable = connect(db_path, pragmas=pragmas)
+            try:
+                migrate(writable)
+            finally:
+                writable.close()
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def default_db_path():
+    """Base à ouvrir par défaut : DEFAULT_DB_PATH, reprise de l'ancien emplacement au premier lancement
+
+    Si DEFAULT_DB_PATH n'existe pas encore mais LEGACY_DB_PATH oui, celle-ci est
+    copiée vers DEFAULT_DB_PATH par l'API de sauvegarde de SQLite (copie
+    cohérente, même si la base est ouverte ailleurs). L'ancienne base n'est pas
+    modifiée ; si la copie échoue, c'est elle qui est ouverte.
+    """
+    if os.path.exists(DEFAULT_DB_PATH) or not os.path.exists(LEGACY_DB_PATH):
+        return DEFAULT_DB_PATH
+    tmp = f"{DEFAULT_DB_PATH}.{os.getpid()}.tmp"
+    try:
+        source = sqlite3.connect(LEGACY_DB_PATH)
+        try:
+            target = sqlite3.connect(tmp)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        os.replace(tmp, DEFAULT_DB_PATH)
+    except (OSError, sqlite3.Error):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return os.path.abspath(LEGACY_DB_PATH)
+    return DEFAULT_DB_PATH
+
+
+def migrate(conn):
+    """Met le schéma à jour (ensure_schema puis migrations numérotées) ; renvoie la version
+
+    Refuse une base créée par une version plus récente de l'application.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"History database schema v{version} is newer than supported v{SCHEMA_VERSION}")
+    ensure_schema(conn)
+    # Une base que ensure_schema vient de créer est déjà au format courant
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for step in MIGRATIONS[max(version, 1) - 1:]:
+        step(conn)
+        conn.commit()
+    if version != SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return SCHEMA_VERSION
+
+
+class HistoryDatabase:
+    """Base d'historique ouverte : schéma migré, un écrivain et jusqu'à `readers` lecteurs
+
+    reader() prête un HistoryReader (connexion en lecture seule) le temps d'un
+    bloc with ; les connexions sont ouvertes à la demande puis réutilisées.
+    open_reader() crée un lecteur réservé à un seul thread (file "db" de
+    l'interface). writer est le HistoryWriter, seul à écrire (ajouts et
+    suppressions) ; writer_options est transmis à son constructeur.
+    """
+
+    def __init__(self, db_path, readers=4, pragmas=None, writer_options=None):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        conn = self.connect()
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        self._idle = queue.LifoQueue()  # Dernier rendu, premier resservi : son cache est chaud
+        self._slots = threading.BoundedSemaphore(readers)
+        self._open = []
+        self._lock = threading.Lock()
+        self.writer = HistoryWriter(db_path, connect=lambda path: connect(path, pragmas=pragmas),
+                                    **(writer_options or {}))
+
+    def connect(self, readonly=False):
+        """Nouvelle connexion à cette base, avec ses réglages"""
+        return connect(self.db_path, readonly, self.pragmas)
+
+    def open_reader(self):
+        """Lecteur hors pool, à fermer par son propriétaire (reader.conn.close())"""
+        return HistoryReader(self.connect(readonly=True))
+
+    @contextmanager
+    def reader(self):
+        """Prête un lecteur du pool ; attend si les `readers` lecteurs sont occupés"""
+        with self._slots:
+            try:
+                reader = self._idle.get_nowait()
+            except queue.Empty:
+                reader = self.open_reader()
+                with self._lock:
+                    self._open.append(reader)
+            try:
+                yield reader
+            finally:
+                self._idle.put(reader)
+
+    def close(self):
+        """Écrit les ajouts en attente, arrête l'écrivain et ferme les lecteurs du pool"""
+        self.writer.close()
+        with self._lock:
+            for reader in self._open:
+                reader.conn.close()
+            self._open.clear()
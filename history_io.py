@@ -0,0 +1,341 @@
+"""Export et import en masse de l'historique (CSV, JSONL, Parquet, Arrow), en flux
+
+Usage :
+    python history_io.py export burgers.db historique.jsonl.gz
+    python history_io.py import autre.db historique.parquet [--keep-ids]
+
+Le format se déduit de l'extension (.csv, .jsonl, .parquet, .arrow ; .gz
+compresse CSV et JSONL) ou de --format. Les lignes sont lues et écrites par
+blocs : la mémoire reste constante quelle que soit la taille de la table.
+Parquet et Arrow demandent pyarrow.
+"""
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+
+from history_db import connect, migrate
+from history_store import BURGER_INDEXES, RecipeBook, drop_stats, ensure_schema, format_timestamp, timestamp
+
+COLUMNS = ("id", "type", "name", "ingredients", "sauce", "diet", "calories", "created_at", "key")
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+CHUNK_SIZE = 10_000
+COMMIT_ROWS = 500_000  # Lignes par transaction à l'import
+
+SELECT_ROWS = ("SELECT id, recipe_id, sauce_id, diet, calories, created_at, burger_key "
+               "FROM burgers ORDER BY id")
+
+
+def detect_format(path):
+    """Format d'après l'extension du fichier (.gz ignoré)"""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for extension, fmt in FORMATS.items():
+        if name.endswith(extension):
+            return fmt
+    raise ValueError(f"Unknown format for {path} (expected {', '.join(FORMATS)})")
+
+
+def _open_text(path, mode):
+    if path.lower().endswith(".gz"):
+        # Niveau 6 : presque aussi compact que 9, bien plus rapide
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _pyarrow():
+    """Modules pyarrow, importés à la demande (dépendance facultative)"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow support requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("type", pa.string()),
+        ("name", pa.string()),
+        ("ingredients", pa.list_(pa.string())),
+        ("sauce", pa.string()),
+        ("diet", pa.string()),
+        ("calories", pa.int64()),
+        # Heure murale sans fuseau, comme history_store.timestamp()
+        ("created_at", pa.timestamp("s")),
+        ("key", pa.int64()),
+    ])
+
+
+def iter_chunks(conn, chunk_size=CHUNK_SIZE):
+    """Lignes brutes de la table burgers par blocs, lues par un seul curseur dans l'ordre des id"""
+    cursor = conn.execute(SELECT_ROWS)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _write_csv(path, chunks, book):
+    with _open_text(path, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        # Colonnes de recette (type, nom, ingrédients en JSON) calculées une fois par recette
+        recipes = {}
+        for rows in chunks:
+            out = []
+            for burger_id, recipe_id, sauce_id, diet, calories, created_at, key in rows:
+                recipe = recipes.get(recipe_id)
+                if recipe is None:
+                    r = book.recipe(recipe_id)
+                    recipe = recipes[recipe_id] = (r.burger_type, r.name, json.dumps(r.ingredients, ensure_ascii=False))
+                out.append((burger_id, *recipe, book.text(sauce_id), diet, calories,
+                            "" if created_at is None else format_timestamp(created_at), key))
+            writer.writerows(out)
+            yield len(rows)
+
+
+def _write_jsonl(path, chunks, book):
+    with _open_text(path, "w") as f:
+        # Fragments JSON des recettes et des sauces calculés une fois chacun
+        recipes = {}
+        sauces = {}
+        for rows in chunks:
+            lines = []
+            for burger_id, recipe_id, sauce_id, diet, calories, created_at, key in rows:
+                recipe = recipes.get(recipe_id)
+                if recipe is None:
+                    r = book.recipe(recipe_id)
+                    recipe = recipes[recipe_id] = json.dumps(
+                        {"type": r.burger_type, "name": r.name, "ingredients": r.ingredients}, ensure_ascii=False
+                    )[1:-1]
+                sauce = sauces.get(sauce_id)
+                if sauce is None:
+                    sauce = sauces[sauce_id] = json.dumps(book.text(sauce_id), ensure_ascii=False)
+                lines.append(
+                    f'{{"id": {burger_id}, {recipe}, "sauce": {sauce}, "diet": {json.dumps(diet, ensure_ascii=False)}, '
+                    f'"calories": {json.dumps(calories)}, '
+                    f'"created_at": {json.dumps(None if created_at is None else format_timestamp(created_at))}, '
+                    f'"key": {json.dumps(key)}}}\n'
+                )
+            f.writelines(lines)
+            yield len(rows)
+
+
+def _write_arrow(path, chunks, book, fmt):
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for rows in chunks:
+            recipes = [book.recipe(row[1]) for row in rows]
+            batch = pa.RecordBatch.from_arrays([
+                pa.array([row[0] for row in rows], pa.int64()),
+                pa.array([r.burger_type for r in recipes], pa.string()),
+                pa.array([r.name for r in recipes], pa.string()),
+                pa.array([r.ingredients for r in recipes], pa.list_(pa.string())),
+                pa.array([book.text(row[2]) for row in rows], pa.string()),
+                pa.array([row[3] for row in rows], pa.string()),
+                pa.array([row[4] for row in rows], pa.int64()),
+                pa.array([row[5] for row in rows], pa.int64()).cast(pa.timestamp("s")),
+                pa.array([row[6] for row in rows], pa.int64()),
+            ], schema=schema)
+            writer.write_batch(batch)
+            yield len(rows)
+    finally:
+        writer.close()
+
+
+def export_history(db_path, path, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Exporte toute la table burgers dans path ; renvoie le nombre de lignes
+
+    progress(lignes écrites) est appelé après chaque bloc.
+    """
+    fmt = fmt or detect_format(path)
+    conn = connect(db_path, readonly=True)
+    try:
+        book = RecipeBook(conn)
+        chunks = iter_chunks(conn, chunk_size)
+        if fmt == "csv":
+            written = _write_csv(path, chunks, book)
+        elif fmt == "jsonl":
+            written = _write_jsonl(path, chunks, book)
+        elif fmt in ("parquet", "arrow"):
+            written = _write_arrow(path, chunks, book, fmt)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+        done = 0
+        for count in written:
+            done += count
+            if progress is not None:
+                progress(done)
+        return done
+    finally:
+        conn.close()
+
+
+def _read_csv(path, chunk_size):
+    with _open_text(path, "r") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            row["ingredients"] = json.loads(row["ingredients"] or "[]")
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _read_jsonl(path, chunk_size):
+    with _open_text(path, "r") as f:
+        chunk = []
+        for line in f:
+            if line.strip():
+                chunk.append(json.loads(line))
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+
+def _read_arrow(path, chunk_size, fmt):
+    pa = _pyarrow()
+    if fmt == "parquet":
+        batches = pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        columns = batch.to_pydict()
+        if "created_at" in columns:
+            # Secondes murales, comme dans la base (Parquet relit les secondes en millisecondes)
+            created_at = batch.column("created_at").cast(pa.timestamp("s"))
+            columns["created_at"] = created_at.cast(pa.int64()).to_pylist()
+        names = list(columns)
+        yield [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _row(book, record, keep_ids):
+    """Ligne à insérer pour un enregistrement exporté (dict de COLUMNS)"""
+    created_at = record.get("created_at")
+    if isinstance(created_at, str):
+        created_at = timestamp(created_at) if created_at else None
+    key = record.get("key")
+    burger = {
+        "type": record.get("type") or None,
+        "name": record["name"],
+        "ingredients": record.get("ingredients") or [],
+        "sauce": record.get("sauce") or "",
+        "diet": record.get("diet") or "",
+        "calories": int(record["calories"]),
+        "key": int(key) if key not in (None, "") else None,
+    }
+    row = book.row(burger, created_at)
+    return (int(record["id"]),) + row if keep_ids else row
+
+
+def import_history(db_path, path, fmt=None, keep_ids=False, chunk_size=CHUNK_SIZE,
+                   commit_rows=COMMIT_ROWS, progress=None):
+    """Charge un export dans db_path ; renvoie le nombre de lignes importées
+
+    Insertion par executemany dans des transactions de commit_rows lignes,
+    l'index de pagination et les agrégats étant supprimés pendant le
+    chargement puis reconstruits. keep_ids conserve les id d'origine (base cible vide, sinon
+    conflit) ; par défaut les lignes reçoivent de nouveaux id. Un import
+    interrompu garde les transactions déjà validées.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        chunks = _read_csv(path, chunk_size)
+    elif fmt == "jsonl":
+        chunks = _read_jsonl(path, chunk_size)
+    elif fmt in ("parquet", "arrow"):
+        chunks = _read_arrow(path, chunk_size, fmt)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    columns = "recipe_id, sauce_id, diet, calories, created_at, burger_key"
+    if keep_ids:
+        columns = "id, " + columns
+    insert = f"INSERT INTO burgers ({columns}) VALUES ({', '.join('?' * len(columns.split(', ')))})"
+
+    conn = connect(db_path)
+    try:
+        migrate(conn)
+        book = RecipeBook(conn)
+        # Un index ou des agrégats maintenus ligne à ligne coûtent plus cher que leur
+        # reconstruction en fin de chargement
+        for index in BURGER_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        drop_stats(conn)
+        done = pending = 0
+        try:
+            for records in chunks:
+                try:
+                    conn.executemany(insert, [_row(book, record, keep_ids) for record in records])
+                except BaseException:
+                    # Textes et recettes de la transaction annulée n'existent plus
+                    conn.rollback()
+                    book.reload()
+                    raise
+                done += len(records)
+                pending += len(records)
+                if pending >= commit_rows:
+                    conn.commit()
+                    book.commit()
+                    pending = 0
+                if progress is not None:
+                    progress(done)
+            conn.commit()
+            book.commit()
+        finally:
+            ensure_schema(conn)
+        conn.execute("ANALYZE")
+        return done
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("db", help="base SQLite de l'historique")
+    parser.add_argument("path", help="fichier exporté ou à importer")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), default=None,
+                        help="format (défaut : d'après l'extension)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--keep-ids", action="store_true", help="import : conserve les id d'origine")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done):
+        elapsed = time.perf_counter() - start
+        print(f"\r{args.command}: {done} rows ({done / elapsed if elapsed else 0:.0f}/s)", end="", file=sys.stderr)
+
+    if args.command == "export":
+        done = export_history(args.db, args.path, args.format, args.chunk_size, progress)
+    else:
+        done = import_history(args.db, args.path, args.format, args.keep_ids, args.chunk_size, progress=progress)
+    print(f"\r{args.command}: {done} rows in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
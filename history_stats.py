@@ -0,0 +1,98 @@
+"""Tableaux de bord de l'historique, lus dans les agrégats tenus à jour par triggers
+
+Voir STATS_SCHEMA dans history_store : chaque requête parcourt quelques
+groupes (jours × types, sauces, recettes), jamais la table burgers.
+"""
+from collections import Counter, namedtuple
+
+from history_store import RecipeBook, format_timestamp, timestamp
+
+DAY = 86400
+
+Totals = namedtuple("Totals", "burgers avg_calories")
+TypeStats = namedtuple("TypeStats", "burger_type burgers avg_calories")
+DayStats = namedtuple("DayStats", "day burger_type burgers avg_calories")  # day : "AAAA-MM-JJ"
+SauceStats = namedtuple("SauceStats", "sauce burgers avg_calories")
+IngredientStats = namedtuple("IngredientStats", "ingredient burgers")
+
+
+def _average(calories, burgers):
+    return round(calories / burgers) if burgers else 0
+
+
+def _day_text(day):
+    """Jour (created_at // DAY) au format AAAA-MM-JJ"""
+    return format_timestamp(day * DAY)[:10]
+
+
+class HistoryStats:
+    """Requêtes des tableaux de bord sur une connexion (et son dictionnaire de recettes)"""
+
+    def __init__(self, conn, book=None):
+        self.conn = conn
+        self.book = book if book is not None else RecipeBook(conn)
+
+    def _recipes(self):
+        """(recette, burgers, calories) de chaque recette présente dans l'historique"""
+        recipe = self.book.recipe
+        return [
+            (recipe(recipe_id), burgers, calories)
+            for recipe_id, burgers, calories in self.conn.execute(
+                "SELECT recipe_id, burgers, calories FROM stats_recipe WHERE recipe_id != 0")
+        ]
+
+    def totals(self):
+        """Nombre de burgers et calories moyennes de tout l'historique"""
+        burgers, calories = self.conn.execute(
+            "SELECT COALESCE(SUM(burgers), 0), COALESCE(SUM(calories), 0) FROM stats_recipe"
+        ).fetchone()
+        return Totals(burgers, _average(calories, burgers))
+
+    def by_type(self):
+        """Nombre de burgers et calories moyennes par type, du plus fréquent au moins fréquent"""
+        burgers, calories = Counter(), Counter()
+        for recipe, count, total in self._recipes():
+            burgers[recipe.burger_type] += count
+            calories[recipe.burger_type] += total
+        return [TypeStats(burger_type, count, _average(calories[burger_type], count))
+                for burger_type, count in burgers.most_common()]
+
+    def daily(self, days=14, today=None):
+        """Burgers par jour et par type sur les `days` derniers jours, du plus récent au plus ancien"""
+        last = (timestamp() if today is None else today) // DAY
+        return [
+            DayStats(_day_text(day), burger_type or None, burgers, _average(calories, burgers))
+            for day, burger_type, burgers, calories in self.conn.execute(
+                "SELECT day, burger_type, burgers, calories FROM stats_daily "
+                "WHERE day > ? AND day <= ? ORDER BY day DESC, burger_type",
+                (last - days, last)
+            )
+        ]
+
+    def sauces(self, limit=None):
+        """Nombre de burgers et calories moyennes par sauce, de la plus utilisée à la moins utilisée"""
+        text = self.book.text
+        rows = self.conn.execute(
+            "SELECT sauce_id, burgers, calories FROM stats_sauce ORDER BY burgers DESC, sauce_id LIMIT ?",
+            (-1 if limit is None else limit,)
+        )
+        return [SauceStats(text(sauce_id or None) or "", burgers, _average(calories, burgers))
+                for sauce_id, burgers, calories in rows]
+
+    def top_ingredients(self, limit=10):
+        """Ingrédients les plus fréquents (un burger compte chaque ingrédient de sa recette une fois)"""
+        counts = Counter()
+        for recipe, burgers, _ in self._recipes():
+            for ingredient in set(recipe.ingredients):
+                counts[ingredient] += burgers
+        return [IngredientStats(ingredient, burgers) for ingredient, burgers in counts.most_common(limit)]
+
+    def summary(self, days=14, limit=10):
+        """Toutes les vues du tableau de bord, en un appel (file "db" de l'interface, service HTTP)"""
+        return {
+            "totals": self.totals(),
+            "by_type": self.by_type(),
+            "daily": self.daily(days),
+            "sauces": self.sauces(limit),
+            "ingredients": self.top_ingredients(limit),
+        }
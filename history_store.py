@@ -0,0 +1,714 @@
+"""Persistance de l'historique des burgers (SQLite)"""
+import calendar
+import heapq
+import itertools
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+
+from burger_record import BurgerRecord, Recipe, pack_ids, unpack_ids
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    # Textes internés (noms, ingrédients, sauces), chacun stocké une seule fois
+    '''CREATE TABLE IF NOT EXISTS terms
+       (id INTEGER PRIMARY KEY,
+       text TEXT NOT NULL UNIQUE)''',
+    # Recettes : type, nom et ingrédients (blob d'id de terms, 4 octets chacun, voir pack_ids)
+    '''CREATE TABLE IF NOT EXISTS recipes
+       (id INTEGER PRIMARY KEY,
+       burger_type TEXT,
+       name_id INTEGER,
+       ingredient_ids BLOB,
+       UNIQUE (burger_type, name_id, ingredient_ids))''',
+    # Une ligne par burger : quelques entiers (created_at en secondes, voir timestamp() ;
+    # burger_key rejoue le burger complet, voir burger_engine.pack_key)
+    '''CREATE TABLE IF NOT EXISTS burgers
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+       recipe_id INTEGER,
+       sauce_id INTEGER,
+       diet TEXT,
+       calories INTEGER,
+       created_at INTEGER,
+       burger_key INTEGER)''',
+]
+
+# Index de burgers, supprimés pendant un chargement en masse puis recréés par ensure_schema.
+# Pagination par clé (created_at, id) ; avec un filtre de type ou de texte, une page
+# lit les recettes retenues dans l'ordre de la clé (voir HistoryReader._select), sauce
+# et calories comprises : les autres filtres s'évaluent sans lire la table
+BURGER_INDEXES = {
+    "idx_burgers_created": "burgers (created_at, id)",
+    "idx_burgers_recipe_created": "burgers (recipe_id, created_at, id, sauce_id, calories)",
+}
+SCHEMA += [f"CREATE INDEX IF NOT EXISTS {name} ON {columns}" for name, columns in BURGER_INDEXES.items()]
+
+# Recherche plein texte sur les recettes (quelques centaines de lignes), pas sur chaque burger
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(name, ingredients)",
+]
+
+# Agrégats des tableaux de bord, tenus à jour par triggers à chaque insertion ou
+# suppression (écrivain, suppression depuis l'interface, import) : leur lecture ne
+# dépend pas de la taille de l'historique. day = created_at // 86400 (jour local)
+STATS_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS stats_daily
+       (day INTEGER NOT NULL,
+       burger_type TEXT NOT NULL,
+       burgers INTEGER NOT NULL,
+       calories INTEGER NOT NULL,
+       PRIMARY KEY (day, burger_type)) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS stats_sauce
+       (sauce_id INTEGER PRIMARY KEY,
+       burgers INTEGER NOT NULL,
+       calories INTEGER NOT NULL)''',
+    # Par recette : totaux par type et classement des ingrédients (quelques centaines de lignes)
+    '''CREATE TABLE IF NOT EXISTS stats_recipe
+       (recipe_id INTEGER PRIMARY KEY,
+       burgers INTEGER NOT NULL,
+       calories INTEGER NOT NULL)''',
+]
+
+# Table d'agrégat : (colonnes de la clé, expressions de la clé pour une ligne {row} de burgers)
+STATS_KEYS = {
+    "stats_daily": (("day", "burger_type"), (
+        "COALESCE({row}.created_at, 0) / 86400",
+        "COALESCE((SELECT burger_type FROM recipes WHERE id = {row}.recipe_id), '')",
+    )),
+    "stats_sauce": (("sauce_id",), ("COALESCE({row}.sauce_id, 0)",)),
+    "stats_recipe": (("recipe_id",), ("COALESCE({row}.recipe_id, 0)",)),
+}
+
+
+def _stats_add(row):
+    """Instructions ajoutant la ligne row (NEW) aux agrégats"""
+    statements = []
+    for table, (columns, exprs) in STATS_KEYS.items():
+        keys = ", ".join(columns)
+        values = ", ".join(expr.format(row=row) for expr in exprs)
+        statements.append(
+            f"INSERT INTO {table} ({keys}, burgers, calories) "
+            f"VALUES ({values}, 1, COALESCE({row}.calories, 0)) "
+            f"ON CONFLICT ({keys}) DO UPDATE SET burgers = burgers + 1, calories = calories + excluded.calories;"
+        )
+    return " ".join(statements)
+
+
+def _stats_remove(row):
+    """Instructions retirant la ligne row (OLD) des agrégats ; les groupes vides disparaissent"""
+    statements = []
+    for table, (columns, exprs) in STATS_KEYS.items():
+        match = " AND ".join(f"{column} = {expr.format(row=row)}" for column, expr in zip(columns, exprs))
+        statements.append(
+            f"UPDATE {table} SET burgers = burgers - 1, calories = calories - COALESCE({row}.calories, 0) "
+            f"WHERE {match};"
+        )
+        statements.append(f"DELETE FROM {table} WHERE {match} AND burgers <= 0;")
+    return " ".join(statements)
+
+
+STATS_TRIGGERS = {
+    "burgers_stats_insert": f"AFTER INSERT ON burgers BEGIN {_stats_add('NEW')} END",
+    "burgers_stats_delete": f"AFTER DELETE ON burgers BEGIN {_stats_remove('OLD')} END",
+    "burgers_stats_update": (f"AFTER UPDATE OF recipe_id, sauce_id, calories, created_at ON burgers "
+                             f"BEGIN {_stats_remove('OLD')} {_stats_add('NEW')} END"),
+}
+
+INSERT_BURGER = '''INSERT INTO burgers
+                   (recipe_id, sauce_id, diet, calories, created_at, burger_key)
+                   VALUES (?, ?, ?, ?, ?, ?)'''
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def timestamp(text=None):
+    """Heure locale ("AAAA-MM-JJ HH:MM:SS", maintenant par défaut) en secondes
+
+    L'heure murale est comptée comme si elle était UTC : la conversion est
+    exacte dans les deux sens, quel que soit le fuseau ou l'heure d'été.
+    """
+    if text is None:
+        return calendar.timegm(time.localtime())
+    return calendar.timegm((int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                            int(text[11:13]), int(text[14:16]), int(text[17:19])))
+
+
+def format_timestamp(seconds):
+    """Inverse de timestamp()"""
+    return time.strftime(TIME_FORMAT, time.gmtime(seconds))
+
+
+class RecipeBook:
+    """Dictionnaire interné des textes et des recettes d'une base
+
+    Chargé en entier à la création (il est petit), puis complété à la demande :
+    intern_*() ajoute les entrées manquantes (à appeler dans la transaction
+    d'écriture), recipe()/text() relisent la base si un autre écrivain a
+    ajouté une entrée inconnue. Si la transaction est annulée, rollback()
+    retire les entrées qu'elle a ajoutées ; commit() les garde.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.reload()
+
+    def commit(self):
+        """Garde les entrées ajoutées depuis la dernière transaction (validée)"""
+        self._added.clear()
+
+    def rollback(self):
+        """Retire les entrées ajoutées depuis la dernière transaction (annulée)"""
+        for table, key in reversed(self._added):
+            table.pop(key, None)
+        self._added.clear()
+
+    def reload(self):
+        """Relit les textes et les recettes (après un rollback ou une écriture concurrente)"""
+        self.texts = dict(self.conn.execute("SELECT id, text FROM terms"))
+        self.term_ids = {text: term_id for term_id, text in self.texts.items()}
+        self.recipes = {}
+        self.recipe_ids = {}
+        self._added = []  # (dictionnaire, clé) ajoutés par intern_*() depuis commit()/rollback()
+        for recipe_id, burger_type, name_id, blob in self.conn.execute(
+                "SELECT id, burger_type, name_id, ingredient_ids FROM recipes"):
+            recipe = Recipe(recipe_id, burger_type, self.texts[name_id],
+                            tuple(self.texts[i] for i in unpack_ids(blob)))
+            self.recipes[recipe_id] = recipe
+            self.recipe_ids[recipe[1:]] = recipe_id
+
+    def text(self, term_id):
+        if term_id is None:
+            return None
+        if term_id not in self.texts:
+            self.reload()
+        return self.texts[term_id]
+
+    def recipe(self, recipe_id):
+        if recipe_id not in self.recipes:
+            self.reload()
+        return self.recipes[recipe_id]
+
+    def intern_text(self, text):
+        """id d'un texte, ajouté à terms si besoin"""
+        term_id = self.term_ids.get(text)
+        if term_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO terms (text) VALUES (?)", (text,))
+            term_id = self.conn.execute("SELECT id FROM terms WHERE text = ?", (text,)).fetchone()[0]
+            self.term_ids[text] = term_id
+            self.texts[term_id] = text
+            self._added += [(self.term_ids, text), (self.texts, term_id)]
+        return term_id
+
+    def intern_recipe(self, burger_type, name, ingredients):
+        """id de la recette, ajoutée (avec son entrée plein texte) si besoin"""
+        ingredients = tuple(ingredients)
+        key = (burger_type, name, ingredients)
+        recipe_id = self.recipe_ids.get(key)
+        if recipe_id is None:
+            name_id = self.intern_text(name)
+            blob = pack_ids([self.intern_text(ing) for ing in ingredients])
+            row = self.conn.execute(
+                "SELECT id FROM recipes WHERE burger_type = ? AND name_id = ? AND ingredient_ids = ?",
+                (burger_type, name_id, blob)
+            ).fetchone()
+            if row is None:
+                recipe_id = self.conn.execute(
+                    "INSERT INTO recipes (burger_type, name_id, ingredient_ids) VALUES (?, ?, ?)",
+                    (burger_type, name_id, blob)
+                ).lastrowid
+                self.conn.execute(
+                    "INSERT INTO recipes_fts (rowid, name, ingredients) VALUES (?, ?, ?)",
+                    (recipe_id, name, "\n".join(ingredients))
+                )
+            else:
+                recipe_id = row[0]
+            self.recipes[recipe_id] = Recipe(recipe_id, *key)
+            self.recipe_ids[key] = recipe_id
+            self._added += [(self.recipes, recipe_id), (self.recipe_ids, key)]
+        return recipe_id
+
+    def row(self, burger, created_at=None):
+        """Ligne de INSERT_BURGER pour un burger (dict ou BurgerRecord)"""
+        return (
+            self.intern_recipe(burger['type'], burger['name'], burger['ingredients']),
+            self.intern_text(burger.get('sauce', '')),
+            burger.get('diet', ''),
+            burger['calories'],
+            timestamp() if created_at is None else created_at,
+            burger.get('key')
+        )
+
+    def record(self, burger_id, recipe_id, sauce_id, calories, created_at=None, key=None):
+        """BurgerRecord d'une ligne de la table burgers"""
+        return BurgerRecord(burger_id, self.recipe(recipe_id), self.text(sauce_id), calories, created_at, key)
+
+
+def _migrate_legacy(conn):
+    """Convertit l'ancien schéma (textes et JSON dans chaque ligne) en schéma interné"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for trigger in ("burgers_fts_insert", "burgers_fts_delete", "burgers_fts_update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS burgers_fts")
+        conn.execute("DROP INDEX IF EXISTS idx_burgers_created")
+        conn.execute("DROP INDEX IF EXISTS idx_burgers_type_created")
+        conn.execute("ALTER TABLE burgers RENAME TO burgers_legacy")
+        for statement in SCHEMA + FTS_SCHEMA:
+            conn.execute(statement)
+        book = RecipeBook(conn)
+        legacy = conn.execute(
+            "SELECT id, name, ingredients, sauce, diet, calories, created_at, burger_type "
+            "FROM burgers_legacy ORDER BY id"
+        )
+        while True:
+            rows = legacy.fetchmany(5000)
+            if not rows:
+                break
+            conn.executemany(
+                "INSERT INTO burgers (id, recipe_id, sauce_id, diet, calories, created_at, burger_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(row[0],) + book.row({
+                    "name": row[1] or "",
+                    "ingredients": json.loads(row[2] or "[]"),
+                    "sauce": row[3] or "",
+                    "diet": row[4] or "",
+                    "calories": row[5],
+                    "type": row[7],
+                }, timestamp(row[6]) if row[6] else 0) for row in rows]
+            )
+        conn.execute("DROP TABLE burgers_legacy")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    # Rend au système la place libérée par les anciennes lignes
+    conn.execute("VACUUM")
+
+
+def _repack_ingredient_ids(conn):
+    """v1 -> v2 : ingrédients des recettes sur 4 octets par id (2 auparavant, 65535 textes au plus)"""
+    repacked = []
+    for recipe_id, blob in conn.execute("SELECT id, ingredient_ids FROM recipes").fetchall():
+        ids = array("H")
+        ids.frombytes(blob)
+        if sys.byteorder == "big":
+            ids.byteswap()
+        repacked.append((pack_ids(ids), recipe_id))
+    # Blobs effacés d'abord : un ancien blob ne peut pas heurter un nouveau sur UNIQUE
+    conn.execute("UPDATE recipes SET ingredient_ids = NULL")
+    conn.executemany("UPDATE recipes SET ingredient_ids = ? WHERE id = ?", repacked)
+
+
+# Migrations au-delà du schéma complété par ensure_schema, numérotées par
+# PRAGMA user_version : MIGRATIONS[i](conn) fait passer la base de la version i + 1 à i + 2
+MIGRATIONS = (_repack_ingredient_ids,)
+SCHEMA_VERSION = 1 + len(MIGRATIONS)
+
+
+def rebuild_stats(conn):
+    """Recalcule les agrégats depuis la table burgers (un parcours par table)"""
+    for table, (columns, exprs) in STATS_KEYS.items():
+        keys = ", ".join(columns)
+        values = ", ".join(expr.format(row="burgers") for expr in exprs)
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(
+            f"INSERT INTO {table} ({keys}, burgers, calories) "
+            f"SELECT {values}, COUNT(*), COALESCE(SUM(calories), 0) FROM burgers GROUP BY {values}"
+        )
+
+
+def drop_stats(conn):
+    """Supprime agrégats et triggers (avant un chargement en masse) ; ensure_schema les reconstruit"""
+    for trigger in STATS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in STATS_KEYS:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def ensure_schema(conn):
+    """Crée les tables, index et agrégats manquants ; convertit une base à l'ancien format
+
+    Une base créée ou convertie ici est au format courant : elle est datée de
+    SCHEMA_VERSION pour que history_db.migrate ne lui applique pas MIGRATIONS.
+    """
+    created = not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'recipes'").fetchone()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(burgers)")}
+    if "ingredients" in columns:
+        _migrate_legacy(conn)
+    elif columns and "burger_key" not in columns:
+        # Les burgers déjà enregistrés n'ont pas de clé : ils restent lus depuis leur recette
+        conn.execute("ALTER TABLE burgers ADD COLUMN burger_key INTEGER")
+    for statement in SCHEMA + FTS_SCHEMA:
+        conn.execute(statement)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+    if not set(STATS_KEYS) | set(STATS_TRIGGERS) <= existing:
+        # Base antérieure aux agrégats, ou chargement en masse terminé : calcul complet, une fois
+        drop_stats(conn)
+        for statement in STATS_SCHEMA:
+            conn.execute(statement)
+        for trigger, body in STATS_TRIGGERS.items():
+            conn.execute(f"CREATE TRIGGER {trigger} {body}")
+        rebuild_stats(conn)
+    conn.commit()
+    if created:
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+# Recettes au-delà desquelles une page filtrée n'est plus lue recette par recette
+MERGE_RECIPES = 16
+
+
+def fts_query(text):
+    """Transforme une saisie libre en requête FTS5 (préfixes, tous les mots requis)"""
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+class HistoryReader:
+    """Lecture paginée par clé de l'historique, triée du plus récent au plus ancien
+
+    Une page est identifiée par la clé (created_at, id) de sa première ou
+    dernière ligne : la page N coûte autant que la page 1. La recherche plein
+    texte et le filtre de type portent sur les recettes ; les burgers sont
+    ensuite lus recette par recette dans l'index (recipe_id, created_at, id),
+    ou en une seule requête au-delà de MERGE_RECIPES recettes.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.book = RecipeBook(conn)
+
+    def _recipe_filter(self, filters):
+        """Sous-requête (sql, paramètres) des recettes retenues par les filtres texte et type
+
+        None sans ces filtres. En sous-requête, le nombre de recettes ne dépend
+        pas de la limite de paramètres de SQLite.
+        """
+        clauses, params = [], []
+        search = (filters.get("search") or "").strip()
+        if search:
+            clauses.append("id IN (SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ?)")
+            params.append(fts_query(search))
+        if filters.get("burger_type"):
+            clauses.append("burger_type = ?")
+            params.append(filters["burger_type"])
+        if not clauses:
+            return None
+        return f"SELECT id FROM recipes WHERE {' AND '.join(clauses)}", params
+
+    def _where(self, filters, recipes=True):
+        """Clauses et paramètres des filtres (texte et type si recipes, sauce, calories)"""
+        clauses, params = [], []
+        recipe_filter = self._recipe_filter(filters) if recipes else None
+        if recipe_filter is not None:
+            clauses.append(f"recipe_id IN ({recipe_filter[0]})")
+            params.extend(recipe_filter[1])
+        if filters.get("sauce"):
+            clauses.append("sauce_id = (SELECT id FROM terms WHERE text = ?)")
+            params.append(filters["sauce"])
+        if filters.get("min_calories") is not None:
+            clauses.append("calories >= ?")
+            params.append(filters["min_calories"])
+        if filters.get("max_calories") is not None:
+            clauses.append("calories <= ?")
+            params.append(filters["max_calories"])
+        return clauses, params
+
+    def _select(self, columns, before, after, limit, filters):
+        """SELECT paginé par clé, commun à page() et iter_burgers()"""
+        recipe_filter = self._recipe_filter(filters)
+        clauses, params = self._where(filters, recipes=False)
+        order = "DESC"
+        bound = before if before is not None else after
+        if bound is not None:
+            clauses.append(f"(created_at, id) {'<' if before is not None else '>'} (?, ?)")
+            params.extend(bound)
+            if before is None:
+                order = "ASC"
+
+        recipe_ids = None
+        if recipe_filter is not None:
+            recipe_sql, recipe_params = recipe_filter
+            recipe_ids = [row[0] for row in self.conn.execute(
+                f"{recipe_sql} ORDER BY id LIMIT {MERGE_RECIPES + 1}", recipe_params)]
+            if len(recipe_ids) > MERGE_RECIPES:
+                recipe_ids = None
+                clauses.insert(0, self._recipe_clause(recipe_sql, recipe_params, limit))
+                params[:0] = recipe_params
+
+        if recipe_ids is None:
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = self.conn.execute(
+                f"SELECT {columns} FROM burgers {where} "
+                f"ORDER BY created_at {order}, id {order} LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        else:
+            # Une requête par recette dans l'ordre de l'index, lue au fil de la fusion : une
+            # page coûte environ (recettes + limit) lignes quelle que soit sa position (un IN
+            # sur plusieurs recettes imposerait de trier toutes les lignes retenues)
+            sql = (f"SELECT created_at, id, {columns} FROM burgers "
+                   f"WHERE {' AND '.join(['recipe_id = ?'] + clauses)} "
+                   f"ORDER BY created_at {order}, id {order} LIMIT ?")
+            runs = [self.conn.execute(sql, [recipe_id] + params + [limit]) for recipe_id in recipe_ids]
+            merged = heapq.merge(*runs, key=lambda row: row[:2], reverse=order == "DESC")
+            rows = [row[2:] for row in itertools.islice(merged, limit)]
+            for run in runs:
+                run.close()
+        if order == "ASC":
+            rows.reverse()
+        return rows
+
+    def _recipe_clause(self, recipe_sql, recipe_params, limit):
+        """Filtre de recettes d'une seule requête, au-delà de MERGE_RECIPES recettes
+
+        Avec m lignes retenues sur n (agrégats stats_recipe), parcourir l'index
+        (created_at, id) lit environ limit * n / m lignes, lire les recettes dans
+        leur index puis trier en lit m : le moins cher des deux, soit au plus
+        ~racine(limit * n) lignes quel que soit le nombre de recettes.
+        """
+        matching, total = self.conn.execute(
+            f"SELECT SUM(CASE WHEN recipe_id IN ({recipe_sql}) THEN burgers ELSE 0 END), SUM(burgers) "
+            f"FROM stats_recipe", recipe_params
+        ).fetchone()
+        # "+recipe_id" écarte l'index des recettes : SQLite suit alors l'ordre de la clé
+        scan = (matching or 0) ** 2 > limit * (total or 0)
+        return f"{'+' if scan else ''}recipe_id IN ({recipe_sql})"
+
+    def page(self, before=None, after=None, limit=50, **filters):
+        """Lignes (id, name, created_at) du plus récent au plus ancien
+
+        created_at est en secondes (voir timestamp()) ; la clé d'une ligne est (created_at, id).
+        before : clé (created_at, id), renvoie les lignes strictement plus anciennes
+        after : clé (created_at, id), renvoie les lignes strictement plus récentes
+        """
+        recipe = self.book.recipe
+        return [
+            (burger_id, recipe(recipe_id).name, created_at)
+            for burger_id, recipe_id, created_at in self._select(
+                "id, recipe_id, created_at", before, after, limit, filters)
+        ]
+
+    def iter_burgers(self, chunk_size=500, **filters):
+        """Parcourt tout l'historique filtré, par blocs, en BurgerRecord"""
+        before = None
+        while True:
+            rows = self._select(
+                "id, recipe_id, sauce_id, calories, created_at, burger_key",
+                before, None, chunk_size, filters
+            )
+            for row in rows:
+                yield self.book.record(*row)
+            if len(rows) < chunk_size:
+                return
+            before = (rows[-1][4], rows[-1][0])
+
+    def get(self, burger_id):
+        """Un burger par son id (BurgerRecord), ou None"""
+        row = self.conn.execute(
+            "SELECT id, recipe_id, sauce_id, calories, created_at, burger_key FROM burgers WHERE id = ?",
+            (burger_id,)
+        ).fetchone()
+        return self.book.record(*row) if row else None
+
+    def count(self, **filters):
+        """Nombre de lignes correspondant aux filtres"""
+        clauses, params = self._where(filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(f"SELECT COUNT(*) FROM burgers {where}", params).fetchone()[0]
+
+    def id_bounds(self):
+        """Plus petit et plus grand id (O(1) grâce à la clé primaire)"""
+        # Deux sous-requêtes : SQLite n'optimise MIN/MAX que s'ils sont seuls
+        return self.conn.execute(
+            "SELECT (SELECT MIN(id) FROM burgers), (SELECT MAX(id) FROM burgers)"
+        ).fetchone()
+
+    def key_near_id(self, burger_id):
+        """Clé (created_at, id) de la première ligne d'id >= burger_id"""
+        row = self.conn.execute(
+            "SELECT created_at, id FROM burgers WHERE id >= ? ORDER BY id LIMIT 1",
+            (burger_id,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+
+class _Delete:
+    """Suppression en attente dans la file de l'écrivain"""
+
+    __slots__ = ("ids", "future")
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.future = Future()
+
+
+# Erreurs d'écriture d'un lot. Base verrouillée, disque plein ou dictionnaire des
+# textes saturé (OverflowError à l'internement) valent pour toutes ses lignes :
+# les reprendre une à une ne ferait que répéter l'échec
+_WRITE_ERRORS = (sqlite3.Error, KeyError, TypeError, ValueError, OverflowError)
+_BATCH_ERRORS = (sqlite3.OperationalError, OverflowError)
+
+
+class HistoryWriter:
+    """Écrit l'historique par lots sur un thread dédié avec sa propre connexion
+
+    Les burgers soumis sont regroupés puis insérés avec executemany dans une
+    seule transaction, dès que batch_size lignes sont en attente ou que
+    flush_interval secondes se sont écoulées depuis la première ; si le lot
+    échoue, ses lignes sont reprises une à une et seule la ligne fautive est
+    perdue (sauf erreur valant pour tout le lot, voir _BATCH_ERRORS). Les
+    lignes écrites (id, nom, date) ou les erreurs sont publiées dans la file
+    `saved` ; avec notify=False, pour les appelants qui ne la lisent pas, les
+    erreurs sont journalisées (logging).
+    Les suppressions passent par la même file (un seul écrivain) et sont
+    appliquées sans attendre la fin du délai de regroupement.
+    connect(db_path) ouvre la connexion (par défaut sqlite3 en WAL).
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path, batch_size=500, flush_interval=0.25, notify=True, connect=None):
+        self.db_path = db_path
+        self.connect = connect
+        self.notify = notify
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.saved = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, burger):
+        """Met un burger en attente d'écriture"""
+        self.pending.put((burger, timestamp()))
+
+    def submit_many(self, burgers):
+        """Met plusieurs burgers en attente d'écriture"""
+        created_at = timestamp()
+        for burger in burgers:
+            self.pending.put((burger, created_at))
+
+    def delete(self, burger_ids):
+        """Met des burgers en attente de suppression ; renvoie un Future (nombre supprimé)"""
+        item = _Delete(list(burger_ids))
+        self.pending.put(item)
+        return item.future
+
+    def flush(self):
+        """Bloque jusqu'à ce que tout ce qui a été soumis soit écrit"""
+        self.pending.join()
+
+    def close(self):
+        """Écrit les lignes restantes puis arrête le thread"""
+        self.pending.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        if self.connect is not None:
+            conn = self.connect(self.db_path)
+        else:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        book = RecipeBook(conn)
+        self._ready.set()
+        stop = False
+        while not stop:
+            item = self.pending.get()
+            if item is self._STOP:
+                self.pending.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not isinstance(batch[-1], _Delete):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self.pending.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(conn, book, batch)
+            for _ in batch:
+                self.pending.task_done()
+        conn.close()
+
+    def _write(self, conn, book, batch):
+        """Écrit un lot : ajouts dans une transaction, puis chaque suppression dans la sienne"""
+        inserts = [item for item in batch if not isinstance(item, _Delete)]
+        if inserts:
+            self._insert(conn, book, inserts)
+        for item in batch:
+            if isinstance(item, _Delete):
+                self._delete(conn, item)
+
+    def _insert(self, conn, book, batch):
+        """Insère un lot dans une seule transaction ; s'il échoue, ligne par ligne"""
+        try:
+            self._insert_batch(conn, book, batch)
+        except _WRITE_ERRORS as e:
+            # Le dictionnaire est relu une fois par lot : un autre écrivain a pu le compléter
+            book.reload()
+            if len(batch) == 1 or isinstance(e, _BATCH_ERRORS):
+                self._failed(e)
+                return
+            # Une ligne invalide ne fait pas perdre les autres
+            for item in batch:
+                try:
+                    self._insert_batch(conn, book, [item])
+                except _WRITE_ERRORS as e:
+                    self._failed(e)
+                    if isinstance(e, _BATCH_ERRORS):
+                        return
+
+    def _insert_batch(self, conn, book, batch):
+        """Insère les lignes dans une transaction ; en cas d'erreur, le dictionnaire est rétabli"""
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Textes et recettes nouveaux sont ajoutés dans la même transaction
+                conn.executemany(INSERT_BURGER, [book.row(burger, created_at) for burger, created_at in batch])
+                # Verrou d'écriture tenu : les id AUTOINCREMENT du lot sont consécutifs
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except BaseException:
+            # Les entrées ajoutées au dictionnaire pendant la transaction annulée n'existent plus
+            book.rollback()
+            raise
+        book.commit()
+        if self.notify:
+            first_id = last_id - len(batch) + 1
+            self.saved.put([
+                (first_id + i, burger["name"], created_at) for i, (burger, created_at) in enumerate(batch)
+            ])
+
+    def _failed(self, error):
+        """Publie une erreur d'écriture dans `saved`, ou la journalise si personne ne lit la file"""
+        if self.notify:
+            self.saved.put(error)
+        else:
+            logger.error("Error writing history: %s", error)
+
+    def _delete(self, conn, item):
+        """Supprime des burgers ; le Future de la demande reçoit le nombre supprimé ou l'erreur"""
+        try:
+            with conn:
+                count = conn.executemany("DELETE FROM burgers WHERE id = ?", [(i,) for i in item.ids]).rowcount
+        except sqlite3.Error as e:
+            item.future.set_exception(e)
+        else:
+            item.future.set_result(count)
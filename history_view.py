@@ -0,0 +1,236 @@
+"""Liste d'historique virtualisée : seules les lignes autour de la vue sont chargées"""
+import tkinter as tk
+from tkinter import ttk
+
+
+class HistoryView:
+    """Listbox qui fait glisser une fenêtre de lignes sur l'historique
+
+    La Listbox ne contient jamais plus de window_size lignes. Quand la vue
+    atteint le haut ou le bas de la fenêtre, la page voisine est chargée par
+    clé (created_at, id) et la page opposée est libérée. La barre de
+    défilement représente la position globale, estimée à partir des id.
+
+    Avec un TaskRunner, les requêtes s'exécutent sur sa file "db" (le reader
+    doit alors appartenir à ce thread) et la Listbox est mise à jour au retour ;
+    une requête plus récente remplace celle en cours. on_error(exception) est
+    appelé sur le thread Tk si une requête échoue ; la vue reste utilisable.
+    """
+
+    def __init__(self, parent, reader, window_size=60, font=('Helvetica', 10), tasks=None, on_error=None):
+        self.reader = reader
+        self.tasks = tasks
+        self.on_error = on_error
+        self.window_size = window_size
+        self.step = window_size // 3
+        self.filters = {}
+        self.rows = []
+        self.more_below = False
+        self.more_above = False
+        self.bounds = (None, None)
+        self._loading = False  # Fenêtre en cours de remplacement (refresh, jump)
+        self._sliding = False
+
+        self.listbox = tk.Listbox(parent, height=6, font=font)
+        self.listbox.pack(fill="both", expand=True, padx=5, pady=5)
+
+        self.scrollbar = ttk.Scrollbar(self.listbox)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.config(yscrollcommand=self._on_listbox_scroll)
+        self.scrollbar.config(command=self._on_scrollbar)
+
+    @staticmethod
+    def label(row):
+        """Texte affiché pour une ligne (id, name, created_at)"""
+        return f"{row[0]} - {row[1]}"
+
+    def set_filters(self, **filters):
+        """Change les filtres (type, sauce, calories, texte) et revient en haut"""
+        self.filters = {k: v for k, v in filters.items() if v not in (None, "")}
+        self.refresh()
+
+    def refresh(self):
+        """Recharge la première page"""
+        self._run(self._query_first, dict(self.filters))
+
+    def jump(self, fraction):
+        """Positionne la fenêtre à une fraction de l'historique"""
+        low, high = self.bounds
+        if low is None or fraction <= 0:
+            return self.refresh()
+        self._run(self._query_jump, dict(self.filters), high - int(fraction * (high - low)))
+
+    def _run(self, query, *args):
+        """Exécute une requête de fenêtre (sur la file "db" si possible) puis l'affiche"""
+        if self.reader is None:
+            # Base pas encore ouverte : la vue sera chargée ensuite
+            return
+        if self.tasks is None:
+            self._fill(*query(*args))
+        else:
+            # Remplace un glissement en attente (ses callbacks ne seront pas appelés) ;
+            # aucun autre ne part avant la nouvelle fenêtre
+            self._loading = True
+            self._sliding = False
+            self.tasks.submit(query, *args, lane="db", key=("history", id(self)),
+                              on_done=lambda result: self._fill(*result), on_error=self._failed)
+
+    def _failed(self, error):
+        """Requête de la file "db" échouée : débloque la vue et transmet l'erreur"""
+        self._loading = False
+        self._sliding = False
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _query_first(self, filters):
+        """(lignes, plus au-dessus, bornes) de la première page"""
+        bounds = self.reader.id_bounds()
+        return self.reader.page(limit=self.window_size, **filters), False, bounds
+
+    def _query_jump(self, filters, target):
+        """(lignes, plus au-dessus, bornes) autour de l'id target"""
+        key = self.reader.key_near_id(target)
+        if key is None:
+            return self._query_first(filters)
+        # Inclut la ligne d'ancrage : (created_at, id + 1) est juste au-dessus d'elle
+        rows = self.reader.page(before=(key[0], key[1] + 1), limit=self.window_size, **filters)
+        missing = self.window_size - len(rows)
+        if missing > 0:
+            # Près de la fin : complète la fenêtre avec les lignes plus récentes
+            anchor = self._key(rows[0]) if rows else key
+            rows = self.reader.page(after=anchor, limit=missing, **filters) + rows
+        above = bool(rows) and bool(self.reader.page(after=self._key(rows[0]), limit=1, **filters))
+        return rows, above, None
+
+    def prepend(self, rows):
+        """Ajoute en tête des lignes nouvellement écrites (si la vue est en haut, sans filtre)"""
+        if self.more_above or self.filters or not rows:
+            return
+        low, high = self.bounds
+        self.bounds = (rows[0][0] if low is None else low, rows[-1][0])
+        for row in rows:
+            self.rows.insert(0, row)
+            self.listbox.insert(0, self.label(row))
+        excess = len(self.rows) - self.window_size
+        if excess > 0:
+            del self.rows[-excess:]
+            self.listbox.delete(self.window_size, tk.END)
+            self.more_below = True
+
+    def selected_index(self):
+        """Index sélectionné dans la fenêtre, ou None"""
+        selection = self.listbox.curselection()
+        return selection[0] if selection else None
+
+    def selected_id(self):
+        """id du burger sélectionné, ou None"""
+        index = self.selected_index()
+        return None if index is None else self.rows[index][0]
+
+    def remove(self, burger_id):
+        """Retire une ligne affichée (après suppression en base)"""
+        for index, row in enumerate(self.rows):
+            if row[0] == burger_id:
+                del self.rows[index]
+                self.listbox.delete(index)
+                return
+
+    @staticmethod
+    def _key(row):
+        return (row[2], row[0])
+
+    def _fill(self, rows, above, bounds=None):
+        """Remplace le contenu de la fenêtre"""
+        if bounds is not None:
+            self.bounds = bounds
+        self.rows = list(rows)
+        self.listbox.delete(0, tk.END)
+        if self.rows:
+            self.listbox.insert(tk.END, *[self.label(row) for row in self.rows])
+        self.more_above = above
+        self.more_below = len(self.rows) >= self.window_size
+        self._loading = False
+        self._sliding = False
+
+    def _slide(self, slide):
+        """Charge la page voisine (slide : _slide_down ou _slide_up)"""
+        if self._loading:
+            # Fenêtre remplacée depuis la demande : le glissement n'a plus d'objet
+            return
+        edge = {"after": self._key(self.rows[0])} if slide == self._slide_up else {"before": self._key(self.rows[-1])}
+        filters = dict(self.filters)
+
+        def query():
+            return self.reader.page(limit=self.step, **edge, **filters)
+
+        if self.tasks is None:
+            try:
+                slide(query())
+            finally:
+                self._sliding = False
+        else:
+            def done(rows):
+                self._sliding = False
+                slide(rows)
+            self.tasks.submit(query, lane="db", key=("history", id(self)), on_done=done, on_error=self._failed)
+
+    def _slide_down(self, rows):
+        """Ajoute la page suivante et libère le haut de la fenêtre"""
+        self.more_below = len(rows) == self.step
+        if not rows:
+            return
+        first = self.listbox.nearest(0)
+        self.rows.extend(rows)
+        self.listbox.insert(tk.END, *[self.label(row) for row in rows])
+        drop = max(0, len(self.rows) - self.window_size)
+        if drop:
+            del self.rows[:drop]
+            self.listbox.delete(0, drop - 1)
+            self.more_above = True
+        self.listbox.yview(max(0, first - drop))
+
+    def _slide_up(self, rows):
+        """Ajoute la page précédente et libère le bas de la fenêtre"""
+        self.more_above = len(rows) == self.step
+        if not rows:
+            return
+        first = self.listbox.nearest(0)
+        self.rows[:0] = rows
+        self.listbox.insert(0, *[self.label(row) for row in rows])
+        excess = len(self.rows) - self.window_size
+        if excess > 0:
+            del self.rows[-excess:]
+            self.listbox.delete(self.window_size, tk.END)
+            self.more_below = True
+        self.listbox.yview(first + len(rows))
+
+    def _on_listbox_scroll(self, first, last):
+        """Glisse la fenêtre aux extrémités puis met à jour la barre de défilement"""
+        first, last = float(first), float(last)
+        if not self._sliding and not self._loading and self.rows:
+            if last >= 1.0 and self.more_below:
+                self._sliding = True
+                self.listbox.after_idle(self._slide, self._slide_down)
+            elif first <= 0.0 and self.more_above:
+                self._sliding = True
+                self.listbox.after_idle(self._slide, self._slide_up)
+        self._update_scrollbar(first, last)
+
+    def _update_scrollbar(self, first, last):
+        """Position globale estimée à partir de l'id de la première ligne visible"""
+        low, high = self.bounds
+        if not self.rows or low is None or high == low:
+            self.scrollbar.set(first, last)
+            return
+        span = high - low + 1
+        top = self.rows[min(self.listbox.nearest(0), len(self.rows) - 1)][0]
+        start = min(max((high - top) / span, 0.0), 1.0)
+        visible = (last - first) * len(self.rows)
+        self.scrollbar.set(start, min(1.0, start + max(visible / span, 0.01)))
+
+    def _on_scrollbar(self, *args):
+        """Défilement par crans/pages dans la fenêtre, ou saut direct (moveto)"""
+        if args[0] == "moveto":
+            self.jump(float(args[1]))
+        else:
+            self.listbox.yview(*args)
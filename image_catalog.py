@@ -0,0 +1,145 @@
+"""Catalogue des images de burgers avec miniatures en cache (mémoire et disque)"""
+import hashlib
+import os
+import random
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+THUMB_DIR = ".thumbnails"
+
+
+class ImageCatalog:
+    """Liste les images une fois, puis sert des miniatures déjà décodées
+
+    - le dossier n'est relu que si son mtime change ;
+    - les miniatures décodées sont gardées dans un LRU borné en octets ;
+    - chaque miniature est aussi enregistrée sur disque, clé (chemin, mtime, taille) ;
+    - la prochaine image aléatoire est décodée à l'avance sur un thread.
+    """
+
+    def __init__(self, img_dir, thumb_size=(300, 300), max_bytes=64 * 1024 * 1024, rng=random):
+        self.img_dir = img_dir
+        self.thumb_size = thumb_size
+        self.max_bytes = max_bytes
+        self.rng = rng
+        self.cache_dir = os.path.join(img_dir, THUMB_DIR)
+        self._entries = []
+        self._dir_mtime = None
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-prefetch")
+        self._next = None
+
+    def entries(self):
+        """Images du dossier (chemin, mtime, taille), relues seulement si le dossier a changé"""
+        try:
+            dir_mtime = os.stat(self.img_dir).st_mtime_ns
+        except OSError:
+            self._entries, self._dir_mtime = [], None
+            return self._entries
+        if dir_mtime != self._dir_mtime:
+            entries = []
+            with os.scandir(self.img_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_mtime_ns, stat.st_size))
+            self._entries, self._dir_mtime = entries, dir_mtime
+        return self._entries
+
+    def thumbnail(self, entry):
+        """Miniature d'une image : mémoire, puis cache disque, puis décodage"""
+        with self._lock:
+            img = self._cache.get(entry)
+            if img is not None:
+                self._cache.move_to_end(entry)
+                return img
+        img = self._load_cached(entry)
+        if img is None:
+            img = self._decode(entry)
+            self._store_cached(entry, img)
+        img.load()
+        self._remember(entry, img)
+        return img
+
+    def prefetch(self, entry):
+        """Décode une miniature en arrière-plan"""
+        return self._executor.submit(self.thumbnail, entry)
+
+    def next_image(self):
+        """Miniature d'une image aléatoire, la suivante étant préchargée"""
+        entries = self.entries()
+        if not entries:
+            return None
+        future, self._next = self._next, None
+        img = None
+        if future is not None:
+            entry, pending = future
+            # L'image préchargée peut avoir été supprimée ou modifiée entre-temps
+            if entry in entries:
+                img = pending.result()
+        if img is None:
+            img = self.thumbnail(self.rng.choice(entries))
+        upcoming = self.rng.choice(entries)
+        self._next = (upcoming, self.prefetch(upcoming))
+        return img
+
+    def clear(self, disk=False):
+        """Vide le cache mémoire (et le cache disque si demandé)"""
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+        if disk:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def close(self):
+        """Arrête le thread de préchargement"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _remember(self, entry, img):
+        """Ajoute au LRU et évince les plus anciennes au-delà de max_bytes"""
+        size = img.width * img.height * len(img.getbands())
+        with self._lock:
+            if entry in self._cache:
+                return
+            self._cache[entry] = img
+            self._cache_bytes += size
+            while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+                _, old = self._cache.popitem(last=False)
+                self._cache_bytes -= old.width * old.height * len(old.getbands())
+
+    def _decode(self, entry):
+        """Décode l'image d'origine et la réduit à la taille des miniatures"""
+        from PIL import Image  # Importé au premier affichage, pas au démarrage
+
+        img = Image.open(entry[0])
+        img.thumbnail(self.thumb_size)
+        return img
+
+    def _cache_path(self, entry):
+        path, mtime, size = entry
+        key = hashlib.sha1(f"{path}|{mtime}|{size}|{self.thumb_size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".png")
+
+    def _load_cached(self, entry):
+        from PIL import Image
+
+        try:
+            return Image.open(self._cache_path(entry))
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, entry, img):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            target = self._cache_path(entry)
+            tmp = f"{target}.{threading.get_ident()}.tmp"
+            img.save(tmp, format="PNG")
+            os.replace(tmp, target)
+        except OSError:
+            pass  # Le cache disque est facultatif (dossier en lecture seule...)
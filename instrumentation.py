@@ -0,0 +1,406 @@
+"""Instrumentation facultative des chemins critiques (histogrammes, profilage)
+
+Désactivée par défaut ; activée par UBG_PROFILE=1 ou l'option --profile.
+Désactivée, elle ne coûte rien : instrument() ne remplace aucune méthode et
+span() renvoie un contexte vide partagé.
+
+    UBG_PROFILE=1             active les mesures
+    UBG_METRICS_PORT=9100     expose GET /metrics et GET /profile?seconds=5
+    UBG_METRICS_DUMP=fichier  écrit les mesures périodiquement (JSON, "-" = stderr)
+    UBG_METRICS_INTERVAL=30   période du dump en secondes
+"""
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+SUB_BUCKETS = 4  # Seaux par puissance de deux (~19 % d'erreur relative)
+
+_NULL_SPAN = nullcontext()
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+
+
+class Histogram:
+    """Histogramme log-linéaire de durées en nanosecondes"""
+
+    __slots__ = ("counts", "count", "total", "min", "max", "_lock")
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(ns):
+        """Indice du seau : exposant binaire et deux bits de mantisse"""
+        bits = ns.bit_length()
+        if bits <= 2:
+            return ns
+        return bits * SUB_BUCKETS + ((ns >> (bits - 3)) & (SUB_BUCKETS - 1))
+
+    @staticmethod
+    def bucket_upper(index):
+        """Borne supérieure (ns) d'un seau"""
+        bits, sub = divmod(index, SUB_BUCKETS)
+        if bits == 0:
+            return index
+        return (SUB_BUCKETS + sub + 1) << (bits - 3)
+
+    def record(self, ns):
+        with self._lock:
+            self.counts[self.bucket(ns)] += 1
+            self.count += 1
+            self.total += ns
+            if self.min is None or ns < self.min:
+                self.min = ns
+            if ns > self.max:
+                self.max = ns
+
+    def percentile(self, fraction):
+        """Percentile approché (borne haute du seau), en ns"""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = fraction * self.count
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= rank:
+                    return min(self.bucket_upper(index), self.max)
+            return self.max
+
+    def snapshot(self):
+        """Résumé en millisecondes"""
+        summary = {
+            "count": self.count,
+            "total_ms": self.total / 1e6,
+            "mean_ms": self.total / self.count / 1e6 if self.count else 0,
+            "min_ms": (self.min or 0) / 1e6,
+            "max_ms": self.max / 1e6,
+        }
+        for label, fraction in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+            summary[label] = self.percentile(fraction) / 1e6
+        return summary
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    """Active les mesures (à appeler avant instrument())"""
+    global _enabled
+    _enabled = True
+
+
+def histogram(name):
+    hist = _histograms.get(name)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(name, Histogram())
+    return hist
+
+
+def record(name, seconds):
+    """Enregistre une durée mesurée ailleurs"""
+    if _enabled:
+        histogram(name).record(int(seconds * 1e9))
+
+
+class _Span:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+def span(name):
+    """Contexte chronométré ; contexte vide partagé si désactivé"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(histogram(name))
+
+
+def timed(func, name):
+    """Enveloppe func pour chronométrer chaque appel dans l'histogramme name"""
+    hist = histogram(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            hist.record(time.perf_counter_ns() - start)
+
+    wrapper.__wrapped_by_instrumentation__ = True
+    return wrapper
+
+
+def instrument(owner, stages):
+    """Remplace les méthodes/fonctions de owner (classe ou module) par des versions chronométrées
+
+    stages : {nom de l'attribut: nom de l'étape}. Sans effet si désactivé.
+    """
+    if not _enabled:
+        return
+    for attr, name in stages.items():
+        func = getattr(owner, attr)
+        if not getattr(func, "__wrapped_by_instrumentation__", False):
+            setattr(owner, attr, timed(func, name))
+
+
+def snapshot():
+    """Mesures des étapes déjà exécutées"""
+    with _lock:
+        items = sorted(_histograms.items())
+    return {name: hist.snapshot() for name, hist in items if hist.count}
+
+
+def reset():
+    with _lock:
+        for hist in _histograms.values():
+            hist.__init__()
+
+
+def format_table(metrics=None):
+    """Mesures sous forme de tableau texte"""
+    metrics = snapshot() if metrics is None else metrics
+    lines = [f"{'stage':<32} {'count':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10} {'total ms':>12}"]
+    for name, m in metrics.items():
+        lines.append(f"{name:<32} {m['count']:>8} {m['p50_ms']:>10.3f} {m['p99_ms']:>10.3f} "
+                     f"{m['max_ms']:>10.3f} {m['total_ms']:>12.1f}")
+    return "\n".join(lines)
+
+
+def sample_profile(seconds=5.0, interval=0.005, thread_ids=None):
+    """Profil par échantillonnage des piles de tous les threads
+
+    Renvoie {pile repliée: nombre d'échantillons}, au format des flame graphs
+    ("fichier:fonction;fichier:fonction"), pile la plus externe d'abord.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    samples = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (thread_ids is not None and ident not in thread_ids):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return samples
+
+
+def format_folded(samples):
+    """Profil au format replié (une pile et son nombre par ligne)"""
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common())
+
+
+def dump(path="-"):
+    """Écrit les mesures en JSON dans path ("-" pour stderr)"""
+    data = json.dumps({"time": time.time(), "metrics": snapshot()}, indent=2)
+    if path == "-":
+        print(data, file=sys.stderr)
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def start_dump(path="-", interval=30.0):
+    """Dump périodique sur un thread ; renvoie l'Event qui l'arrête"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            dump(path)
+        dump(path)
+
+    threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+    return stop
+
+
+def metrics_handler():
+    """Classe de requête du serveur de métriques (http.server importé à la demande)"""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs, urlparse
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        """GET /metrics (JSON, ou texte avec ?format=text) et GET /profile?seconds=5"""
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/metrics":
+                if query.get("format", [""])[0] == "text":
+                    self._send(200, format_table().encode("utf-8"), "text/plain; charset=utf-8")
+                else:
+                    self._send(200, json.dumps(snapshot()).encode("utf-8"), "application/json")
+            elif url.path == "/profile":
+                seconds = min(float(query.get("seconds", ["5"])[0]), 60.0)
+                samples = sample_profile(seconds)
+                self._send(200, format_folded(samples).encode("utf-8"), "text/plain; charset=utf-8")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def _send(self, status, data, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsRequestHandler
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serveur de métriques local sur un thread ; renvoie le serveur"""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), metrics_handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def configure(profile=False, metrics_port=None, metrics_dump=None, interval=None):
+    """Active l'instrumentation selon les options, complétées par l'environnement
+
+    Renvoie True si elle est active.
+    """
+    env = os.environ
+    profile = profile or env.get("UBG_PROFILE", "").lower() in ("1", "true", "yes", "on")
+    if not profile:
+        return False
+    enable()
+    port = metrics_port if metrics_port is not None else env.get("UBG_METRICS_PORT")
+    if port:
+        serve_metrics(int(port))
+    path = metrics_dump or env.get("UBG_METRICS_DUMP")
+    if path:
+        start_dump(path, float(interval or env.get("UBG_METRICS_INTERVAL", 30)))
+    return True
+
+
+def add_arguments(parser):
+    """Options --profile, --metrics-port, --metrics-dump et --metrics-interval"""
+    parser.add_argument("--profile", action="store_true", help="active l'instrumentation (ou UBG_PROFILE=1)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="port de GET /metrics et /profile")
+    parser.add_argument("--metrics-dump", default=None, help="fichier de dump périodique des mesures (- = stderr)")
+    parser.add_argument("--metrics-interval", type=float, default=None, help="période du dump (s)")
+
+
+# Étapes communes à l'application et au service : "module.Classe" -> {attribut: étape}
+CORE_STAGES = {
+    "burger_engine.BurgerEngine": {
+        "generate_classic": "generate.classic",
+        "generate_extreme": "generate.extreme",
+        "generate_zodiac": "generate.zodiac",
+        "generate_many": "generate.many",
+    },
+    "history_store.HistoryReader": {
+        "page": "sql.history_page",
+        "count": "sql.history_count",
+        "id_bounds": "sql.id_bounds",
+        "key_near_id": "sql.key_near_id",
+    },
+    "history_store.HistoryWriter": {"_write": "sql.save_batch"},
+    "image_catalog.ImageCatalog": {"thumbnail": "image.thumbnail", "_decode": "image.decode"},
+    "pdf_export.BurgerSheetPDF": {"add_burger": "pdf.add_burger", "close": "pdf.write"},
+    "pdf_export": {"export_history_pdf": "pdf.export_history"},
+}
+
+
+def _instrument_module(module, targets):
+    """Applique les étapes [(classe ou "", {attribut: étape})] d'un module importé"""
+    for class_name, mapping in targets:
+        instrument(getattr(module, class_name) if class_name else module, mapping)
+
+
+class _LoaderProxy:
+    """Chargeur d'un module différé : instrumente le module juste après son exécution"""
+
+    def __init__(self, loader, targets):
+        self._loader = loader
+        self._targets = targets
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)  # get_source (tracebacks), is_package...
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        _instrument_module(module, self._targets)
+
+
+class _DeferredFinder:
+    """sys.meta_path : les modules pas encore importés sont instrumentés à leur premier import
+
+    Importer pdf_export (donc fpdf) pour l'instrumenter annulerait l'import à
+    la demande qui garde le démarrage rapide, et échouerait sans fpdf.
+    """
+
+    def __init__(self):
+        self.pending = {}  # module -> [(classe ou "", {attribut: étape})]
+
+    def find_spec(self, name, path=None, target=None):
+        targets = self.pending.pop(name, None)
+        if targets is None:
+            return None
+        import importlib.util
+
+        spec = importlib.util.find_spec(name)  # Les autres finders (celui-ci n'a plus l'entrée)
+        if spec is not None and spec.loader is not None:
+            spec.loader = _LoaderProxy(spec.loader, targets)
+        return spec
+
+
+_deferred = _DeferredFinder()
+
+
+def instrument_core(stages=CORE_STAGES):
+    """Instrumente les étapes communes ; un module pas encore importé l'est à son premier import"""
+    if not _enabled:
+        return
+    by_module = collections.defaultdict(list)
+    for target, mapping in stages.items():
+        module_name, _, class_name = target.partition(".")
+        by_module[module_name].append((class_name, mapping))
+    for module_name, targets in by_module.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            _instrument_module(module, targets)
+        else:
+            _deferred.pending.setdefault(module_name, []).extend(targets)
+    if _deferred.pending and _deferred not in sys.meta_path:
+        sys.meta_path.insert(0, _deferred)
@@ -0,0 +1,228 @@
+"""Export PDF par lots : plusieurs burgers par page, lus en flux depuis SQLite
+
+Les pages sont écrites dans le fichier dès qu'elles sont pleines : la mémoire
+reste constante quelle que soit la taille de l'historique.
+"""
+import os
+import threading
+import zlib
+from array import array
+
+from fpdf import FPDF
+
+from burger_render import CACHE, burger_identity, latin1, sheet_card
+from history_db import connect
+from history_store import HistoryReader
+
+# Grille A4 : 2 colonnes × 3 lignes de fiches
+COLUMNS = 2
+ROWS = 3
+MARGIN = 10
+GUTTER = 6
+LINE = 5
+
+# Page A4 en mm, points PDF par mm
+PAGE_W, PAGE_H = 210, 297
+K = 72 / 25.4
+# Polices de base (non embarquées) : objets 3 et 4, ressources /F1 et /F2
+FONTS = {"B": "F1", "": "F2"}
+# Objets fixes : 1 catalogue, 2 arbre des pages, 3-4 polices ; puis contenu/page par page
+FIRST_PAGE_OBJECT = 5
+
+
+def _escape(text):
+    """Échappe une chaîne littérale PDF"""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").replace("\r", "\\r")
+
+
+class BurgerSheetPDF:
+    """Document PDF en grille écrit en flux dans un fichier binaire ouvert
+
+    Seule la page en cours est gardée en mémoire, avec la position de chaque
+    objet pour la table xref. FPDF ne sert qu'à mesurer les titres.
+    """
+
+    def __init__(self, file, labels):
+        self.file = file
+        self.position = 0
+        self.offsets = array("Q", [0] * (FIRST_PAGE_OBJECT - 1))
+        self.pages = 0
+        self.labels = {key: latin1(value) for key, value in labels.items()}
+        self.card_w = (PAGE_W - 2 * MARGIN - (COLUMNS - 1) * GUTTER) / COLUMNS
+        self.card_h = (PAGE_H - 2 * MARGIN - (ROWS - 1) * GUTTER) / ROWS
+        self.max_lines = int((self.card_h - 4 * LINE) // LINE)
+        self.max_chars = int(self.card_w / 1.6)  # ~1,6 mm par caractère en corps 9
+        # Positions des fiches, identiques sur toutes les pages
+        self.slots = [
+            (MARGIN + col * (self.card_w + GUTTER), MARGIN + row * (self.card_h + GUTTER))
+            for row in range(ROWS) for col in range(COLUMNS)
+        ]
+        self.slot = len(self.slots)
+        self._ops = []
+        self._style = None
+        self._labels_key = tuple(self.labels.items())
+        self._metrics = FPDF()
+        self._metrics.set_font("Helvetica", "B", 12)
+        # Débuts de blocs de texte propres à chaque case, et libellé "Ingrédients"
+        self._label_ops = [
+            self._move(x + 2, y + 3 * LINE) + self._lines([self.labels["ingredients_label"]])
+            for x, y in self.slots
+        ]
+        self._body_moves = [self._move(x + 2, y + 4 * LINE) for x, y in self.slots]
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for number, (style, name) in enumerate((("B", "Helvetica-Bold"), ("", "Helvetica")), 3):
+            self._object(number, f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} "
+                                 f"/Encoding /WinAnsiEncoding >>".encode())
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def _object(self, number, *parts):
+        """Écrit l'objet indirect number et note sa position"""
+        if number > len(self.offsets):
+            self.offsets.append(0)
+        self.offsets[number - 1] = self.position
+        self._write(b"%d 0 obj\n" % number)
+        for part in parts:
+            self._write(part)
+        self._write(b"\nendobj\n")
+
+    def _move(self, x, y):
+        """Ouverture d'un bloc de texte du flux PDF en (x, y)"""
+        return f"BT {x * K:.2f} {(PAGE_H - y) * K:.2f} Td "
+
+    def _lines(self, lines):
+        """Fin d'un bloc de texte : lignes espacées de LINE, sans position (réutilisable dans toute case)"""
+        step = f" 0 {-LINE * K:.2f} Td "
+        return step.join(f"({_escape(line)}) Tj" for line in lines) + " ET"
+
+    def _fit_title(self, title):
+        """Titre tronqué avec "..." pour tenir dans la fiche (marge de 2 mm de chaque côté)"""
+        width = self.card_w - 4
+        measure = self._metrics.get_string_width
+        if measure(title) <= width:
+            return title
+        while title and measure(title + "...") > width:
+            title = title[:-1]
+        return title.rstrip() + "..."
+
+    def _card_ops(self, burger):
+        """Titre, largeur du titre et corps d'une fiche"""
+        title, lines = sheet_card(burger, self.labels, self.max_lines, self.max_chars)
+        title = self._fit_title(title)
+        return self._lines([title]), self._metrics.get_string_width(title), self._lines(lines)
+
+    def _font(self, style, size):
+        """Ne change de police que si nécessaire"""
+        if self._style != (style, size):
+            self._ops.append(f"/{FONTS[style]} {size:.2f} Tf")
+            self._style = (style, size)
+
+    def _flush_page(self):
+        """Écrit la page en cours (flux compressé puis objet page) et la libère"""
+        content = zlib.compress("\n".join(self._ops).encode("latin-1"))
+        number = len(self.offsets) + 1
+        self._object(number, b"<< /Filter /FlateDecode /Length %d >>\nstream\n" % len(content),
+                     content, b"\nendstream")
+        self._object(number + 1, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_W * K:.2f} {PAGE_H * K:.2f}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {number} 0 R >>"
+        ).encode())
+        self.pages += 1
+        self._ops = []
+
+    def add_burger(self, burger):
+        """Place un burger dans la prochaine case libre"""
+        if self.slot == len(self.slots):
+            if self._ops:
+                self._flush_page()
+            self._ops = ["0.57 w"]
+            self._style = None
+            self.slot = 0
+        slot = self.slot
+        x, y = self.slots[slot]
+        self.slot += 1
+
+        self._ops.append(f"{x * K:.2f} {(PAGE_H - y) * K:.2f} {self.card_w * K:.2f} {-self.card_h * K:.2f} re S")
+        # Fragments du flux PDF de la fiche, calculés une fois par burger (cache de rendu)
+        # et placés dans la case ; un seul bloc de texte pour toutes les lignes
+        title_op, title_w, body_op = CACHE.get(
+            ("sheet", burger_identity(burger), self._labels_key),
+            lambda: self._card_ops(burger)
+        )
+        self._font("B", 12)
+        self._ops.append(self._move(x + max(2, (self.card_w - title_w) / 2), y + LINE + 2) + title_op)
+        self._font("B", 10)
+        self._ops.append(self._label_ops[slot])
+        self._font("", 9)
+        self._ops.append(self._body_moves[slot] + body_op)
+
+    def close(self):
+        """Écrit la dernière page (une page vide si aucun burger), l'arbre des pages et la table xref"""
+        if self._ops or not self.pages:
+            self._flush_page()
+        # Les objets page suivent chacun leur flux de contenu : numéros FIRST_PAGE_OBJECT + 1, + 3...
+        kids = range(FIRST_PAGE_OBJECT + 1, FIRST_PAGE_OBJECT + 2 * self.pages, 2)
+        self._object(2, b"<< /Type /Pages /Kids [", *(b"%d 0 R " % kid for kid in kids),
+                     b"] /Count %d >>" % self.pages)
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.offsets) + 1))
+        for offset in self.offsets:
+            self._write(b"%010d 00000 n \n" % offset)
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (len(self.offsets) + 1, xref))
+
+
+def export_history_pdf(db_path, file_path, labels, filters=None, progress=None,
+                       cancel=None, chunk_size=500):
+    """Exporte l'historique filtré dans un seul PDF ; renvoie le nombre de burgers
+
+    Conçu pour tourner hors du thread Tk : ouvre sa propre connexion, lit les
+    lignes par blocs (pagination par clé) et appelle progress(fait, total).
+    cancel est un threading.Event facultatif qui interrompt l'export.
+    """
+    filters = filters or {}
+    conn = connect(db_path, readonly=True)
+    # Écrit à côté puis renommé : pas de PDF tronqué en cas d'annulation ou d'erreur
+    part = file_path + ".part"
+    try:
+        reader = HistoryReader(conn)
+        total = reader.count(**filters)
+        done = 0
+        with open(part, "wb") as f:
+            pdf = BurgerSheetPDF(f, labels)
+            for burger in reader.iter_burgers(chunk_size=chunk_size, **filters):
+                if cancel is not None and cancel.is_set():
+                    return done
+                pdf.add_burger(burger)
+                done += 1
+                if progress is not None and done % chunk_size == 0:
+                    progress(done, total)
+            pdf.close()
+        os.replace(part, file_path)
+        if progress is not None:
+            progress(done, total)
+        return done
+    finally:
+        conn.close()
+        if os.path.exists(part):
+            os.remove(part)
+
+
+def start_export(db_path, file_path, labels, filters=None, progress=None, done=None):
+    """Lance export_history_pdf sur un thread ; done(nombre ou exception) à la fin"""
+    cancel = threading.Event()
+
+    def run():
+        try:
+            result = export_history_pdf(db_path, file_path, labels, filters, progress, cancel)
+        except Exception as e:
+            result = e
+        if done is not None:
+            done(result)
+
+    threading.Thread(target=run, name="pdf-export", daemon=True).start()
+    return cancel
@@ -0,0 +1,88 @@
+"""Traductions compilées par langue, rechargées à chaud quand leur fichier change
+
+Le fichier est relu, validé et recompilé (seules les sections modifiées, voir
+burger_tables.compile_translations) hors du thread d'affichage, puis
+l'entrée (traductions, tables, moteur) de la langue est remplacée d'un bloc :
+un lecteur qui a pris une entrée la garde cohérente jusqu'au bout.
+"""
+import os
+import threading
+
+from burger_engine import SRC_DIR, BurgerEngine, find_translations, load_translations
+from burger_tables import TranslationError, compile_translations
+
+
+def _stamp(path):
+    """(mtime, taille) d'un fichier, None s'il a disparu"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class TranslationManager:
+    """Langues disponibles dans src_dir et leurs traductions compilées
+
+    entries : langue -> (traductions, tables, moteur), remplacée en une seule
+    affectation par install(). changed() ne fait que des os.stat : il peut être
+    appelé régulièrement depuis le thread Tk, compile() étant exécuté ailleurs.
+    """
+
+    def __init__(self, src_dir=SRC_DIR):
+        self.src_dir = src_dir
+        self.files = find_translations(src_dir)
+        self.entries = {}
+        self._seen = {}  # langue -> version du fichier lue en dernier (compilée ou refusée)
+        self._lock = threading.Lock()
+
+    def languages(self):
+        return list(self.files)
+
+    def compile(self, lang):
+        """Relit et compile une langue sans l'installer ; renvoie son entrée
+
+        Lève FileNotFoundError, JSONDecodeError ou TranslationError ; l'entrée
+        déjà installée reste alors en place.
+        """
+        path = self.files.get(lang, os.path.join(self.src_dir, f"translations_{lang.lower()}.json"))
+        stamp = _stamp(path)
+        with self._lock:
+            self._seen[lang] = stamp
+            previous = self.entries.get(lang)
+        trans = load_translations(lang, self.src_dir)
+        try:
+            tables = compile_translations(trans, previous[:2] if previous else None)
+        except TranslationError as e:
+            raise TranslationError(e.problems, path) from None
+        # Les clés des burgers codent la position des sauces et des signes : même nombre partout
+        problems = []
+        for other, (_, other_tables, _) in list(self.entries.items()):
+            if other == lang:
+                continue
+            if len(other_tables.sauces) != len(tables.sauces):
+                problems.append(f"sauces: {len(tables.sauces)} entries, {len(other_tables.sauces)} in {other}")
+            if len(other_tables.zodiac) != len(tables.zodiac):
+                problems.append(f"zodiac_signs: {len(tables.zodiac)} entries, {len(other_tables.zodiac)} in {other}")
+        if problems:
+            raise TranslationError(problems, path)
+        if previous is not None and previous[1] == tables:
+            engine = previous[2]  # Seuls des libellés ont changé
+        else:
+            engine = BurgerEngine(tables)
+        return trans, tables, engine
+
+    def install(self, lang, entry):
+        """Remplace l'entrée d'une langue par le résultat de compile() ; renvoie l'entrée"""
+        self.entries[lang] = entry
+        return entry
+
+    def load(self, lang):
+        """compile() puis install()"""
+        return self.install(lang, self.compile(lang))
+
+    def changed(self):
+        """Langues chargées dont le fichier a changé depuis sa dernière lecture"""
+        with self._lock:
+            seen = dict(self._seen)
+        return [lang for lang, stamp in seen.items() if _stamp(self.files.get(lang, "")) != stamp]
@@ -0,0 +1,193 @@
+"""Tâches de fond pour l'interface Tk : le travail sur des threads, les résultats via root.after"""
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+# Files d'exécution : une seule pour SQLite (sa connexion n'est utilisée que
+# par ce thread), une pour les images, deux pour le reste (PDF, traductions)
+DEFAULT_LANES = {"db": 1, "image": 1, "io": 2}
+FRAME_MS = 1000 / 60
+
+
+class Task:
+    """Travail soumis au TaskRunner ; cancel() empêche l'appel de ses callbacks"""
+
+    __slots__ = ("key", "future", "on_done", "on_error", "cancelled")
+
+    def __init__(self, key, on_done, on_error):
+        self.key = key
+        self.future = None
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    """Exécute des fonctions hors du thread Tk et rend leurs résultats au thread Tk
+
+    Les callbacks on_done(résultat) / on_error(exception) sont toujours appelés
+    sur le thread Tk, depuis une boucle root.after active seulement tant que
+    des tâches sont en cours. Une tâche soumise avec une clé remplace la tâche
+    précédente de même clé : celle-ci est annulée si elle n'a pas démarré, et
+    son résultat est ignoré sinon.
+
+    Sans root, les tâches sont exécutées immédiatement (scripts, benchmarks).
+    """
+
+    def __init__(self, root=None, lanes=None, poll_ms=10):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executors = {}
+        if root is not None:
+            self.executors = {
+                name: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"ui-{name}")
+                for name, workers in (lanes or DEFAULT_LANES).items()
+            }
+        self._results = queue.Queue()
+        self._latest = {}
+        self._pending = set()
+        self._polling = False
+
+    def submit(self, func, *args, lane="io", key=None, on_done=None, on_error=None):
+        """Exécute func(*args) sur la file lane ; renvoie la Task"""
+        task = Task(key, on_done, on_error)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = task
+        if self.root is None:
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._finish(task, None, e)
+            else:
+                self._finish(task, result, None)
+            return task
+        task.future = self.executors[lane].submit(func, *args)
+        self._pending.add(task)
+        task.future.add_done_callback(lambda future: self._results.put(task))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def cancel(self, key):
+        """Annule la tâche en cours pour cette clé"""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def drain(self, timeout=None):
+        """Attend les tâches en cours et appelle leurs callbacks (thread Tk)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                task = self._results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            self._handle(task)
+            self._dispatch()
+
+    def close(self, wait_pending=False):
+        for executor in self.executors.values():
+            executor.shutdown(wait=wait_pending, cancel_futures=not wait_pending)
+
+    def _poll(self):
+        self._dispatch()
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _dispatch(self):
+        """Appelle les callbacks des tâches terminées ; renvoie leur nombre"""
+        count = 0
+        while True:
+            try:
+                task = self._results.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            self._handle(task)
+
+    def _handle(self, task):
+        self._pending.discard(task)
+        if task.future.cancelled():
+            if self._latest.get(task.key) is task:
+                del self._latest[task.key]
+            return
+        error = task.future.exception()
+        self._finish(task, None if error else task.future.result(), error)
+
+    def _finish(self, task, result, error):
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        if task.cancelled:
+            return
+        if error is None:
+            if task.on_done is not None:
+                task.on_done(result)
+        elif task.on_error is not None:
+            task.on_error(error)
+        elif self.root is not None:
+            self.root.report_callback_exception(type(error), error, error.__traceback__)
+        else:
+            raise error
+
+
+class LatencyMonitor:
+    """Mesure le retard de la boucle Tk : un battement toutes les interval_ms
+
+    Le retard d'un battement est le temps pendant lequel le thread Tk était
+    occupé ; au-delà d'une image (~16,7 ms) la fenêtre a gelé.
+    """
+
+    def __init__(self, root, interval_ms=50, budget_ms=FRAME_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self.beats = 0
+        self.late = 0
+        self.worst_ms = 0.0
+        self._expected = None
+        self._after_id = None
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _beat(self):
+        now = time.perf_counter()
+        delay_ms = max(0.0, (now - self._expected) * 1000)
+        self.beats += 1
+        if delay_ms > self.budget_ms:
+            self.late += 1
+        self.worst_ms = max(self.worst_ms, delay_ms)
+        instrumentation.record("ui.loop_delay", delay_ms / 1000)
+        self._expected = now + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+
+    def report(self):
+        """Résumé : battements, battements en retard d'au moins une image, pire retard"""
+        return {
+            "beats": self.beats,
+            "late": self.late,
+            "worst_ms": round(self.worst_ms, 3),
+            "budget_ms": round(self.budget_ms, 3),
+        }